@@ -15,15 +15,23 @@ CREATE TABLE fridges (
   fridge_id      INT AUTO_INCREMENT PRIMARY KEY,
   name           VARCHAR(100) NOT NULL,
   location_desc  TEXT,
-  created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  -- bumped by every change to the fridge's items or members (delta sync)
+  sync_version   INT NOT NULL DEFAULT 0
 );
 
 -- 3) LINK USERS ↔ FRIDGES (many-to-many for sharing)
+--    (MySQL ignores inline REFERENCES, so foreign keys are declared as
+--    table constraints throughout)
 CREATE TABLE fridge_users (
-  fridge_id      INTEGER NOT NULL REFERENCES fridges(fridge_id) ON DELETE CASCADE,
-  user_id        INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
-  role           VARCHAR(20) NOT NULL  -- e.g. 'owner', 'editor', 'viewer'
-  , PRIMARY KEY(fridge_id, user_id)
+  fridge_id      INTEGER NOT NULL,
+  user_id        INTEGER NOT NULL,
+  role           VARCHAR(20) NOT NULL,  -- e.g. 'owner', 'editor', 'viewer'
+  version        INT NOT NULL DEFAULT 0  -- fridges.sync_version when shared
+  , PRIMARY KEY(fridge_id, user_id),
+
+  CONSTRAINT fk_fridge_users_fridge FOREIGN KEY (fridge_id) REFERENCES fridges(fridge_id) ON DELETE CASCADE,
+  CONSTRAINT fk_fridge_users_user   FOREIGN KEY (user_id)   REFERENCES users(user_id)     ON DELETE CASCADE
 );
 
 -- 4) PRODUCTS (catalog of known foods)
@@ -38,41 +46,101 @@ CREATE TABLE products (
 -- 5) QRCODES → PRODUCT MAPPING
 CREATE TABLE qr_codes (
   qr_code        VARCHAR(100) PRIMARY KEY,  -- the scanned code text
-  product_id     INTEGER NOT NULL REFERENCES products(product_id),
+  product_id     INTEGER NOT NULL,
   batch_info     VARCHAR(255),             -- optional batch/lot
-  info_url       TEXT
+  info_url       TEXT,
+
+  CONSTRAINT fk_qr_codes_product FOREIGN KEY (product_id) REFERENCES products(product_id)
 );
 
 -- 6) FRIDGE ITEMS (instances in a fridge)
 CREATE TABLE fridge_items (
   item_id            INT AUTO_INCREMENT PRIMARY KEY,
-  fridge_id          INTEGER NOT NULL REFERENCES fridges(fridge_id) ON DELETE CASCADE,
-  added_by           INTEGER NOT NULL REFERENCES users(user_id),
-  qr_code            VARCHAR(100) NOT NULL REFERENCES qr_codes(qr_code),
+  fridge_id          INTEGER NOT NULL,
+  added_by           INTEGER NOT NULL,
+  qr_code            VARCHAR(100) NOT NULL,
   added_at           TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   factory_expires_at DATE NOT NULL,       -- from QR lookup
   opened_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP NULL,  -- null until user marks it “opened”
 
-  -- computed spoil_date: opened_at + open_life_days (if opened),
-  -- otherwise factory_expires_at
   open_life_days     INT NOT NULL,
-  spoil_date         DATE AS (
-                        CASE
-                          WHEN opened_at IS NOT NULL
-                            THEN DATE_ADD(opened_at, INTERVAL open_life_days DAY)
-                          ELSE factory_expires_at
-                        END
-                      ) STORED
+  -- opened_at + open_life_days (if opened), otherwise factory_expires_at.
+  -- Written by the API (app/spoil.py holds the rule, in Python and as a
+  -- SQL expression for bulk recomputes); a generated column would reject
+  -- those writes.
+  spoil_date         DATE,
+  -- fridges.sync_version of the last write to the item
+  version            INT NOT NULL DEFAULT 0,
+
+  INDEX ix_fridge_items_fridge_spoil (fridge_id, spoil_date),  -- fridge listings
+  INDEX ix_fridge_items_spoil_date (spoil_date),               -- notification scans
+  INDEX ix_fridge_items_fridge_version (fridge_id, version),   -- delta sync
+
+  CONSTRAINT fk_fridge_items_fridge  FOREIGN KEY (fridge_id) REFERENCES fridges(fridge_id) ON DELETE CASCADE,
+  CONSTRAINT fk_fridge_items_user    FOREIGN KEY (added_by)  REFERENCES users(user_id),
+  CONSTRAINT fk_fridge_items_qr_code FOREIGN KEY (qr_code)   REFERENCES qr_codes(qr_code)
 );
 
 -- 7) NOTIFICATIONS
 CREATE TABLE notifications (
   note_id            INT AUTO_INCREMENT PRIMARY KEY,
-  item_id            INTEGER NOT NULL REFERENCES fridge_items(item_id) ON DELETE CASCADE,
-  user_id            INTEGER NOT NULL REFERENCES users(user_id),
+  item_id            INTEGER NOT NULL,
+  user_id            INTEGER NOT NULL,
   notified_at        TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   type               VARCHAR(20) NOT NULL,  -- e.g. 'about_to_spoil', 'spoiled'
-  sent               BOOLEAN DEFAULT FALSE
+  sent               BOOLEAN DEFAULT FALSE,
+  -- 1 while un-sent, NULL once sent (NULLs never collide in a UNIQUE key)
+  pending            BOOLEAN AS (CASE WHEN sent THEN NULL ELSE 1 END) STORED,
+  -- set while a delivery worker holds the notification (POST /notifications/claim)
+  claim_token        VARCHAR(32) NULL,
+  lease_expires_at   DATETIME NULL,
+
+  INDEX ix_notifications_user (user_id, note_id),
+  INDEX ix_notifications_sent (sent, note_id),           -- delivery claims
+  -- at most one un-sent notification per item, user and type
+  UNIQUE KEY uq_notifications_pending (item_id, user_id, type, pending),
+
+  CONSTRAINT fk_notifications_item FOREIGN KEY (item_id) REFERENCES fridge_items(item_id) ON DELETE CASCADE,
+  CONSTRAINT fk_notifications_user FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+
+-- 8) NOTIFICATION SCAN WATERMARK (last day the generator scanned)
+CREATE TABLE notification_scans (
+  name               VARCHAR(50) PRIMARY KEY,  -- e.g. 'notifications'
+  last_scan_date     DATE NOT NULL
+);
+
+-- 9) ITEMS CREATED OR RE-DATED SINCE THE LAST SCAN
+CREATE TABLE pending_item_scans (
+  item_id            INTEGER NOT NULL PRIMARY KEY,
+  seq                INT NOT NULL DEFAULT 0,   -- bumped when queued again
+
+  CONSTRAINT fk_pending_item_scans_item FOREIGN KEY (item_id) REFERENCES fridge_items(item_id) ON DELETE CASCADE
+);
+
+-- 10) ITEMS PER FRIDGE AND SPOIL DATE (expiring-soon dashboard summary,
+--     kept in step with fridge_items by the API)
+CREATE TABLE fridge_spoil_counts (
+  fridge_id          INTEGER NOT NULL,
+  spoil_date         DATE NOT NULL,
+  item_count         INT NOT NULL,
+  PRIMARY KEY (fridge_id, spoil_date),
+
+  CONSTRAINT fk_fridge_spoil_counts_fridge FOREIGN KEY (fridge_id) REFERENCES fridges(fridge_id) ON DELETE CASCADE
+);
+
+-- 11) DELETED ITEMS AND REVOKED SHARES, for delta sync
+--     (GET /fridges/{id}/changes?since=)
+CREATE TABLE fridge_tombstones (
+  tombstone_id       INT AUTO_INCREMENT PRIMARY KEY,
+  fridge_id          INTEGER NOT NULL,
+  version            INT NOT NULL,          -- fridges.sync_version of the delete
+  kind               VARCHAR(10) NOT NULL,  -- 'item' or 'member'
+  ref_id             INTEGER NOT NULL,      -- item_id or user_id
+
+  INDEX ix_fridge_tombstones_fridge_version (fridge_id, version),
+
+  CONSTRAINT fk_fridge_tombstones_fridge FOREIGN KEY (fridge_id) REFERENCES fridges(fridge_id) ON DELETE CASCADE
 );
 
 
@@ -186,6 +254,20 @@ VALUES
   (4, 4, 'QR015','2025-05-11', '2025-05-02 08:30:00',  2)
 ;
 
+-- Spoil dates for the sample items (the API sets them on its own writes)
+UPDATE fridge_items
+   SET spoil_date = CASE
+                      WHEN opened_at IS NOT NULL
+                        THEN DATE_ADD(opened_at, INTERVAL open_life_days DAY)
+                      ELSE factory_expires_at
+                    END;
+
+INSERT INTO fridge_spoil_counts (fridge_id, spoil_date, item_count)
+SELECT fridge_id, spoil_date, COUNT(*)
+  FROM fridge_items
+ WHERE spoil_date IS NOT NULL
+ GROUP BY fridge_id, spoil_date;
+
 -- Notifications for Fridge 1 (item_ids 1–10, users 1–3)
 INSERT INTO notifications (item_id, user_id, type, notified_at, sent) VALUES
   -- Item 1 is about to spoil tomorrow → notify Alice, Bob, Carol
@@ -0,0 +1,19 @@
+-- 000) Bookkeeping for incremental notification scans: the generator's
+--      watermark (last scan date) and the items created or re-dated since
+--      the last scan. Run before 002, which adds the foreign key on
+--      pending_item_scans.
+--
+-- For databases created from an earlier WastLess.sql:
+--   mysql -u <username> -p wasteless < migrations/000_notification_scans.sql
+USE wasteless;
+
+-- IF NOT EXISTS: the API created these tables itself at start-up before
+-- app/bootstrap.py, so they may already be there
+CREATE TABLE IF NOT EXISTS notification_scans (
+  name               VARCHAR(50) PRIMARY KEY,  -- e.g. 'notifications'
+  last_scan_date     DATE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pending_item_scans (
+  item_id            INTEGER NOT NULL PRIMARY KEY
+);
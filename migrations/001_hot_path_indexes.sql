@@ -0,0 +1,29 @@
+-- 001) Indexes for the hot query paths and DB-level notification dedupe.
+--
+-- For databases created from an earlier WastLess.sql:
+--   mysql -u <username> -p wasteless < migrations/001_hot_path_indexes.sql
+USE wasteless;
+
+-- 1) FRIDGE ITEMS: fridge listings and notification scans
+ALTER TABLE fridge_items
+  ADD INDEX ix_fridge_items_fridge_spoil (fridge_id, spoil_date),
+  ADD INDEX ix_fridge_items_spoil_date (spoil_date);
+
+-- 2) NOTIFICATIONS: drop duplicate un-sent rows (keeping the oldest) so
+--    the unique key below can be built
+DELETE dup
+  FROM notifications dup
+  JOIN notifications keep
+    ON keep.item_id = dup.item_id
+   AND keep.user_id = dup.user_id
+   AND keep.type    = dup.type
+   AND NOT keep.sent
+   AND keep.note_id < dup.note_id
+ WHERE NOT dup.sent;
+
+-- 3) NOTIFICATIONS: per-user listing and the dedupe key
+--    pending is 1 while un-sent, NULL once sent (NULLs never collide)
+ALTER TABLE notifications
+  ADD COLUMN pending BOOLEAN AS (CASE WHEN sent THEN NULL ELSE 1 END) STORED,
+  ADD INDEX ix_notifications_user (user_id, note_id),
+  ADD UNIQUE KEY uq_notifications_pending (item_id, user_id, type, pending);
@@ -0,0 +1,49 @@
+-- 002) Real foreign keys. MySQL ignored the inline REFERENCES clauses of
+--      earlier WastLess.sql versions, so no constraint was ever created;
+--      the API now relies on them to reject writes to missing rows.
+--
+-- For databases created from an earlier WastLess.sql:
+--   mysql -u <username> -p wasteless < migrations/002_foreign_keys.sql
+USE wasteless;
+
+-- 1) Drop orphans left behind without the cascades, so the keys can be built
+DELETE fu FROM fridge_users fu
+  LEFT JOIN fridges f ON f.fridge_id = fu.fridge_id
+  LEFT JOIN users   u ON u.user_id   = fu.user_id
+ WHERE f.fridge_id IS NULL OR u.user_id IS NULL;
+
+DELETE fi FROM fridge_items fi
+  LEFT JOIN fridges f ON f.fridge_id = fi.fridge_id
+ WHERE f.fridge_id IS NULL;
+
+DELETE n FROM notifications n
+  LEFT JOIN fridge_items fi ON fi.item_id = n.item_id
+  LEFT JOIN users        u  ON u.user_id  = n.user_id
+ WHERE fi.item_id IS NULL OR u.user_id IS NULL;
+
+DELETE p FROM pending_item_scans p
+  LEFT JOIN fridge_items fi ON fi.item_id = p.item_id
+ WHERE fi.item_id IS NULL;
+
+-- Items added by a deleted user or with an unknown QR code are not
+-- removed here; the ALTER below fails on them so they can be fixed by hand.
+
+-- 2) The keys (same names as in WastLess.sql)
+ALTER TABLE fridge_users
+  ADD CONSTRAINT fk_fridge_users_fridge FOREIGN KEY (fridge_id) REFERENCES fridges(fridge_id) ON DELETE CASCADE,
+  ADD CONSTRAINT fk_fridge_users_user   FOREIGN KEY (user_id)   REFERENCES users(user_id)     ON DELETE CASCADE;
+
+ALTER TABLE qr_codes
+  ADD CONSTRAINT fk_qr_codes_product FOREIGN KEY (product_id) REFERENCES products(product_id);
+
+ALTER TABLE fridge_items
+  ADD CONSTRAINT fk_fridge_items_fridge  FOREIGN KEY (fridge_id) REFERENCES fridges(fridge_id) ON DELETE CASCADE,
+  ADD CONSTRAINT fk_fridge_items_user    FOREIGN KEY (added_by)  REFERENCES users(user_id),
+  ADD CONSTRAINT fk_fridge_items_qr_code FOREIGN KEY (qr_code)   REFERENCES qr_codes(qr_code);
+
+ALTER TABLE notifications
+  ADD CONSTRAINT fk_notifications_item FOREIGN KEY (item_id) REFERENCES fridge_items(item_id) ON DELETE CASCADE,
+  ADD CONSTRAINT fk_notifications_user FOREIGN KEY (user_id) REFERENCES users(user_id);
+
+ALTER TABLE pending_item_scans
+  ADD CONSTRAINT fk_pending_item_scans_item FOREIGN KEY (item_id) REFERENCES fridge_items(item_id) ON DELETE CASCADE;
@@ -0,0 +1,12 @@
+-- 003) spoil_date becomes a plain column maintained by the API.
+--      It was a STORED generated column, which MySQL refuses to write;
+--      the API computes it (app/spoil.py) on every item write and can
+--      recompute it in bulk with one UPDATE.
+--
+-- For databases created from an earlier WastLess.sql:
+--   mysql -u <username> -p wasteless < migrations/003_spoil_date_column.sql
+USE wasteless;
+
+-- Existing values are kept; the indexes on spoil_date are rebuilt in place
+ALTER TABLE fridge_items
+  MODIFY spoil_date DATE NULL;
@@ -0,0 +1,22 @@
+-- 004) Per-fridge spoil summary behind GET /users/{id}/expiring: items per
+--      (fridge, spoil date), maintained by the API on every item write.
+--
+-- For databases created from an earlier WastLess.sql:
+--   mysql -u <username> -p wasteless < migrations/004_fridge_spoil_counts.sql
+USE wasteless;
+
+CREATE TABLE fridge_spoil_counts (
+  fridge_id          INTEGER NOT NULL,
+  spoil_date         DATE NOT NULL,
+  item_count         INT NOT NULL,
+  PRIMARY KEY (fridge_id, spoil_date),
+
+  CONSTRAINT fk_fridge_spoil_counts_fridge FOREIGN KEY (fridge_id) REFERENCES fridges(fridge_id) ON DELETE CASCADE
+);
+
+-- Backfill from the existing items
+INSERT INTO fridge_spoil_counts (fridge_id, spoil_date, item_count)
+SELECT fridge_id, spoil_date, COUNT(*)
+  FROM fridge_items
+ WHERE spoil_date IS NOT NULL
+ GROUP BY fridge_id, spoil_date;
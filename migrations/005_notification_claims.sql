@@ -0,0 +1,12 @@
+-- 005) Claim/lease columns for delivery workers (POST /notifications/claim)
+--      and an index to find un-sent notifications in id order.
+--      Claims lock rows with FOR UPDATE SKIP LOCKED (MySQL 8.0+).
+--
+-- For databases created from an earlier WastLess.sql:
+--   mysql -u <username> -p wasteless < migrations/005_notification_claims.sql
+USE wasteless;
+
+ALTER TABLE notifications
+  ADD COLUMN claim_token      VARCHAR(32) NULL,
+  ADD COLUMN lease_expires_at DATETIME NULL,
+  ADD INDEX ix_notifications_sent (sent, note_id);
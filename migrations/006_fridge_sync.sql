@@ -0,0 +1,30 @@
+-- 006) Delta sync (GET /fridges/{id}/changes?since=): a per-fridge change
+--      version, the version of each item's and membership's last write,
+--      and tombstones for deleted items and revoked shares. Existing rows
+--      start at version 0 and reach clients through their first full sync.
+--
+-- For databases created from an earlier WastLess.sql:
+--   mysql -u <username> -p wasteless < migrations/006_fridge_sync.sql
+USE wasteless;
+
+ALTER TABLE fridges
+  ADD COLUMN sync_version INT NOT NULL DEFAULT 0;
+
+ALTER TABLE fridge_users
+  ADD COLUMN version INT NOT NULL DEFAULT 0;
+
+ALTER TABLE fridge_items
+  ADD COLUMN version INT NOT NULL DEFAULT 0,
+  ADD INDEX ix_fridge_items_fridge_version (fridge_id, version);
+
+CREATE TABLE fridge_tombstones (
+  tombstone_id       INT AUTO_INCREMENT PRIMARY KEY,
+  fridge_id          INTEGER NOT NULL,
+  version            INT NOT NULL,
+  kind               VARCHAR(10) NOT NULL,  -- 'item' or 'member'
+  ref_id             INTEGER NOT NULL,      -- item_id or user_id
+
+  INDEX ix_fridge_tombstones_fridge_version (fridge_id, version),
+
+  CONSTRAINT fk_fridge_tombstones_fridge FOREIGN KEY (fridge_id) REFERENCES fridges(fridge_id) ON DELETE CASCADE
+);
@@ -0,0 +1,11 @@
+-- 007) A queue sequence on pending_item_scans. Writes that queue an item
+--      again bump seq, and a notification run only dequeues the
+--      (item_id, seq) pairs it read when it started, so an item re-dated
+--      while a run is going stays queued for the next one.
+--
+-- For databases created from an earlier WastLess.sql:
+--   mysql -u <username> -p wasteless < migrations/007_pending_scan_seq.sql
+USE wasteless;
+
+ALTER TABLE pending_item_scans
+  ADD COLUMN seq INT NOT NULL DEFAULT 0;
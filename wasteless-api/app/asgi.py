@@ -0,0 +1,13 @@
+# app/asgi.py
+#
+# Entry point that serves the sync or async stack depending on
+# WASTELESS_DB_MODE:  uvicorn app.asgi:app
+
+from .config import DB_MODE
+
+if DB_MODE == "async":
+    from .main_async import app
+else:
+    from .main import app
+
+__all__ = ["app"]
@@ -0,0 +1,514 @@
+# app/async_crud.py
+#
+# Async counterparts of the functions in app/crud.py, used by app.main_async.
+
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from . import cache, catalog, metrics, models, rows, schemas, spoil, summary, sync
+from .crud import (
+    BULK_ITEM_INSERT, SENT, SHARED_ITEMS, Conflict, MissingReference, ack_statement, bulk_item_rows,
+    claimable, fridge_items_page, item_update_values, item_version_statements, missing_reference,
+    notification_details, notification_window, notifications_page, revoked_share,
+    user_delete_statements, users_page
+)
+from .config import NOTIFICATION_LEASE_SECONDS
+from .schemas import FridgeItemCreate, FridgeItemUpdate, NotificationCreate
+
+
+async def _update_returning(db: AsyncSession, model, key, values: dict):
+    """Async counterpart of crud._update_returning (does not commit)."""
+    if not values:
+        return await db.get(model, key)
+    stmt = update(model).where(model.__mapper__.primary_key[0] == key).values(**values)
+    if db.bind.dialect.update_returning:
+        return (await db.scalars(stmt.returning(model))).first()
+    if (await db.execute(stmt)).rowcount == 0:
+        return None
+    return await db.get(model, key, populate_existing=True)
+
+async def next_version(db: AsyncSession, fridge_id: int) -> Optional[int]:
+    """Async counterpart of crud.next_version (does not commit)."""
+    stmt = sync.bump([fridge_id])
+    if db.bind.dialect.update_returning:
+        return await db.scalar(stmt.returning(models.Fridge.sync_version))
+    if (await db.execute(stmt)).rowcount == 0:
+        return None
+    return await db.scalar(sync.current_version(fridge_id))
+
+async def item_version(db: AsyncSession, item_id: int):
+    """Async counterpart of crud.item_version (does not commit)."""
+    bump_returning, bump, before = item_version_statements(item_id)
+    if db.bind.dialect.update_returning:
+        return (await db.execute(bump_returning)).first()
+    if (await db.execute(bump)).rowcount == 0:
+        return None
+    return (await db.execute(before)).first()
+
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).filter(models.User.email == email))
+    return result.scalars().first()
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[int] = None):
+    result = await db.execute(users_page(select(models.User), skip, limit, after))
+    return result.scalars().all()
+
+async def get_user_rows(db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[int] = None):
+    stmt = select(*rows.columns(models.User, schemas.UserRead))
+    return (await db.execute(users_page(stmt, skip, limit, after))).all()
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    db_user = models.User(
+        email=user.email,
+        password_hash=user.password_hash,
+        name=user.name,
+        created_at=datetime.utcnow()
+    )
+    db.add(db_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise Conflict("Email already registered")
+    return db_user
+
+async def update_user(db: AsyncSession, user_id: int, user_update: schemas.UserBase):
+    changes = {}
+    if user_update.email is not None:
+        changes["email"] = user_update.email
+    if user_update.name is not None:
+        changes["name"] = user_update.name
+    try:
+        db_user = await _update_returning(db, models.User, user_id, changes)
+        if db_user is not None:
+            await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise Conflict("Email already registered")
+    return db_user
+
+async def delete_user(db: AsyncSession, user_id: int):
+    bump, added, deletes = user_delete_statements(user_id)
+    await db.execute(bump)
+    added = (await db.execute(added)).all()
+    if any(shared for _, _, _, shared in added):
+        await db.rollback()
+        raise Conflict(SHARED_ITEMS)
+    for stmt in deletes:
+        result = await db.execute(stmt)
+    if result.rowcount == 0:
+        await db.rollback()
+        return False
+    await count_spoil_dates(db, [(fridge_id, spoil_date, -n) for fridge_id, spoil_date, n, _ in added])
+    await db.commit()
+    for fridge_id in {fridge_id for fridge_id, _, _, _ in added}:
+        cache.invalidate_fridge(fridge_id)
+    return True
+
+async def get_fridge(db: AsyncSession, fridge_id: int):
+    return await db.get(models.Fridge, fridge_id)
+
+async def get_fridges(db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[int] = None):
+    query = select(models.Fridge).order_by(models.Fridge.fridge_id)
+    if after is not None:
+        query = query.filter(models.Fridge.fridge_id > after)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def create_fridge(db: AsyncSession, fridge: schemas.FridgeCreate):
+    db_fridge = models.Fridge(
+        name=fridge.name,
+        location_desc=fridge.location_desc,
+        created_at=datetime.utcnow()
+    )
+    db.add(db_fridge)
+    await db.commit()
+    return db_fridge
+
+async def update_fridge(db: AsyncSession, fridge_id: int, fridge_in: schemas.FridgeBase):
+    db_fridge = await _update_returning(db, models.Fridge, fridge_id, {
+        "name": fridge_in.name,
+        "location_desc": fridge_in.location_desc,
+    })
+    if db_fridge is not None:
+        await db.commit()
+    return db_fridge
+
+async def delete_fridge(db: AsyncSession, fridge_id: int):
+    result = await db.execute(delete(models.Fridge).where(models.Fridge.fridge_id == fridge_id))
+    if result.rowcount == 0:
+        await db.rollback()
+        return False
+    await db.commit()
+    cache.invalidate_fridge(fridge_id)
+    return True
+
+async def add_user_to_fridge(
+    db: AsyncSession,
+    fridge_id: int,
+    share: schemas.FridgeUserCreate
+) -> models.FridgeUser:
+    """Share a fridge with a user; the foreign keys reject unknown ones."""
+    version = await next_version(db, fridge_id)
+    if version is None:
+        await db.rollback()
+        raise MissingReference("Fridge not found")
+    await db.execute(revoked_share(fridge_id, share.user_id))
+    for stmt in spoil.queue_scans(and_(
+        models.FridgeItem.fridge_id == fridge_id, notification_window(date.today())
+    )):
+        await db.execute(stmt)
+    mapping = models.FridgeUser(
+        fridge_id=fridge_id,
+        user_id=share.user_id,
+        role=share.role,
+        version=version
+    )
+    db.add(mapping)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise (
+            await db.run_sync(missing_reference, fridge_id=fridge_id, user_id=share.user_id)
+            or Conflict("User already has access to this fridge")
+        )
+    return mapping
+
+async def remove_user_from_fridge(
+    db: AsyncSession,
+    fridge_id: int,
+    user_id: int
+) -> bool:
+    """Revoke a user’s access to a fridge, leaving a tombstone for delta sync."""
+    if await next_version(db, fridge_id) is None:
+        await db.rollback()
+        return False
+    member = models.FridgeUser
+    share = and_(member.fridge_id == fridge_id, member.user_id == user_id)
+    await db.execute(sync.member_tombstones(share))
+    if (await db.execute(delete(member).where(share))).rowcount == 0:
+        await db.rollback()
+        return False
+    await db.commit()
+    return True
+
+async def list_fridge_users(
+    db: AsyncSession,
+    fridge_id: int
+) -> List[models.FridgeUser]:
+    result = await db.execute(select(models.FridgeUser).filter_by(fridge_id=fridge_id))
+    return result.scalars().all()
+
+async def get_fridge_changes(db: AsyncSession, fridge_id: int, since: Optional[int] = None) -> Optional[dict]:
+    version = await db.scalar(sync.current_version(fridge_id))
+    if version is None:
+        return None
+    full = sync.is_full(since, version)
+    floor = -1 if full else since
+    items = (await db.scalars(sync.changed_items(fridge_id, floor))).all()
+    members = (await db.scalars(sync.changed_members(fridge_id, floor))).all()
+    deleted = [] if full else (await db.execute(sync.tombstones(fridge_id, since))).all()
+    return sync.changes(fridge_id, version, since, items, members, deleted)
+
+async def list_fridge_members(db: AsyncSession, fridge_id: int) -> List[models.FridgeUser]:
+    result = await db.scalars(
+        select(models.FridgeUser)
+          .options(joinedload(models.FridgeUser.user, innerjoin=True))
+          .where(models.FridgeUser.fridge_id == fridge_id)
+          .order_by(models.FridgeUser.user_id)
+    )
+    return result.all()
+
+async def get_fridge_item(db: AsyncSession, item_id: int):
+    return await db.get(models.FridgeItem, item_id)
+
+async def get_fridge_items(
+    db: AsyncSession,
+    fridge_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Optional[date], int]] = None
+) -> List[models.FridgeItem]:
+    result = await db.execute(fridge_items_page(select(models.FridgeItem), fridge_id, skip, limit, after))
+    return result.scalars().all()
+
+async def get_fridge_item_rows(
+    db: AsyncSession,
+    fridge_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Optional[date], int]] = None
+):
+    stmt = select(*rows.columns(models.FridgeItem, schemas.FridgeItemRead))
+    return (await db.execute(fridge_items_page(stmt, fridge_id, skip, limit, after))).all()
+
+async def create_fridge_item(db: AsyncSession, fridge_id: int, item: FridgeItemCreate):
+    # Missing shelf-life fields come from the product (raises CatalogError)
+    item = await db.run_sync(catalog.fill_item_defaults, item)
+    version = await next_version(db, fridge_id)
+    if version is None:
+        await db.rollback()
+        raise MissingReference("Fridge not found")
+    db_item = models.FridgeItem(
+        fridge_id=fridge_id,
+        added_by=item.added_by,
+        qr_code=item.qr_code,
+        added_at=datetime.utcnow(),
+        factory_expires_at=item.factory_expires_at,
+        opened_at=item.opened_at,
+        open_life_days=item.open_life_days,
+        spoil_date=spoil.spoil_date(item.factory_expires_at, item.opened_at, item.open_life_days),
+        version=version
+    )
+    db.add(db_item)
+    try:
+        await db.flush()
+        # Let the next notification scan pick the new item up
+        db.add(models.PendingItemScan(item_id=db_item.item_id))
+        await count_spoil_dates(db, [(fridge_id, db_item.spoil_date, 1)])
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        error = await db.run_sync(
+            missing_reference, fridge_id=fridge_id, user_id=item.added_by, qr_code=item.qr_code
+        )
+        if error is None:
+            raise
+        raise error
+    cache.invalidate_fridge(fridge_id)
+    metrics.ITEMS_CREATED.inc()
+    return db_item
+
+async def create_fridge_items_bulk(
+    db: AsyncSession,
+    fridge_id: int,
+    items: List[FridgeItemCreate]
+) -> Tuple[List[models.FridgeItem], List[Tuple[int, str]]]:
+    """Async counterpart of crud.create_fridge_items_bulk."""
+    rows, errors = await db.run_sync(bulk_item_rows, fridge_id, items)
+    if not rows:
+        # Nothing to write, so nothing has checked the fridge yet
+        if await get_fridge(db, fridge_id) is None:
+            raise MissingReference("Fridge not found")
+        return [], errors
+    version = await next_version(db, fridge_id)
+    if version is None:
+        await db.rollback()
+        raise MissingReference("Fridge not found")
+    for row in rows:
+        row["version"] = version
+
+    if db.bind.dialect.insert_executemany_returning:
+        created = sorted(await db.scalars(BULK_ITEM_INSERT, rows), key=lambda item: item.item_id)
+    else:
+        created = [models.FridgeItem(**row) for row in rows]
+        db.add_all(created)
+        await db.flush()
+    # Let the next notification scan pick the new items up
+    await db.execute(insert(models.PendingItemScan), [{"item_id": item.item_id} for item in created])
+    await count_spoil_dates(db, [(fridge_id, item.spoil_date, 1) for item in created])
+    await db.commit()
+    cache.invalidate_fridge(fridge_id)
+    metrics.ITEMS_CREATED.inc(amount=len(created))
+    return created, errors
+
+async def update_fridge_item(db: AsyncSession, item_id: int, item_in: FridgeItemUpdate):
+    found = await item_version(db, item_id)
+    if found is None:
+        return None
+    fridge_id, version, old_spoil = found
+    db_item = await _update_returning(db, models.FridgeItem, item_id, item_update_values(item_in, version))
+    if db_item is None:
+        await db.rollback()   # deleted meanwhile
+        return None
+    if db_item.spoil_date != old_spoil:
+        # Let the next notification scan re-check the item
+        for stmt in spoil.queue_scans(models.FridgeItem.item_id == item_id):
+            await db.execute(stmt)
+        await count_spoil_dates(db, [(fridge_id, old_spoil, -1), (fridge_id, db_item.spoil_date, 1)])
+    await db.commit()
+    cache.invalidate_fridge(fridge_id)
+    return db_item
+
+async def count_spoil_dates(db: AsyncSession, changes: List[summary.SpoilChange]):
+    rows = summary.deltas(changes)
+    if rows:
+        for stmt, params in summary.count_statements(db.bind.dialect, rows):
+            await db.execute(stmt, params)
+
+async def expiring_dashboard(
+    db: AsyncSession,
+    user_id: int,
+    days: int = 3,
+    limit: int = 10,
+    today: Optional[date] = None
+) -> Optional[dict]:
+    today = today or date.today()
+    fridges = (await db.execute(summary.user_fridges(user_id))).all()
+    if not fridges and await get_user(db, user_id) is None:
+        return None
+    fridge_ids = [fridge_id for fridge_id, _ in fridges]
+    rows = (await db.execute(summary.counts(fridge_ids))).all() if fridge_ids else []
+    dashboard, cutoff = summary.summarize(fridges, rows, today, days, limit)
+    if cutoff is not None:
+        dashboard["soonest"] = (
+            await db.scalars(summary.soonest_items(fridge_ids, today, cutoff, limit))
+        ).all()
+    return dashboard
+
+async def recompute_spoil_dates(db: AsyncSession, where=None, open_life_days: Optional[int] = None) -> int:
+    fridges, scans, stmt = spoil.recompute_statements(where, open_life_days)
+    fridge_ids = (await db.scalars(fridges)).all()
+    updated = 0
+    if fridge_ids:
+        await db.execute(sync.bump(fridge_ids))
+        for scan in scans:
+            await db.execute(scan)
+        stmt = stmt.values(version=sync.version_of(models.FridgeItem.fridge_id))
+        updated = (await db.execute(stmt, execution_options={"synchronize_session": False})).rowcount
+        for recount in summary.rebuild_statements(fridge_ids):
+            await db.execute(recount)
+    await db.commit()
+    for fridge_id in fridge_ids:
+        cache.invalidate_fridge(fridge_id)
+    return updated
+
+async def set_product_open_life(db: AsyncSession, product_id: int, open_life_days: int) -> Optional[int]:
+    product = await db.get(models.Product, product_id)
+    if product is None:
+        return None
+    old_default = product.default_open_life
+    if old_default is None:
+        old_default = product.default_shelf_life
+    product.default_open_life = open_life_days
+    return await recompute_spoil_dates(
+        db,
+        and_(spoil.of_product(product_id), models.FridgeItem.open_life_days == old_default),
+        open_life_days,
+    )
+
+async def delete_fridge_item(db: AsyncSession, item_id: int) -> bool:
+    item = models.FridgeItem
+    found = await item_version(db, item_id)
+    if found is None:
+        return False
+    fridge_id, _, spoil_date = found
+    await db.execute(sync.item_tombstones(item.item_id == item_id))
+    if (await db.execute(delete(item).where(item.item_id == item_id))).rowcount == 0:
+        await db.rollback()
+        return False
+    await count_spoil_dates(db, [(fridge_id, spoil_date, -1)])
+    await db.commit()
+    cache.invalidate_fridge(fridge_id)
+    return True
+
+async def get_notifications_for_user(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[int] = None
+) -> List[models.Notification]:
+    result = await db.execute(notifications_page(select(models.Notification), user_id, skip, limit, after))
+    return result.scalars().all()
+
+async def get_notification_rows(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[int] = None
+):
+    stmt = select(*rows.columns(models.Notification, schemas.NotificationRead))
+    return (await db.execute(notifications_page(stmt, user_id, skip, limit, after))).all()
+
+async def get_notification_details_for_user(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    after: Optional[int] = None
+) -> List[models.Notification]:
+    query = (
+        select(models.Notification)
+          .options(notification_details())
+          .where(models.Notification.user_id == user_id)
+          .order_by(models.Notification.note_id)
+          .limit(limit)
+    )
+    if after is not None:
+        query = query.where(models.Notification.note_id > after)
+    return (await db.scalars(query)).all()
+
+async def mark_notification_sent(db: AsyncSession, note_id: int) -> bool:
+    note = models.Notification
+    result = await db.execute(
+        update(note)
+          .where(note.note_id == note_id, note.sent == False)
+          .values(**SENT)
+    )
+    await db.commit()
+    if result.rowcount > 0:
+        metrics.NOTIFICATIONS_SENT.inc()
+        return True
+    return await db.get(note, note_id) is not None
+
+async def acknowledge_notifications(db: AsyncSession, **target) -> int:
+    updated = (await db.execute(ack_statement(**target))).rowcount
+    await db.commit()
+    metrics.NOTIFICATIONS_SENT.inc(amount=updated)
+    return updated
+
+async def claim_notifications(
+    db: AsyncSession,
+    limit: int = 100,
+    lease_seconds: int = NOTIFICATION_LEASE_SECONDS
+) -> Tuple[str, datetime, List[models.Notification]]:
+    """Async counterpart of crud.claim_notifications."""
+    note = models.Notification
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    expires = now + timedelta(seconds=lease_seconds)
+    ids = (await db.scalars(
+        select(note.note_id)
+          .where(claimable(now))
+          .order_by(note.note_id)
+          .limit(limit)
+          .with_for_update(skip_locked=True)
+    )).all()
+    claimed = []
+    if ids:
+        await db.execute(
+            update(note)
+              .where(note.note_id.in_(ids), claimable(now))
+              .values(claim_token=token, lease_expires_at=expires)
+        )
+        claimed = (await db.scalars(
+            select(note)
+              .options(notification_details())
+              .where(note.note_id.in_(ids), note.claim_token == token)
+              .order_by(note.note_id)
+        )).all()
+    await db.commit()
+    return token, expires, claimed
+
+async def create_notification(db: AsyncSession, notif: NotificationCreate):
+    db_note = models.Notification(
+        item_id=notif.item_id,
+        user_id=notif.user_id,
+        type=notif.type,
+        notified_at=datetime.utcnow(),
+        sent=notif.sent
+    )
+    db.add(db_note)
+    await db.commit()
+    return db_note
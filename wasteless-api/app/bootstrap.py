@@ -0,0 +1,29 @@
+# app/bootstrap.py
+#
+# One-shot schema creation, kept out of module import so workers start
+# without touching the database:
+#
+#   python -m app.bootstrap
+#
+# or set WASTELESS_CREATE_SCHEMA=1 to run it as a lifespan step (handy for
+# a single dev server on SQLite). MySQL deployments use WastLess.sql and
+# migrations/ instead.
+
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .db import Base, engine
+from .startup import phase
+
+
+def create_schema(bind=None):
+    """Create missing tables and indexes; existing ones are left alone."""
+    with phase("create_schema"):
+        Base.metadata.create_all(bind=bind or engine)
+
+
+def main():
+    create_schema()
+    print("Schema ready on %s" % engine.url.render_as_string(hide_password=True))
+
+
+if __name__ == "__main__":
+    main()
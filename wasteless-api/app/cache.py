@@ -0,0 +1,266 @@
+# app/cache.py
+#
+# Read-through cache for serialized fridge item listings.
+#
+# Every fridge has a version token; a page is stored under the token that
+# was current when it was read, and writes to the fridge replace the token,
+# so stale pages simply become unreachable and age out. Pages carry an ETag
+# so unchanged polls can be answered with 304 straight from the cache.
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+
+from fastapi import Request, Response, status
+
+from . import rows
+from .config import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_URL
+from .schemas import FridgeItemRead
+
+
+class LRUTTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, maxsize: int, ttl: float, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate):
+        with self._lock:
+            for key in [k for k, (_, v) in self._entries.items() if predicate(v)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+            }
+
+
+# Backends: get/set byte strings, plus per-namespace version tokens
+
+def _new_version() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+class MemoryBackend:
+    """Per-process backend; invalidations are not seen by other workers."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = LRUTTLCache(maxsize, ttl)
+        # Versions get an LRU of their own, without expiry. An evicted
+        # version is replaced by a fresh token, which orphans its old pages
+        # rather than reviving them
+        self._versions = LRUTTLCache(maxsize, float("inf"))
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: bytes):
+        self._entries.set(key, value)
+
+    def version(self, namespace: str) -> str:
+        with self._lock:
+            version = self._versions.get(namespace)
+            if version is None:
+                version = _new_version()
+                self._versions.set(namespace, version)
+            return version
+
+    def bump(self, namespace: str):
+        self._versions.set(namespace, _new_version())
+
+
+class LocalRedis:
+    """
+    In-process stand-in for a Redis server: the get/set(ex=, nx=) subset
+    RedisBackend uses, with expiry and LRU eviction (like maxmemory-policy
+    allkeys-lru). Lets the shared-cache path run without a server.
+    """
+
+    def __init__(self, maxsize: int, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._data = OrderedDict()      # key -> (expires_at or None, bytes)
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= self.clock():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ex: Optional[float] = None, nx: bool = False) -> Optional[bool]:
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            self._data[key] = (self.clock() + ex if ex else None, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+
+class RedisBackend:
+    """
+    Backend for any Redis-compatible server (Redis, Valkey, LocalRedis).
+
+    Takes a redis-py style client; from_url() needs the optional `redis`
+    package.
+    """
+
+    def __init__(self, client, ttl: float):
+        self.client = client
+        self.ttl = int(ttl)
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float) -> "RedisBackend":
+        import redis
+
+        return cls(redis.Redis.from_url(url), ttl)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes):
+        self.client.set(key, value, ex=self.ttl)
+
+    def version(self, namespace: str) -> str:
+        key = "version:" + namespace
+        # A missing token (never set, or evicted) gets a fresh one, which
+        # also orphans any pages stored under the lost token
+        self.client.set(key, _new_version(), nx=True)
+        value = self.client.get(key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def bump(self, namespace: str):
+        self.client.set("version:" + namespace, _new_version())
+
+
+def make_backend(name: str = CACHE_BACKEND):
+    if name == "memory":
+        return MemoryBackend(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+    if name == "redis":
+        return RedisBackend.from_url(CACHE_URL, CACHE_TTL_SECONDS)
+    if name == "redis-local":
+        return RedisBackend(LocalRedis(CACHE_MAX_ENTRIES), CACHE_TTL_SECONDS)
+    if name == "none":
+        return None
+    raise ValueError("Unknown WASTELESS_CACHE_BACKEND: %r" % name)
+
+
+backend = make_backend()
+
+
+# Cached fridge item pages
+
+class CachedPage(NamedTuple):
+    etag: str
+    next_cursor: Optional[str]
+    body: bytes
+
+    def encode(self) -> bytes:
+        return b"%s\n%s\n%s" % (self.etag.encode(), (self.next_cursor or "").encode(), self.body)
+
+    @classmethod
+    def decode(cls, raw: bytes) -> "CachedPage":
+        etag, next_cursor, body = raw.split(b"\n", 2)
+        return cls(etag.decode(), next_cursor.decode() or None, body)
+
+
+def _fridge_namespace(fridge_id: int) -> str:
+    return "fridge-items:%d" % fridge_id
+
+
+def item_page_key(fridge_id: int, skip: int, limit: int, cursor: Optional[str]) -> Optional[str]:
+    """Cache key for one page under the fridge's current version, None when disabled."""
+    if backend is None:
+        return None
+    version = backend.version(_fridge_namespace(fridge_id))
+    return "fridge-items:%d:%s:%d:%d:%s" % (fridge_id, version, skip, limit, cursor or "")
+
+
+def get_page(key: Optional[str]) -> Optional[CachedPage]:
+    if key is None:
+        return None
+    raw = backend.get(key)
+    return CachedPage.decode(raw) if raw is not None else None
+
+
+def put_item_page(key: Optional[str], items: List, next_cursor: Optional[str]) -> CachedPage:
+    """Encode FridgeItemRead column tuples as JSON, store the page (unless key is None) and return it."""
+    body = rows.dumps(items, rows.fields(FridgeItemRead))
+    page = CachedPage('"%s"' % hashlib.sha1(body).hexdigest(), next_cursor, body)
+    if key is not None:
+        backend.set(key, page.encode())
+    return page
+
+
+def invalidate_fridge(fridge_id: int):
+    """Drop every cached page of one fridge; call after the write commits."""
+    if backend is not None:
+        backend.bump(_fridge_namespace(fridge_id))
+
+
+def page_response(request: Request, page: CachedPage) -> Response:
+    """The page as JSON, or 304 when If-None-Match already has its ETag."""
+    headers = {"ETag": page.etag}
+    if page.next_cursor is not None:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if page.etag in tags or "*" in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(page.body, media_type="application/json", headers=headers)
@@ -0,0 +1,151 @@
+# app/catalog.py
+#
+# Cached QR code -> product lookups. The catalog is small and read-mostly,
+# so entries are kept in a bounded LRU with a TTL. Changes made through the
+# ORM invalidate the affected entries when their transaction commits; the
+# TTL bounds staleness for changes made elsewhere.
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from . import models
+from .cache import LRUTTLCache
+from .config import CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS
+from .schemas import FridgeItemCreate
+
+
+class CatalogError(ValueError):
+    """An item cannot be completed from the catalog."""
+
+
+class CatalogEntry(NamedTuple):
+    qr_code: str
+    product_id: int
+    name: str
+    default_shelf_life: int
+    default_open_life: Optional[int]
+
+
+# Unknown codes are cached too, as _MISSING, so repeated bad scans stay cheap
+_MISSING = CatalogEntry("", 0, "", 0, None)
+_cache = LRUTTLCache(CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS)
+
+
+def lookup_many(db: Session, qr_codes: Iterable[str]) -> Dict[str, Optional[CatalogEntry]]:
+    """Resolve QR codes to catalog entries, with one query for all cache misses."""
+    found, missing = {}, []
+    for qr_code in set(qr_codes):
+        entry = _cache.get(qr_code)
+        if entry is None:
+            missing.append(qr_code)
+        else:
+            found[qr_code] = None if entry is _MISSING else entry
+    if missing:
+        rows = (
+            db.query(
+                models.QRCode.qr_code,
+                models.Product.product_id,
+                models.Product.name,
+                models.Product.default_shelf_life,
+                models.Product.default_open_life,
+            )
+              .join(models.Product, models.QRCode.product_id == models.Product.product_id)
+              .filter(models.QRCode.qr_code.in_(missing))
+        )
+        for row in rows:
+            found[row.qr_code] = CatalogEntry(*row)
+        for qr_code in missing:
+            _cache.set(qr_code, found.setdefault(qr_code, None) or _MISSING)
+    return found
+
+
+def lookup(db: Session, qr_code: str) -> Optional[CatalogEntry]:
+    return lookup_many(db, [qr_code])[qr_code]
+
+
+def with_product_defaults(
+    item: FridgeItemCreate,
+    entry: Optional[CatalogEntry],
+    today: Optional[date] = None
+) -> FridgeItemCreate:
+    """
+    Fill factory_expires_at / open_life_days from the product when missing.
+
+    factory_expires_at defaults to today + default_shelf_life, and
+    open_life_days to default_open_life (or default_shelf_life when the
+    product has none).
+    """
+    if item.factory_expires_at is not None and item.open_life_days is not None:
+        return item
+    if entry is None:
+        raise CatalogError("QR code not found")
+    changes = {}
+    if item.factory_expires_at is None:
+        changes["factory_expires_at"] = (today or date.today()) + timedelta(days=entry.default_shelf_life)
+    if item.open_life_days is None:
+        changes["open_life_days"] = (
+            entry.default_open_life if entry.default_open_life is not None else entry.default_shelf_life
+        )
+    return item.copy(update=changes)
+
+
+def fill_item_defaults(db: Session, item: FridgeItemCreate) -> FridgeItemCreate:
+    """with_product_defaults() for one item; no query when the cache is warm."""
+    if item.factory_expires_at is not None and item.open_life_days is not None:
+        return item
+    return with_product_defaults(item, lookup(db, item.qr_code))
+
+
+def invalidate(qr_code: Optional[str] = None):
+    """Drop one QR code, or the whole cache."""
+    if qr_code is None:
+        _cache.clear()
+    else:
+        _cache.discard(qr_code)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+# Invalidate on catalog writes, once the writing transaction commits
+
+def _pending(session: Session) -> set:
+    return session.info.setdefault("catalog_invalidations", set())
+
+
+@event.listens_for(models.QRCode, "after_insert")
+@event.listens_for(models.QRCode, "after_update")
+@event.listens_for(models.QRCode, "after_delete")
+def _qr_code_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _pending(session).add(("qr_code", target.qr_code))
+
+
+@event.listens_for(models.Product, "after_update")
+@event.listens_for(models.Product, "after_delete")
+def _product_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _pending(session).add(("product_id", target.product_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    changes = session.info.pop("catalog_invalidations", None)
+    if not changes:
+        return
+    for kind, key in changes:
+        if kind == "qr_code":
+            _cache.discard(key)
+        else:
+            _cache.discard_where(lambda entry, product_id=key: entry.product_id == product_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session):
+    session.info.pop("catalog_invalidations", None)
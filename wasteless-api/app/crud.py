@@ -1,20 +1,128 @@
 # app/crud.py
 
+import uuid
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
-from sqlalchemy.orm import Session
-from . import models, schemas
+from sqlalchemy import Date, Integer, and_, case, delete, exists, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from . import cache, catalog, metrics, models, rows, schemas, spoil, summary, sync
+from .config import NOTIFICATION_LEASE_SECONDS
 from .schemas import FridgeCreate, FridgeBase, FridgeItemCreate, FridgeItemUpdate, NotificationCreate
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Tuple
 
 
+class MissingReference(LookupError):
+    """A write referred to a fridge or user that does not exist."""
+
+
+class Conflict(ValueError):
+    """A write broke a uniqueness rule (e.g. a taken email)."""
+
+
+def missing_reference(
+    db: Session,
+    fridge_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    qr_code: Optional[str] = None
+) -> Optional[Exception]:
+    """
+    After a rejected write, find which referenced row is missing.
+
+    Only runs on the error path: writes rely on the foreign keys instead
+    of checking first. Returns the exception to raise, or None.
+    """
+    if fridge_id is not None and get_fridge(db, fridge_id) is None:
+        return MissingReference("Fridge not found")
+    if user_id is not None and get_user(db, user_id) is None:
+        return MissingReference("User not found")
+    if qr_code is not None and catalog.lookup(db, qr_code) is None:
+        return catalog.CatalogError("QR code not found")
+    return None
+
+def _update_returning(db: Session, model, key, values: dict):
+    """
+    UPDATE one row by primary key and return it, or None if it does not exist.
+
+    One UPDATE ... RETURNING where the backend supports it; elsewhere
+    (MySQL) the UPDATE's rowcount decides, and one SELECT loads the row.
+    Does not commit.
+    """
+    if not values:
+        return db.get(model, key)
+    stmt = update(model).where(model.__mapper__.primary_key[0] == key).values(**values)
+    if db.get_bind().dialect.update_returning:
+        return db.scalars(stmt.returning(model)).first()
+    if db.execute(stmt).rowcount == 0:
+        return None
+    return db.get(model, key, populate_existing=True)
+
+def next_version(db: Session, fridge_id: int) -> Optional[int]:
+    """
+    Bump a fridge's sync version and return it, or None if there is no
+    such fridge. Run it before writing the fridge's items or members:
+    the row stays locked until commit (see app/sync.py). Does not commit.
+    """
+    stmt = sync.bump([fridge_id])
+    if db.get_bind().dialect.update_returning:
+        return db.scalar(stmt.returning(models.Fridge.sync_version))
+    if db.execute(stmt).rowcount == 0:
+        return None
+    return db.scalar(sync.current_version(fridge_id))
+
+def item_version_statements(item_id: int):
+    """
+    (bump_returning, bump, before) statements for writing one item: bump
+    moves the item's fridge to its next version, before SELECTs the item's
+    (fridge_id, version, spoil_date); bump_returning does both at once.
+    """
+    item, fridge = models.FridgeItem, models.Fridge
+    bump = sync.bump(select(item.fridge_id).where(item.item_id == item_id))
+    spoil_date = select(item.spoil_date).where(item.item_id == item_id).scalar_subquery()
+    before = (
+        select(item.fridge_id, fridge.sync_version, item.spoil_date)
+        .join(fridge, fridge.fridge_id == item.fridge_id)
+        .where(item.item_id == item_id)
+    )
+    return bump.returning(fridge.fridge_id, fridge.sync_version, spoil_date), bump, before
+
+def item_version(db: Session, item_id: int):
+    """
+    next_version() for the fridge holding an item. Returns the item's
+    (fridge_id, version, spoil_date) as of before the write, or None if
+    there is no such item. Does not commit.
+    """
+    bump_returning, bump, before = item_version_statements(item_id)
+    if db.get_bind().dialect.update_returning:
+        return db.execute(bump_returning).first()
+    if db.execute(bump).rowcount == 0:
+        return None
+    return db.execute(before).first()
+
+# Lookups by primary key go through the session's identity map, so
+# repeating one within a request costs no query
+
 def get_user(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.user_id == user_id).first()
+    return db.get(models.User, user_id)
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+def users_page(stmt, skip: int = 0, limit: int = 100, after: Optional[int] = None):
+    """Order and page a SELECT over users (of the entity or of columns)."""
+    stmt = stmt.order_by(models.User.user_id)
+    if after is not None:
+        # Keyset pagination: seek past the last user_id of the previous page
+        stmt = stmt.where(models.User.user_id > after)
+    return stmt.offset(skip).limit(limit)
+
+def get_users(db: Session, skip: int = 0, limit: int = 100, after: Optional[int] = None):
+    return db.scalars(users_page(select(models.User), skip, limit, after)).all()
+
+def get_user_rows(db: Session, skip: int = 0, limit: int = 100, after: Optional[int] = None):
+    """get_users() as UserRead column tuples, for rows.response()."""
+    stmt = select(*rows.columns(models.User, schemas.UserRead))
+    return db.execute(users_page(stmt, skip, limit, after)).all()
 
 def create_user(db: Session, user: schemas.UserCreate):
     db_user = models.User(
@@ -24,35 +132,95 @@ def create_user(db: Session, user: schemas.UserCreate):
         created_at=datetime.utcnow()
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        db.commit()
+    except IntegrityError:
+        # The unique key on email, also under concurrent signups
+        db.rollback()
+        raise Conflict("Email already registered")
     return db_user
 
 def update_user(db: Session, user_id: int, user_update: schemas.UserBase):
-    db_user = get_user(db, user_id)
-    if not db_user:
-        return None
+    changes = {}
     if user_update.email is not None:
-        db_user.email = user_update.email
+        changes["email"] = user_update.email
     if user_update.name is not None:
-        db_user.name = user_update.name
-    db.commit()
-    db.refresh(db_user)
+        changes["name"] = user_update.name
+    try:
+        db_user = _update_returning(db, models.User, user_id, changes)
+        if db_user is not None:
+            db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise Conflict("Email already registered")
     return db_user
 
+def user_delete_statements(user_id: int):
+    """
+    (bump, added, deletes) for removing a user without loading anything.
+
+    bump moves every fridge the user added items to or shared to its next
+    sync version, locking them first. added then counts the items the user
+    added per (fridge, spoil date), for fridge_spoil_counts and cache
+    invalidation, with whether another member shares that fridge: those
+    items belong to the others too, so the user may not be deleted while
+    any are left. deletes are run in order after it: tombstones for the
+    items and memberships, the user's notifications, the items they added
+    (their notifications and pending scans follow by ON DELETE CASCADE),
+    then the user (memberships cascade). The last one's rowcount says
+    whether the user existed.
+    """
+    item, member = models.FridgeItem, models.FridgeUser
+    shared = exists().where(member.fridge_id == item.fridge_id, member.user_id != user_id)
+    added = (
+        select(item.fridge_id, item.spoil_date, func.count(), shared)
+        .where(item.added_by == user_id)
+        .group_by(item.fridge_id, item.spoil_date)
+    )
+    fridges = select(item.fridge_id).where(item.added_by == user_id).union(
+        select(member.fridge_id).where(member.user_id == user_id)
+    )
+    return sync.bump(fridges), added, [
+        sync.item_tombstones(item.added_by == user_id),
+        sync.member_tombstones(member.user_id == user_id),
+        delete(models.Notification).where(models.Notification.user_id == user_id),
+        delete(item).where(item.added_by == user_id),
+        delete(models.User).where(models.User.user_id == user_id),
+    ]
+
+SHARED_ITEMS = "User still has items in fridges shared with others"
+
 def delete_user(db: Session, user_id: int):
-    db_user = get_user(db, user_id)
-    if not db_user:
+    """
+    Delete a user, their notifications and memberships, and the items they
+    added to fridges nobody else shares. False if there is no such user;
+    raises Conflict while they have items in a fridge shared with others.
+    """
+    bump, added, deletes = user_delete_statements(user_id)
+    db.execute(bump)
+    added = db.execute(added).all()
+    if any(shared for _, _, _, shared in added):
+        db.rollback()
+        raise Conflict(SHARED_ITEMS)
+    for stmt in deletes:
+        result = db.execute(stmt)
+    if result.rowcount == 0:
+        db.rollback()
         return False
-    db.delete(db_user)
+    count_spoil_dates(db, [(fridge_id, spoil_date, -n) for fridge_id, spoil_date, n, _ in added])
     db.commit()
+    for fridge_id in {fridge_id for fridge_id, _, _, _ in added}:
+        cache.invalidate_fridge(fridge_id)
     return True
 
 def get_fridge(db: Session, fridge_id: int):
-    return db.query(models.Fridge).filter(models.Fridge.fridge_id == fridge_id).first()
+    return db.get(models.Fridge, fridge_id)
 
-def get_fridges(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Fridge).offset(skip).limit(limit).all()
+def get_fridges(db: Session, skip: int = 0, limit: int = 100, after: Optional[int] = None):
+    query = db.query(models.Fridge).order_by(models.Fridge.fridge_id)
+    if after is not None:
+        query = query.filter(models.Fridge.fridge_id > after)
+    return query.offset(skip).limit(limit).all()
 
 def create_fridge(db: Session, fridge: schemas.FridgeCreate):
     db_fridge = models.Fridge(
@@ -62,25 +230,26 @@ def create_fridge(db: Session, fridge: schemas.FridgeCreate):
     )
     db.add(db_fridge)
     db.commit()
-    db.refresh(db_fridge)
     return db_fridge
 
 def update_fridge(db: Session, fridge_id: int, fridge_in: schemas.FridgeBase):
-    db_fridge = get_fridge(db, fridge_id)
-    if not db_fridge:
-        return None
-    db_fridge.name = fridge_in.name
-    db_fridge.location_desc = fridge_in.location_desc
-    db.commit()
-    db.refresh(db_fridge)
+    db_fridge = _update_returning(db, models.Fridge, fridge_id, {
+        "name": fridge_in.name,
+        "location_desc": fridge_in.location_desc,
+    })
+    if db_fridge is not None:
+        db.commit()
     return db_fridge
 
 def delete_fridge(db: Session, fridge_id: int):
-    db_fridge = get_fridge(db, fridge_id)
-    if not db_fridge:
+    # One DELETE: members, items (with their notifications and pending
+    # scans) and spoil counts go by ON DELETE CASCADE, none of it loaded
+    result = db.execute(delete(models.Fridge).where(models.Fridge.fridge_id == fridge_id))
+    if result.rowcount == 0:
+        db.rollback()
         return False
-    db.delete(db_fridge)
     db.commit()
+    cache.invalidate_fridge(fridge_id)
     return True
 
 def add_user_to_fridge(
@@ -88,28 +257,58 @@ def add_user_to_fridge(
     fridge_id: int,
     share: schemas.FridgeUserCreate
 ) -> models.FridgeUser:
-    """Share a fridge with a user."""
-    # Optional: check fridge and user exist
+    """Share a fridge with a user; the foreign keys reject unknown ones."""
+    version = next_version(db, fridge_id)
+    if version is None:
+        db.rollback()
+        raise MissingReference("Fridge not found")
+    # A share granted again is no longer revoked
+    db.execute(revoked_share(fridge_id, share.user_id))
+    # The incremental scan only looks at new or re-dated items: queue the
+    # ones already due so the new member is notified about them too
+    for stmt in spoil.queue_scans(and_(
+        models.FridgeItem.fridge_id == fridge_id, notification_window(date.today())
+    )):
+        db.execute(stmt)
     mapping = models.FridgeUser(
         fridge_id=fridge_id,
         user_id=share.user_id,
-        role=share.role
+        role=share.role,
+        version=version
     )
     db.add(mapping)
-    db.commit()
-    db.refresh(mapping)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise (
+            missing_reference(db, fridge_id=fridge_id, user_id=share.user_id)
+            or Conflict("User already has access to this fridge")
+        )
     return mapping
 
+def revoked_share(fridge_id: int, user_id: int):
+    """DELETE of the tombstone left by revoking a user's share."""
+    tombstone = models.FridgeTombstone
+    return delete(tombstone).where(
+        tombstone.fridge_id == fridge_id, tombstone.kind == sync.MEMBER, tombstone.ref_id == user_id
+    )
+
 def remove_user_from_fridge(
     db: Session,
     fridge_id: int,
     user_id: int
 ) -> bool:
-    """Revoke a user’s access to a fridge."""
-    mapping = db.query(models.FridgeUser).get((fridge_id, user_id))
-    if not mapping:
+    """Revoke a user’s access to a fridge, leaving a tombstone for delta sync."""
+    if next_version(db, fridge_id) is None:
+        db.rollback()
+        return False
+    member = models.FridgeUser
+    share = and_(member.fridge_id == fridge_id, member.user_id == user_id)
+    db.execute(sync.member_tombstones(share))
+    if db.execute(delete(member).where(share)).rowcount == 0:
+        db.rollback()
         return False
-    db.delete(mapping)
     db.commit()
     return True
 
@@ -119,25 +318,91 @@ def list_fridge_users(
 ) -> List[models.FridgeUser]:
     return db.query(models.FridgeUser).filter_by(fridge_id=fridge_id).all()
 
+def get_fridge_changes(db: Session, fridge_id: int, since: Optional[int] = None) -> Optional[dict]:
+    """
+    A fridge's item and member changes after sync version since, with the
+    ids deleted or revoked meanwhile (see app/sync.py); all current rows
+    when since is None or unknown. None if there is no such fridge.
+    """
+    version = db.scalar(sync.current_version(fridge_id))
+    if version is None:
+        return None
+    full = sync.is_full(since, version)
+    floor = -1 if full else since
+    items = db.scalars(sync.changed_items(fridge_id, floor)).all()
+    members = db.scalars(sync.changed_members(fridge_id, floor)).all()
+    deleted = [] if full else db.execute(sync.tombstones(fridge_id, since)).all()
+    return sync.changes(fridge_id, version, since, items, members, deleted)
+
+def list_fridge_members(db: Session, fridge_id: int) -> List[models.FridgeUser]:
+    """A fridge's memberships with their users, in one joined query."""
+    return db.scalars(
+        select(models.FridgeUser)
+          .options(joinedload(models.FridgeUser.user, innerjoin=True))
+          .where(models.FridgeUser.fridge_id == fridge_id)
+          .order_by(models.FridgeUser.user_id)
+    ).all()
+
 def get_fridge_item(db: Session, item_id: int):
-    return db.query(models.FridgeItem).filter(models.FridgeItem.item_id == item_id).first()
+    return db.get(models.FridgeItem, item_id)
 
-def get_fridge_items(db: Session, fridge_id: int, skip: int = 0, limit: int = 100) -> List[models.FridgeItem]:
-    return (
-        db.query(models.FridgeItem)
-          .filter(models.FridgeItem.fridge_id == fridge_id)
-          .offset(skip)
-          .limit(limit)
-          .all()
+def items_after(after: Tuple[Optional[date], int]):
+    """Filter for items sorted after (spoil_date, item_id); NULL spoil dates sort first."""
+    spoil, item_id = after
+    if spoil is None:
+        return or_(
+            models.FridgeItem.spoil_date.isnot(None),
+            models.FridgeItem.item_id > item_id
+        )
+    # The leading range on spoil_date lets the index seek straight to the page
+    return and_(
+        models.FridgeItem.spoil_date >= spoil,
+        or_(models.FridgeItem.spoil_date > spoil, models.FridgeItem.item_id > item_id)
     )
 
-def create_fridge_item(db: Session, fridge_id: int, item: FridgeItemCreate):
-    # Compute spoil_date
-    if item.opened_at:
-        spoil = item.opened_at + timedelta(days=item.open_life_days)
-    else:
-        spoil = item.factory_expires_at
+def fridge_items_page(
+    stmt,
+    fridge_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Optional[date], int]] = None
+):
+    """Filter, order and page a SELECT over fridge items (of the entity or of columns)."""
+    stmt = (
+        stmt.where(models.FridgeItem.fridge_id == fridge_id)
+            .order_by(models.FridgeItem.spoil_date, models.FridgeItem.item_id)
+    )
+    if after is not None:
+        stmt = stmt.where(items_after(after))
+    return stmt.offset(skip).limit(limit)
+
+def get_fridge_items(
+    db: Session,
+    fridge_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Optional[date], int]] = None
+) -> List[models.FridgeItem]:
+    return db.scalars(fridge_items_page(select(models.FridgeItem), fridge_id, skip, limit, after)).all()
+
+def get_fridge_item_rows(
+    db: Session,
+    fridge_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[Optional[date], int]] = None
+):
+    """get_fridge_items() as FridgeItemRead column tuples, for rows.response()."""
+    stmt = select(*rows.columns(models.FridgeItem, schemas.FridgeItemRead))
+    return db.execute(fridge_items_page(stmt, fridge_id, skip, limit, after)).all()
 
+def create_fridge_item(db: Session, fridge_id: int, item: FridgeItemCreate):
+    # Missing shelf-life fields come from the product (raises CatalogError)
+    item = catalog.fill_item_defaults(db, item)
+    version = next_version(db, fridge_id)
+    if version is None:
+        db.rollback()
+        raise MissingReference("Fridge not found")
     db_item = models.FridgeItem(
         fridge_id=fridge_id,
         added_by=item.added_by,
@@ -146,59 +411,405 @@ def create_fridge_item(db: Session, fridge_id: int, item: FridgeItemCreate):
         factory_expires_at=item.factory_expires_at,
         opened_at=item.opened_at,
         open_life_days=item.open_life_days,
-        spoil_date=spoil
+        spoil_date=spoil.spoil_date(item.factory_expires_at, item.opened_at, item.open_life_days),
+        version=version
     )
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    try:
+        db.flush()
+        # Let the next notification scan pick the new item up
+        db.add(models.PendingItemScan(item_id=db_item.item_id))
+        count_spoil_dates(db, [(fridge_id, db_item.spoil_date, 1)])
+        db.commit()
+    except IntegrityError:
+        # The foreign keys stand in for existence checks up front
+        db.rollback()
+        error = missing_reference(db, fridge_id=fridge_id, user_id=item.added_by, qr_code=item.qr_code)
+        if error is None:
+            raise
+        raise error
+    cache.invalidate_fridge(fridge_id)
+    metrics.ITEMS_CREATED.inc()
     return db_item
 
-def update_fridge_item(db: Session, item_id: int, item_in: FridgeItemUpdate):
-    db_item = get_fridge_item(db, item_id)
-    if not db_item:
-        return None
+def bulk_item_rows(
+    db: Session,
+    fridge_id: int,
+    items: List[FridgeItemCreate]
+) -> Tuple[List[dict], List[Tuple[int, str]]]:
+    """
+    INSERT parameters (spoil dates included, version not yet) for the
+    valid items of a bulk create, plus an (index, detail) error for every
+    rejected one. Users and QR codes are validated with one query each
+    (none for cached QR codes); missing shelf-life fields come from the
+    product.
+    """
+    user_ids = {item.added_by for item in items}
+    known_users = {
+        user_id for (user_id,) in
+        db.query(models.User.user_id).filter(models.User.user_id.in_(user_ids))
+    }
+    products = catalog.lookup_many(db, (item.qr_code for item in items))
+
+    added_at = datetime.utcnow()
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        if item.added_by not in known_users:
+            errors.append((index, "User not found"))
+            continue
+        if products[item.qr_code] is None:
+            errors.append((index, "QR code not found"))
+            continue
+        item = catalog.with_product_defaults(item, products[item.qr_code], added_at.date())
+        rows.append({
+            "fridge_id": fridge_id,
+            "added_by": item.added_by,
+            "qr_code": item.qr_code,
+            "added_at": added_at,
+            "factory_expires_at": item.factory_expires_at,
+            "opened_at": item.opened_at,
+            "open_life_days": item.open_life_days,
+        })
+    # Spoil dates for the whole batch at once
+    spoil_dates = spoil.spoil_dates(
+        [row["factory_expires_at"] for row in rows],
+        [row["opened_at"] for row in rows],
+        [row["open_life_days"] for row in rows],
+    )
+    for row, spoil_date in zip(rows, spoil_dates):
+        row["spoil_date"] = spoil_date
+    return rows, errors
+
+# One batched INSERT ... RETURNING for a whole haul, which also loads the
+# rows (render_nulls keeps rows with and without opened_at in one batch;
+# asking for parameter order would split it into one statement per row
+# on SQLite)
+BULK_ITEM_INSERT = insert(models.FridgeItem).returning(models.FridgeItem).execution_options(render_nulls=True)
+
+def create_fridge_items_bulk(
+    db: Session,
+    fridge_id: int,
+    items: List[FridgeItemCreate]
+) -> Tuple[List[models.FridgeItem], List[Tuple[int, str]]]:
+    """
+    Create many items in one fridge at once: the valid rows (see
+    bulk_item_rows) in a single transaction. Returns the created items
+    plus an (index, detail) error for every rejected row.
+    """
+    rows, errors = bulk_item_rows(db, fridge_id, items)
+    if not rows:
+        # Nothing to write, so nothing has checked the fridge yet
+        if get_fridge(db, fridge_id) is None:
+            raise MissingReference("Fridge not found")
+        return [], errors
+    version = next_version(db, fridge_id)
+    if version is None:
+        db.rollback()
+        raise MissingReference("Fridge not found")
+    for row in rows:
+        row["version"] = version
+
+    if db.get_bind().dialect.insert_executemany_returning:
+        created = sorted(db.scalars(BULK_ITEM_INSERT, rows), key=lambda item: item.item_id)
+    else:
+        # No RETURNING (MySQL): ids come back per row, still one transaction
+        created = [models.FridgeItem(**row) for row in rows]
+        db.add_all(created)
+        db.flush()
+    # Let the next notification scan pick the new items up
+    db.execute(insert(models.PendingItemScan), [{"item_id": item.item_id} for item in created])
+    count_spoil_dates(db, [(fridge_id, item.spoil_date, 1) for item in created])
+    db.commit()
+    cache.invalidate_fridge(fridge_id)
+    metrics.ITEMS_CREATED.inc(amount=len(created))
+    return created, errors
+
+def item_update_values(item_in: FridgeItemUpdate, version: int) -> dict:
+    """
+    SET values for update_fridge_item: the given fields, and the spoil
+    date recomputed in SQL from them and the item's other columns.
+    """
+    item = models.FridgeItem
+    values = {"version": version}
+    opened_at, open_life_days = item.opened_at, item.open_life_days
     if item_in.opened_at is not None:
-        db_item.opened_at = item_in.opened_at
+        values["opened_at"] = opened_at = literal(item_in.opened_at, Date)
     if item_in.open_life_days is not None:
-        db_item.open_life_days = item_in.open_life_days
-    # re-compute spoil_date
-    if db_item.opened_at:
-        db_item.spoil_date = db_item.opened_at + timedelta(days=db_item.open_life_days)
-    else:
-        db_item.spoil_date = db_item.factory_expires_at
+        values["open_life_days"] = open_life_days = literal(item_in.open_life_days, Integer)
+    values["spoil_date"] = spoil.spoil_date_sql(item.factory_expires_at, opened_at, open_life_days)
+    return values
+
+def update_fridge_item(db: Session, item_id: int, item_in: FridgeItemUpdate):
+    # Fridge row first (sync version, and the spoil date being replaced),
+    # then one UPDATE ... RETURNING of the item
+    found = item_version(db, item_id)
+    if found is None:
+        return None
+    fridge_id, version, old_spoil = found
+    db_item = _update_returning(db, models.FridgeItem, item_id, item_update_values(item_in, version))
+    if db_item is None:
+        db.rollback()   # deleted meanwhile
+        return None
+    if db_item.spoil_date != old_spoil:
+        # Let the next notification scan re-check the item
+        for stmt in spoil.queue_scans(models.FridgeItem.item_id == item_id):
+            db.execute(stmt)
+        count_spoil_dates(db, [(fridge_id, old_spoil, -1), (fridge_id, db_item.spoil_date, 1)])
     db.commit()
-    db.refresh(db_item)
+    cache.invalidate_fridge(fridge_id)
     return db_item
 
+def count_spoil_dates(db: Session, changes: List[summary.SpoilChange]):
+    """Apply item count changes to fridge_spoil_counts (does not commit)."""
+    rows = summary.deltas(changes)
+    if rows:
+        for stmt, params in summary.count_statements(db.get_bind().dialect, rows):
+            db.execute(stmt, params)
+
+def expiring_dashboard(
+    db: Session,
+    user_id: int,
+    days: int = 3,
+    limit: int = 10,
+    today: Optional[date] = None
+) -> Optional[dict]:
+    """
+    Spoil counts per fridge the user shares, plus their limit soonest-
+    spoiling items, from fridge_spoil_counts (see app.summary). None if
+    there is no such user.
+    """
+    today = today or date.today()
+    fridges = db.execute(summary.user_fridges(user_id)).all()
+    if not fridges and get_user(db, user_id) is None:
+        return None
+    fridge_ids = [fridge_id for fridge_id, _ in fridges]
+    rows = db.execute(summary.counts(fridge_ids)).all() if fridge_ids else []
+    dashboard, cutoff = summary.summarize(fridges, rows, today, days, limit)
+    if cutoff is not None:
+        dashboard["soonest"] = db.scalars(summary.soonest_items(fridge_ids, today, cutoff, limit)).all()
+    return dashboard
+
+def recompute_spoil_dates(db: Session, where=None, open_life_days: Optional[int] = None) -> int:
+    """
+    Bring stored spoil dates in line with spoil.spoil_date_sql() in one
+    UPDATE (see spoil.recompute_statements). Changed items are queued for
+    the next notification scan. Returns how many items changed.
+    """
+    fridges, scans, stmt = spoil.recompute_statements(where, open_life_days)
+    fridge_ids = db.scalars(fridges).all()
+    updated = 0
+    if fridge_ids:
+        db.execute(sync.bump(fridge_ids))
+        for scan in scans:
+            db.execute(scan)
+        stmt = stmt.values(version=sync.version_of(models.FridgeItem.fridge_id))
+        updated = db.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+        # Recount the touched fridges rather than tracking every row
+        for recount in summary.rebuild_statements(fridge_ids):
+            db.execute(recount)
+    db.commit()
+    for fridge_id in fridge_ids:
+        cache.invalidate_fridge(fridge_id)
+    return updated
+
+def set_product_open_life(db: Session, product_id: int, open_life_days: int) -> Optional[int]:
+    """
+    Change a product's default_open_life, and the open life (and spoil
+    date) of its items that still carry the old default. Items whose open
+    life was set by hand keep it. Returns the items changed, or None if
+    there is no such product.
+    """
+    product = db.get(models.Product, product_id)
+    if product is None:
+        return None
+    old_default = product.default_open_life
+    if old_default is None:
+        old_default = product.default_shelf_life
+    # The flush at commit also invalidates the product's catalog entries
+    product.default_open_life = open_life_days
+    return recompute_spoil_dates(
+        db,
+        and_(spoil.of_product(product_id), models.FridgeItem.open_life_days == old_default),
+        open_life_days,
+    )
+
 def delete_fridge_item(db: Session, item_id: int) -> bool:
-    db_item = get_fridge_item(db, item_id)
-    if not db_item:
+    item = models.FridgeItem
+    # Fridge row first (sync version), then the item; tombstone for delta sync
+    found = item_version(db, item_id)
+    if found is None:
+        return False
+    fridge_id, _, spoil_date = found
+    db.execute(sync.item_tombstones(item.item_id == item_id))
+    if db.execute(delete(item).where(item.item_id == item_id)).rowcount == 0:
+        db.rollback()   # deleted meanwhile
         return False
-    db.delete(db_item)
+    count_spoil_dates(db, [(fridge_id, spoil_date, -1)])
     db.commit()
+    cache.invalidate_fridge(fridge_id)
     return True
 
+def notifications_page(
+    stmt,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[int] = None
+):
+    """Filter, order and page a SELECT over a user's notifications (of the entity or of columns)."""
+    stmt = (
+        stmt.where(models.Notification.user_id == user_id)
+            .order_by(models.Notification.note_id)
+    )
+    if after is not None:
+        stmt = stmt.where(models.Notification.note_id > after)
+    return stmt.offset(skip).limit(limit)
+
 def get_notifications_for_user(
     db: Session,
     user_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    after: Optional[int] = None
 ) -> List[models.Notification]:
+    return db.scalars(notifications_page(select(models.Notification), user_id, skip, limit, after)).all()
+
+def get_notification_rows(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[int] = None
+):
+    """get_notifications_for_user() as NotificationRead column tuples, for rows.response()."""
+    stmt = select(*rows.columns(models.Notification, schemas.NotificationRead))
+    return db.execute(notifications_page(stmt, user_id, skip, limit, after)).all()
+
+def notification_details():
+    """Loader options for a notification's item, QR code and product (all many-to-one)."""
     return (
-        db.query(models.Notification)
-          .filter(models.Notification.user_id == user_id)
-          .offset(skip)
+        joinedload(models.Notification.item, innerjoin=True)
+          .joinedload(models.FridgeItem.qr, innerjoin=True)
+          .joinedload(models.QRCode.product, innerjoin=True)
+    )
+
+def get_notification_details_for_user(
+    db: Session,
+    user_id: int,
+    limit: int = 100,
+    after: Optional[int] = None
+) -> List[models.Notification]:
+    """get_notifications_for_user() with item and product loaded in the same query."""
+    query = (
+        select(models.Notification)
+          .options(notification_details())
+          .where(models.Notification.user_id == user_id)
+          .order_by(models.Notification.note_id)
           .limit(limit)
-          .all()
     )
+    if after is not None:
+        query = query.where(models.Notification.note_id > after)
+    return db.scalars(query).all()
+
+SENT = {"sent": True, "claim_token": None, "lease_expires_at": None}
 
 def mark_notification_sent(db: Session, note_id: int) -> bool:
-    note = db.query(models.Notification).get(note_id)
-    if not note:
-        return False
-    note.sent = True
+    """
+    Mark a notification as sent; False if there is no such notification.
+    Sending one again is a no-op, and is not counted in NOTIFICATIONS_SENT.
+    """
+    note = models.Notification
+    updated = db.execute(
+        update(note)
+          .where(note.note_id == note_id, note.sent == False)
+          .values(**SENT)
+    ).rowcount
     db.commit()
-    return True
+    if updated > 0:
+        metrics.NOTIFICATIONS_SENT.inc()
+        return True
+    # Already sent, or missing: only this path looks the row up
+    return db.get(note, note_id) is not None
+
+def ack_statement(
+    note_ids: Optional[List[int]] = None,
+    user_id: Optional[int] = None,
+    up_to: Optional[int] = None,
+    claim_token: Optional[str] = None
+):
+    """The single UPDATE behind acknowledge_notifications()."""
+    note = models.Notification
+    where = [note.sent == False]
+    if note_ids is not None:
+        where.append(note.note_id.in_(note_ids))
+    if user_id is not None:
+        where.append(note.user_id == user_id)
+    if up_to is not None:
+        where.append(note.note_id <= up_to)
+    if claim_token is not None:
+        where.append(note.claim_token == claim_token)
+    return update(note).where(*where).values(**SENT)
+
+def acknowledge_notifications(db: Session, **target) -> int:
+    """
+    Mark many notifications as sent in one UPDATE; target is ack_statement()'s
+    arguments. Returns how many were still un-sent.
+    """
+    updated = db.execute(ack_statement(**target)).rowcount
+    db.commit()
+    metrics.NOTIFICATIONS_SENT.inc(amount=updated)
+    return updated
+
+def claimable(now: datetime):
+    """Un-sent notifications that nobody holds an unexpired lease on."""
+    note = models.Notification
+    return and_(
+        note.sent == False,
+        or_(note.lease_expires_at.is_(None), note.lease_expires_at < now),
+    )
+
+def claim_notifications(
+    db: Session,
+    limit: int = 100,
+    lease_seconds: int = NOTIFICATION_LEASE_SECONDS
+) -> Tuple[str, datetime, List[models.Notification]]:
+    """
+    Lease up to limit un-sent notifications to the caller, oldest first.
+
+    Concurrent workers get disjoint batches: candidate rows are locked
+    with FOR UPDATE SKIP LOCKED (MySQL 8), so a worker passes over rows
+    another is claiming instead of waiting, and the UPDATE re-checks that
+    each row is still claimable (enough on SQLite, where writers are
+    serialized). Rows left un-acknowledged become claimable again when
+    the lease runs out. Returns (claim token, lease expiry, the claimed
+    notifications with their item and product).
+    """
+    note = models.Notification
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    expires = now + timedelta(seconds=lease_seconds)
+    ids = db.scalars(
+        select(note.note_id)
+          .where(claimable(now))
+          .order_by(note.note_id)
+          .limit(limit)
+          .with_for_update(skip_locked=True)
+    ).all()
+    claimed = []
+    if ids:
+        db.execute(
+            update(note)
+              .where(note.note_id.in_(ids), claimable(now))
+              .values(claim_token=token, lease_expires_at=expires)
+        )
+        claimed = db.scalars(
+            select(note)
+              .options(notification_details())
+              .where(note.note_id.in_(ids), note.claim_token == token)
+              .order_by(note.note_id)
+        ).all()
+    db.commit()
+    return token, expires, claimed
 
 def create_notification(db: Session, notif: NotificationCreate):
     db_note = models.Notification(
@@ -210,42 +821,185 @@ def create_notification(db: Session, notif: NotificationCreate):
     )
     db.add(db_note)
     db.commit()
-    db.refresh(db_note)
     return db_note
 
-def generate_notifications(db: Session):
+NOTIFICATION_SCAN = "notifications"
+# MySQL named lock held for a whole generation run (names are server-wide)
+NOTIFICATION_LOCK = "wasteless.notification_scan"
+
+@contextmanager
+def notification_run_lock(db: Session):
     """
-    Scan fridge_items for spoil_date <= today+1 (about_to_spoil)
-    or <= today (spoiled), then insert any missing notifications.
+    Serialize generation runs across worker processes: yields whether this
+    process may run now. On MySQL/MariaDB it holds GET_LOCK on a connection
+    of its own for the block, without waiting: if another worker is
+    running, that run covers this one. SQLite runs one writer at a time
+    anyway, and the inserts tolerate overlaps.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name not in ("mysql", "mariadb"):
+        yield True
+        return
+    with bind.connect() as conn:
+        acquired = conn.scalar(select(func.get_lock(NOTIFICATION_LOCK, 0))) == 1
+        conn.commit()   # the lock belongs to the connection, not the transaction
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.scalar(select(func.release_lock(NOTIFICATION_LOCK)))
+                conn.commit()
+
+def notification_window(today: date):
+    """Items due a notification on today: spoiled, or spoiling by tomorrow."""
+    return models.FridgeItem.spoil_date <= today + timedelta(days=1)
+
+def start_notification_scan(db: Session, full_scan: bool = False):
+    """
+    Snapshot what a generation run has to look at.
+
+    Returns (today, since, pending): since is the last scan date, or None
+    when every item must be scanned; pending holds the queued items as
+    (item_id, seq) pairs.
+    """
+    scan = db.get(models.NotificationScan, NOTIFICATION_SCAN)
+    pending = db.execute(select(models.PendingItemScan.item_id, models.PendingItemScan.seq)).all()
+    since = None if scan is None or full_scan else scan.last_scan_date
+    return date.today(), since, [tuple(row) for row in pending]
+
+def generate_missing_notifications(
+    db: Session,
+    today: date,
+    since: Optional[date] = None,
+    pending: List[Tuple[int, int]] = (),
+    shard: int = 0,
+    shards: int = 1
+) -> List[models.Notification]:
     """
-    today = date.today()
-    upcoming = today + timedelta(days=1)
+    Insert the notifications missing for one shard of fridges
+    (fridge_id % shards == shard) and return them.
 
-    # Fetch all relevant items with their fridge users
-    rows = (
-      db.query(models.FridgeItem, models.FridgeUser)
+    The missing (item, user, type) triples are found with one anti-join
+    query and inserted together in a single transaction.
+    """
+    in_window = notification_window(today)
+    if since is not None:
+        # Everything with spoil_date <= since was already past both
+        # thresholds at the last scan
+        in_window = and_(
+            in_window,
+            or_(
+                models.FridgeItem.spoil_date > since,
+                models.FridgeItem.item_id.in_([item_id for item_id, _ in pending])
+            )
+        )
+    if shards > 1:
+        in_window = and_(in_window, models.FridgeItem.fridge_id % shards == shard)
+
+    # Decide type in SQL so it can take part in the anti-join
+    typ = case(
+        (spoil.spoiled(models.FridgeItem.spoil_date, today), 'spoiled'),
+        else_='about_to_spoil'
+    )
+    # Skip if already exists un-sent
+    already_notified = exists().where(
+        models.Notification.item_id == models.FridgeItem.item_id,
+        models.Notification.user_id == models.FridgeUser.user_id,
+        models.Notification.type == typ,
+        models.Notification.sent == False
+    )
+    missing = (
+      db.query(models.FridgeItem.item_id, models.FridgeUser.user_id, typ)
         .join(models.FridgeUser, models.FridgeItem.fridge_id == models.FridgeUser.fridge_id)
-        .filter(models.FridgeItem.spoil_date <= upcoming)
+        .filter(in_window)
+        .filter(~already_notified)
+        .order_by(models.FridgeItem.item_id, models.FridgeUser.user_id)
         .all()
     )
+    if not missing:
+        return []
 
-    created = []
-    for item, share in rows:
-        # Decide type
-        typ = 'spoiled' if item.spoil_date <= today else 'about_to_spoil'
-        # Skip if already exists un-sent
-        exists = db.query(models.Notification).filter_by(
-            item_id=item.item_id,
-            user_id=share.user_id,
-            type=typ,
-            sent=False
-        ).first()
-        if exists:
-            continue
-        notif = NotificationCreate(
-            item_id=item.item_id,
-            user_id=share.user_id,
-            type=typ
+    notified_at = datetime.utcnow()
+    rows = [
+        {
+            "item_id": item_id,
+            "user_id": user_id,
+            "type": note_type,
+            "notified_at": notified_at,
+            "sent": False,
+        }
+        for item_id, user_id, note_type in missing
+    ]
+    # Rows another run inserted since the anti-join are skipped, not fatal
+    # (uq_notifications_pending)
+    stmt = (
+        insert(models.Notification)
+          .prefix_with("IGNORE", dialect="mysql")
+          .prefix_with("IGNORE", dialect="mariadb")
+          .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+    if db.get_bind().dialect.insert_executemany_returning:
+        # The batched INSERT ... RETURNING hands back the new rows
+        created = sorted(
+            db.scalars(stmt.returning(models.Notification), rows),
+            key=lambda note: note.note_id
+        )
+        db.commit()
+    else:
+        db.execute(stmt, rows)
+        db.commit()
+        # Reload the new rows in one query instead of one refresh per row;
+        # the anti-join guarantees these are the only un-sent ones per triple
+        wanted = set(missing)
+        created = [
+            n for n in (
+                db.query(models.Notification)
+                  .filter(models.Notification.item_id.in_({item_id for item_id, _, _ in missing}))
+                  .filter(models.Notification.sent == False)
+                  .order_by(models.Notification.note_id)
+            )
+            if (n.item_id, n.user_id, n.type) in wanted
+        ]
+
+    by_type = {}
+    for note in created:
+        by_type[note.type] = by_type.get(note.type, 0) + 1
+    for note_type, count in by_type.items():
+        metrics.NOTIFICATIONS_GENERATED.inc(note_type, amount=count)
+    return created
+
+def finish_notification_scan(db: Session, today: date, pending: List[Tuple[int, int]]):
+    """
+    Advance the watermark once every shard of a run has succeeded, and
+    dequeue the items the run scanned. An item queued again while the run
+    was going has a new seq and stays queued for the next run.
+    """
+    scan = db.get(models.NotificationScan, NOTIFICATION_SCAN)
+    if scan is None:
+        db.add(models.NotificationScan(name=NOTIFICATION_SCAN, last_scan_date=today))
+    else:
+        scan.last_scan_date = today
+    if pending:
+        db.execute(
+            delete(models.PendingItemScan)
+              .where(tuple_(models.PendingItemScan.item_id, models.PendingItemScan.seq).in_(pending))
+              .execution_options(synchronize_session=False)
         )
-        created.append(create_notification(db, notif))
+    db.commit()
+
+def generate_notifications(db: Session, full_scan: bool = False):
+    """
+    Scan fridge_items for spoil_date <= today+1 (about_to_spoil)
+    or <= today (spoiled), then insert any missing notifications.
+
+    Unless full_scan is set, only items whose spoil window opened since
+    the last scan, or that were created or re-dated since then, are
+    looked at.
+    """
+    with notification_run_lock(db) as acquired:
+        if not acquired:
+            return []
+        today, since, pending = start_notification_scan(db, full_scan)
+        created = generate_missing_notifications(db, today, since, pending)
+        finish_notification_scan(db, today, pending)
     return created
@@ -0,0 +1,108 @@
+# app/export.py
+#
+# Streaming exports of a fridge's items and a user's notification history.
+#
+# Rows are read as plain column tuples through a server-side cursor
+# (yield_per / stream_results) and written out as NDJSON or CSV one batch
+# at a time, so memory stays flat however large the export is and the
+# first bytes go out as soon as the first batch is fetched. The stream
+# opens its own session: the request's session is closed before a
+# StreamingResponse body is sent.
+
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Iterator, List, Literal, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from . import models, rows, schemas
+from .config import EXPORT_BATCH_SIZE
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def fridge_items(fridge_id: int):
+    """A fridge's items in listing order, as FridgeItemRead columns."""
+    return (
+        select(*rows.columns(models.FridgeItem, schemas.FridgeItemRead))
+        .where(models.FridgeItem.fridge_id == fridge_id)
+        .order_by(models.FridgeItem.spoil_date, models.FridgeItem.item_id)
+    )
+
+
+def notifications(user_id: int):
+    """A user's notification history in id order, as NotificationRead columns."""
+    return (
+        select(*rows.columns(models.Notification, schemas.NotificationRead))
+        .where(models.Notification.user_id == user_id)
+        .order_by(models.Notification.note_id)
+    )
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+class _Encoder:
+    """Turns batches of rows into NDJSON or CSV text."""
+
+    def __init__(self, fmt: str, columns: Sequence[str]):
+        self.fmt = fmt
+        self.columns = list(columns)
+
+    def header(self) -> str:
+        return self._csv([self.columns]) if self.fmt == "csv" else ""
+
+    def batch(self, rows: List[Sequence]) -> str:
+        if self.fmt == "csv":
+            return self._csv([["" if v is None else _value(v) for v in row] for row in rows])
+        return "".join(
+            json.dumps(dict(zip(self.columns, row)), default=_value, separators=(",", ":")) + "\n"
+            for row in rows
+        )
+
+    @staticmethod
+    def _csv(rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue()
+
+
+def stream(session_factory, stmt, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Encoded rows of stmt, one chunk per fetched batch, on a session of its own."""
+    with session_factory() as db:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        encoder = _Encoder(fmt, result.keys())
+        header = encoder.header()
+        if header:
+            yield header
+        for rows in result.partitions():
+            yield encoder.batch(rows)
+
+
+async def astream(session_factory, stmt, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[str]:
+    """Async counterpart of stream() for AsyncSession factories."""
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        encoder = _Encoder(fmt, result.keys())
+        header = encoder.header()
+        if header:
+            yield header
+        async for rows in result.partitions():
+            yield encoder.batch(rows)
+
+
+def response(chunks, fmt: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": 'attachment; filename="%s.%s"' % (filename, fmt)},
+    )
@@ -1,20 +1,43 @@
 # app/main.py
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from datetime import date
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from .db import engine, SessionLocal, Base
-from . import schemas, crud, models
-from typing import List
-from .schemas import FridgeUserCreate, FridgeUserRead, NotificationRead
+from .db import engine, ReplicaSessionLocals, SessionLocal, pool_stats
+from . import cache, export, metrics, rows, routing, schemas, spoil, sqlstats, crud
+from .scheduler import notification_scheduler
+from typing import List, Optional
+from .pagination import cursor_key, next_cursor, set_next_cursor
+from .bootstrap import create_schema
+from .catalog import CatalogError, cache_stats
+from .config import CREATE_SCHEMA, NOTIFICATION_LEASE_SECONDS, STARTUP_PROFILE
+from .startup import first_connection, logger as startup_logger, report as startup_report
+from .crud import Conflict, MissingReference
+from .schemas import FridgeUserCreate, FridgeUserRead
 from .schemas import (
     FridgeItemCreate,
-    FridgeItemRead,
     FridgeItemUpdate
 )
-# 1) Create all tables in the database (no-ops if they already exist)
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="WasteLess API")
+# 1) Tables are created by `python -m app.bootstrap` (or with
+#    WASTELESS_CREATE_SCHEMA=1), not on import: starting a worker opens no
+#    connection
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if CREATE_SCHEMA:
+        create_schema()
+    if STARTUP_PROFILE:
+        first_connection(engine)
+        startup_logger.info("Startup timings:\n%s", startup_report())
+    # Notifications are generated in the background, not per request
+    notification_scheduler.start()
+    yield
+    notification_scheduler.stop()
+
+app = FastAPI(title="WasteLess API", lifespan=lifespan)
+sqlstats.install(app)
+routing.install(app, ReplicaSessionLocals)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # 2) Dependency: get a database session, ensure it closes after use
 def get_db():
@@ -24,16 +47,34 @@ def get_db():
     finally:
         db.close()
 
+# 2b) Read-only routes: a replica session, or the primary after the client's
+#     own writes (app/routing.py)
+def read_sessions(request: Request):
+    return routing.choose(request, SessionLocal, ReplicaSessionLocals)
+
+def get_read_db(sessions=Depends(read_sessions)):
+    db = sessions()
+    try:
+        yield db
+    finally:
+        db.close()
+
 # 3) A simple “ping” endpoint
 @app.get("/ping")
 def ping():
     return {"message": "WasteLess is up!"}
 
-# 4) READ: List all users
+# 4) READ: List all users (page with the X-Next-Cursor header)
 @app.get("/users/", response_model=list[schemas.UserRead])
-def list_users(db: Session = Depends(get_db)):
-    users = crud.get_users(db)
-    return users
+def list_users(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    after = cursor_key(cursor, int)
+    # Column tuples straight to JSON; same body as the UserRead list
+    users = crud.get_user_rows(db, limit=limit, after=after[0] if after else None)
+    return rows.response(users, schemas.UserRead, next_cursor(users, limit, lambda u: (u.user_id,)))
 
 # 5) CREATE: a new user
 @app.post(
@@ -45,13 +86,14 @@ def create_user_endpoint(
     user: schemas.UserCreate,
     db: Session = Depends(get_db)
 ):
-    # ensure email isn’t already taken
-    if crud.get_user_by_email(db, user.email):
+    # The unique key on email rejects taken ones, without a race
+    try:
+        return crud.create_user(db, user)
+    except Conflict as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=str(exc)
         )
-    return crud.create_user(db, user)
 
 # 6) UPDATE an existing user
 @app.put(
@@ -63,7 +105,10 @@ def update_user_endpoint(
     user_in: schemas.UserBase,
     db: Session = Depends(get_db)
 ):
-    updated = crud.update_user(db, user_id, user_in)
+    try:
+        updated = crud.update_user(db, user_id, user_in)
+    except Conflict as exc:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(exc))
     if not updated:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -80,7 +125,15 @@ def delete_user_endpoint(
     user_id: int,
     db: Session = Depends(get_db)
 ):
-    success = crud.delete_user(db, user_id)
+    # Items the user added to fridges others share are theirs too: 409
+    # until they are moved or deleted
+    try:
+        success = crud.delete_user(db, user_id)
+    except Conflict as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc)
+        )
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,8 +143,15 @@ def delete_user_endpoint(
 # --- FRIDGE ROUTES ---
 
 @app.get("/fridges/", response_model=list[schemas.FridgeRead])
-def list_fridges(db: Session = Depends(get_db)):
-    return crud.get_fridges(db)
+def list_fridges(
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    after = cursor_key(cursor, int)
+    fridges = crud.get_fridges(db, limit=limit, after=after[0] if after else None)
+    return set_next_cursor(response, fridges, limit, lambda f: (f.fridge_id,))
 
 @app.post("/fridges/", response_model=schemas.FridgeRead, status_code=status.HTTP_201_CREATED)
 def create_fridge_endpoint(fridge: schemas.FridgeCreate, db: Session = Depends(get_db)):
@@ -125,7 +185,7 @@ def delete_fridge_endpoint(fridge_id: int, db: Session = Depends(get_db)):
 )
 def list_fridge_users_endpoint(
     fridge_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     return crud.list_fridge_users(db, fridge_id)
 
@@ -141,14 +201,13 @@ def add_user_to_fridge_endpoint(
     share: FridgeUserCreate,
     db: Session = Depends(get_db)
 ):
-    # Optionally: verify fridge exists
-    if not crud.get_fridge(db, fridge_id):
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Fridge not found")
-    # Optionally: verify user exists
-    if not crud.get_user(db, share.user_id):
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
-
-    return crud.add_user_to_fridge(db, fridge_id, share)
+    # The foreign keys and primary key reject unknown or repeated shares
+    try:
+        return crud.add_user_to_fridge(db, fridge_id, share)
+    except MissingReference as exc:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(exc))
+    except Conflict as exc:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(exc))
 
 
 # 10) REVOKE: remove a user’s access
@@ -175,11 +234,27 @@ def remove_user_from_fridge_endpoint(
 )
 def list_fridge_items_endpoint(
     fridge_id: int,
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    return crud.get_fridge_items(db, fridge_id, skip, limit)
+    # Items are ordered by (spoil_date, item_id); prefer cursor over skip
+    after = cursor_key(cursor, date, int)
+    # Served from the cache until the fridge changes; 304 if the ETag matches
+    key = cache.item_page_key(fridge_id, skip, limit, cursor)
+    # A client that just wrote skips it, reading (and re-caching) the primary's page
+    page = cache.get_page(key) if not routing.reads_primary(request) else None
+    if page is None:
+        items = crud.get_fridge_item_rows(db, fridge_id, skip, limit, after=after)
+        # Only the primary is sure to be at the version in the key; a
+        # lagging replica's page would be served as current
+        page = cache.put_item_page(
+            key if routing.on_primary(request) else None,
+            items, next_cursor(items, limit, lambda i: (i.spoil_date, i.item_id))
+        )
+    return cache.page_response(request, page)
 
 
 # 12) CREATE a new item
@@ -193,11 +268,13 @@ def create_fridge_item_endpoint(
     item: FridgeItemCreate,
     db: Session = Depends(get_db)
 ):
-    # Verify fridge exists
-    if not crud.get_fridge(db, fridge_id):
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Fridge not found")
-
-    return crud.create_fridge_item(db, fridge_id, item)
+    # A missing fridge or user is caught by the foreign keys
+    try:
+        return crud.create_fridge_item(db, fridge_id, item)
+    except MissingReference as exc:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=str(exc))
+    except CatalogError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
 
 
 # 13) UPDATE an item
@@ -239,9 +316,12 @@ def list_notifications_endpoint(
     user_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    return crud.get_notifications_for_user(db, user_id, skip, limit)
+    after = cursor_key(cursor, int)
+    notes = crud.get_notification_rows(db, user_id, skip, limit, after=after[0] if after else None)
+    return rows.response(notes, schemas.NotificationRead, next_cursor(notes, limit, lambda n: (n.note_id,)))
 
 
 # 16) MARK a notification as sent
@@ -258,11 +338,204 @@ def send_notification_endpoint(
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Notification not found")
 
 
-# 17) GENERATE notifications on demand
+# 17) GENERATE notifications on demand (runs in the background)
 @app.post(
     "/notifications/generate",
-    response_model=List[schemas.NotificationRead]
+    response_model=schemas.NotificationJobStatus,
+    status_code=status.HTTP_202_ACCEPTED
+)
+def generate_notifications_endpoint(full_scan: bool = False):
+    notification_scheduler.trigger(full_scan=full_scan)
+    return notification_scheduler.status()
+
+
+# 18) STATUS of the background notification job
+@app.get(
+    "/notifications/generate/status",
+    response_model=schemas.NotificationJobStatus
+)
+def notification_job_status_endpoint():
+    return notification_scheduler.status()
+
+
+# 19) Connection pool usage, for sizing the pool from real data
+@app.get("/db/pool-stats", response_model=schemas.PoolStats)
+def pool_stats_endpoint():
+    return pool_stats(engine)
+
+
+# 20) BULK CREATE items (e.g. a whole grocery haul); bad rows are reported,
+#     not fatal
+@app.post(
+    "/fridges/{fridge_id}/items/bulk",
+    response_model=schemas.FridgeItemBulkResult,
+    status_code=status.HTTP_201_CREATED
 )
-def generate_notifications_endpoint(db: Session = Depends(get_db)):
-    new_notes = crud.generate_notifications(db)
-    return new_notes
+def create_fridge_items_bulk_endpoint(
+    fridge_id: int,
+    items: List[FridgeItemCreate],
+    db: Session = Depends(get_db)
+):
+    # A missing fridge is caught by next_version (or the foreign key)
+    try:
+        created, errors = crud.create_fridge_items_bulk(db, fridge_id, items)
+    except MissingReference as exc:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=str(exc))
+    return {
+        "created": created,
+        "errors": [{"index": index, "detail": detail} for index, detail in errors],
+    }
+
+
+# 21) QR code catalog cache hit/miss counters
+@app.get("/catalog/cache-stats", response_model=schemas.CatalogCacheStats)
+def catalog_cache_stats_endpoint():
+    return cache_stats()
+
+
+# 22) Statements, DB time and repeated statements per route
+@app.get("/debug/sql-stats", response_model=List[schemas.SQLRouteStats])
+def sql_stats_endpoint():
+    return sqlstats.route_stats()
+
+
+# 23) Prometheus metrics: request latency per route, errors, pool and domain counters
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return Response(metrics.render(pool_stats(engine)), media_type=metrics.CONTENT_TYPE)
+
+
+# 24) EXPORT a fridge's items, streamed as NDJSON or CSV
+@app.get("/fridges/{fridge_id}/items/export")
+def export_fridge_items_endpoint(
+    fridge_id: int,
+    format: export.ExportFormat = "ndjson",
+    db: Session = Depends(get_read_db),
+    sessions=Depends(read_sessions)
+):
+    if not crud.get_fridge(db, fridge_id):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Fridge not found")
+    chunks = export.stream(sessions, export.fridge_items(fridge_id), format)
+    return export.response(chunks, format, f"fridge-{fridge_id}-items")
+
+
+# 25) EXPORT a user's notification history, streamed as NDJSON or CSV
+@app.get("/users/{user_id}/notifications/export")
+def export_notifications_endpoint(
+    user_id: int,
+    format: export.ExportFormat = "ndjson",
+    db: Session = Depends(get_read_db),
+    sessions=Depends(read_sessions)
+):
+    if not crud.get_user(db, user_id):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="User not found")
+    chunks = export.stream(sessions, export.notifications(user_id), format)
+    return export.response(chunks, format, f"user-{user_id}-notifications")
+
+
+# 26) RECOMPUTE stored spoil dates in one UPDATE (all items, or one product's)
+@app.post("/items/recompute-spoil-dates", response_model=schemas.SpoilRecomputeResult)
+def recompute_spoil_dates_endpoint(
+    product_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    where = spoil.of_product(product_id) if product_id is not None else None
+    return {"updated": crud.recompute_spoil_dates(db, where)}
+
+
+# 27) CHANGE a product's default open life; its items that use the default follow
+@app.put("/products/{product_id}/open-life", response_model=schemas.SpoilRecomputeResult)
+def set_product_open_life_endpoint(
+    product_id: int,
+    product_in: schemas.ProductOpenLifeUpdate,
+    db: Session = Depends(get_db)
+):
+    updated = crud.set_product_open_life(db, product_id, product_in.default_open_life)
+    if updated is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Product not found")
+    return {"updated": updated}
+
+
+# 28) DASHBOARD: what is about to spoil across every fridge a user shares
+@app.get("/users/{user_id}/expiring", response_model=schemas.ExpiringDashboard)
+def expiring_dashboard_endpoint(
+    user_id: int,
+    days: int = 3,
+    limit: int = 10,
+    db: Session = Depends(get_read_db)
+):
+    dashboard = crud.expiring_dashboard(db, user_id, days=days, limit=limit)
+    if dashboard is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="User not found")
+    return dashboard
+
+
+# 29) LIST a fridge's members with their names and emails (one query)
+@app.get("/fridges/{fridge_id}/members", response_model=List[schemas.FridgeMemberRead])
+def list_fridge_members_endpoint(
+    fridge_id: int,
+    db: Session = Depends(get_read_db)
+):
+    return crud.list_fridge_members(db, fridge_id)
+
+
+# 30) LIST a user's notifications with item and product details (one query)
+@app.get(
+    "/users/{user_id}/notifications/details",
+    response_model=List[schemas.NotificationDetailRead]
+)
+def list_notification_details_endpoint(
+    user_id: int,
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    after = cursor_key(cursor, int)
+    notes = crud.get_notification_details_for_user(
+        db, user_id, limit, after=after[0] if after else None
+    )
+    return set_next_cursor(response, notes, limit, lambda n: (n.note_id,))
+
+
+# 31) ACKNOWLEDGE many notifications as sent in one UPDATE
+@app.post("/notifications/ack", response_model=schemas.NotificationAckResult)
+def acknowledge_notifications_endpoint(
+    ack: schemas.NotificationAck,
+    db: Session = Depends(get_db)
+):
+    up_to = cursor_key(ack.cursor, int)
+    acknowledged = crud.acknowledge_notifications(
+        db,
+        note_ids=ack.note_ids,
+        user_id=ack.user_id,
+        up_to=up_to[0] if up_to else None,
+        claim_token=ack.claim_token,
+    )
+    return {"acknowledged": acknowledged}
+
+
+# 32) CLAIM a batch of un-sent notifications for a delivery worker; workers
+#     get disjoint batches, and un-acknowledged ones return after the lease
+@app.post("/notifications/claim", response_model=schemas.NotificationClaim)
+def claim_notifications_endpoint(
+    limit: int = 100,
+    lease_seconds: int = NOTIFICATION_LEASE_SECONDS,
+    db: Session = Depends(get_db)
+):
+    token, expires, notes = crud.claim_notifications(db, limit, lease_seconds)
+    return {"claim_token": token, "lease_expires_at": expires, "notifications": notes}
+
+
+# 33) SYNC: a fridge's items and members changed after ?since=<version>, plus
+#     deleted items and revoked shares; without since, everything current
+@app.get("/fridges/{fridge_id}/changes", response_model=schemas.FridgeChanges)
+def fridge_changes_endpoint(
+    fridge_id: int,
+    since: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    changes = crud.get_fridge_changes(db, fridge_id, since)
+    if changes is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Fridge not found")
+    return changes
@@ -0,0 +1,224 @@
+# app/metrics.py
+#
+# Prometheus text-format metrics without a client library dependency.
+#
+# Updates must be cheap enough to stay on in the request path, so every
+# thread writes to its own shard (a plain dict reached through
+# threading.local) and takes no lock. A scrape copies and sums the shards
+# of all threads; dict.copy() is atomic under the GIL, so it never sees
+# a half-applied update.
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Notification generation run buckets, in seconds
+RUN_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()     # only taken once per thread
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self) -> List[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+    def _labels(self, values: Tuple, extra: str = "") -> str:
+        pairs = ['%s="%s"' % (name, _escape(value)) for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{%s}" % ",".join(pairs) if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = ["# HELP %s %s" % (self.name, self.help), "# TYPE %s %s" % (self.name, self.kind)]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _totals(self) -> Dict[Tuple, float]:
+        totals = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def _samples(self) -> List[str]:
+        return [
+            "%s%s %s" % (self.name, self._labels(labels), _number(value))
+            for labels, value in sorted(self._totals().items())
+        ]
+
+
+class Gauge(Counter):
+    """Up/down gauge: the sum of every thread's +/- updates."""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One slot per bucket plus +Inf, then the running sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _samples(self) -> List[str]:
+        totals = {}
+        for shard in self._snapshots():
+            for labels, counts in shard.items():
+                counts = list(counts)
+                merged = totals.setdefault(labels, [0] * len(counts))
+                for i, value in enumerate(counts):
+                    merged[i] += value
+        lines = []
+        for labels, counts in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else _number(bound))
+                lines.append("%s_bucket%s %d" % (self.name, self._labels(labels, le), cumulative))
+            lines.append("%s_sum%s %s" % (self.name, self._labels(labels), _number(counts[-1])))
+            lines.append("%s_count%s %d" % (self.name, self._labels(labels), cumulative))
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY: List[_Metric] = []
+
+# HTTP
+REQUEST_SECONDS = Histogram(
+    "wasteless_http_request_duration_seconds",
+    "Request latency by route template.",
+    ("method", "route", "status"),
+)
+IN_FLIGHT = Gauge("wasteless_http_requests_in_flight", "Requests being served.")
+ERRORS = Counter(
+    "wasteless_http_errors_total",
+    "Requests answered with a 5xx status or an unhandled exception.",
+    ("method", "route"),
+)
+
+# Database routing
+DB_READS = Counter(
+    "wasteless_db_reads_total",
+    "Read-only requests by where they were sent (primary, sticky or replica-N).",
+    ("target",),
+)
+
+# Domain
+ITEMS_CREATED = Counter("wasteless_items_created_total", "Fridge items created.")
+NOTIFICATIONS_GENERATED = Counter(
+    "wasteless_notifications_generated_total",
+    "Notifications inserted by the generator.",
+    ("type",),
+)
+NOTIFICATIONS_SENT = Counter("wasteless_notifications_sent_total", "Notifications marked as sent.")
+GENERATION_SECONDS = Histogram(
+    "wasteless_notification_run_duration_seconds",
+    "Duration of notification generation runs.",
+    ("outcome",),
+    buckets=RUN_BUCKETS,
+)
+
+
+def render(pool: Optional[dict] = None) -> str:
+    """All registered metrics, plus DB pool gauges from app.db.pool_stats()."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for key, value in sorted((pool or {}).items()):
+        if isinstance(value, (int, float)):
+            name = "wasteless_db_pool_%s" % key
+            lines.append("# TYPE %s gauge" % name)
+            lines.append("%s %s" % (name, _number(value)))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _route(scope) -> str:
+    # The template, not the raw path, keeps label cardinality bounded
+    return getattr(scope.get("route"), "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding the HTTP latency, in-flight and error metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            method, route = scope["method"], _route(scope)
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method, route, str(status))
+            if status >= 500:
+                ERRORS.inc(method, route)
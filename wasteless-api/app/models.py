@@ -1,8 +1,8 @@
 # app/models.py
 
 from sqlalchemy import (
-    Column, Integer, String, Text, Date, 
-    Boolean, ForeignKey, Enum
+    Column, Integer, String, Text, Date, DateTime,
+    Boolean, ForeignKey, Enum, Computed, Index, UniqueConstraint
 )
 from sqlalchemy.orm import relationship
 from .db import Base
@@ -14,16 +14,19 @@ class User(Base):
     email         = Column(String(255), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     name          = Column(String(100))
-    created_at    = Column(Date, nullable=False)
+    created_at    = Column(DateTime, nullable=False)
 
     # Relationships
+    # Deletes never load these: crud.delete_user removes the rows in bulk
+    # and the foreign keys cascade the rest (passive_deletes)
     fridges       = relationship(
         "Fridge",
         secondary="fridge_users",
-        back_populates="users"
+        back_populates="users",
+        passive_deletes=True
     )
-    added_items   = relationship("FridgeItem", back_populates="added_by_user")
-    notifications = relationship("Notification", back_populates="user")
+    added_items   = relationship("FridgeItem", back_populates="added_by_user", passive_deletes=True)
+    notifications = relationship("Notification", back_populates="user", passive_deletes=True)
 
 
 class Fridge(Base):
@@ -32,14 +35,18 @@ class Fridge(Base):
     fridge_id     = Column(Integer, primary_key=True, index=True)
     name          = Column(String(100), nullable=False)
     location_desc = Column(Text)
-    created_at    = Column(Date, nullable=False)
+    created_at    = Column(DateTime, nullable=False)
+    # Bumped by every write to the fridge's items or members (app/sync.py)
+    sync_version  = Column(Integer, nullable=False, default=0, server_default="0")
 
+    # Left to ON DELETE CASCADE when the fridge goes (passive_deletes)
     users         = relationship(
         "User",
         secondary="fridge_users",
-        back_populates="fridges"
+        back_populates="fridges",
+        passive_deletes=True
     )
-    items         = relationship("FridgeItem", back_populates="fridge")
+    items         = relationship("FridgeItem", back_populates="fridge", passive_deletes=True)
 
 
 class FridgeUser(Base):
@@ -48,6 +55,16 @@ class FridgeUser(Base):
     fridge_id = Column(Integer, ForeignKey("fridges.fridge_id", ondelete="CASCADE"), primary_key=True)
     user_id   = Column(Integer, ForeignKey("users.user_id",   ondelete="CASCADE"), primary_key=True)
     role      = Column(String(20), nullable=False)
+    version   = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Read side only: membership is written through this table directly
+    user      = relationship("User", viewonly=True)
+
+    __table_args__ = (
+        # A user's fridges (the primary key leads with fridge_id; MySQL
+        # also indexes user_id for its foreign key)
+        Index("ix_fridge_users_user", "user_id"),
+    )
 
 
 class Product(Base):
@@ -78,17 +95,28 @@ class FridgeItem(Base):
     fridge_id          = Column(Integer, ForeignKey("fridges.fridge_id", ondelete="CASCADE"), nullable=False)
     added_by           = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     qr_code            = Column(String(100), ForeignKey("qr_codes.qr_code"), nullable=False)
-    added_at           = Column(Date, nullable=False)
+    added_at           = Column(DateTime, nullable=False)
     factory_expires_at = Column(Date, nullable=False)
     opened_at          = Column(Date)
     open_life_days     = Column(Integer, nullable=False)
     spoil_date         = Column(Date)
+    # The fridge's sync_version at the item's last write
+    version            = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     fridge       = relationship("Fridge",    back_populates="items")
     added_by_user = relationship("User",      back_populates="added_items")
     qr            = relationship("QRCode")
 
+    __table_args__ = (
+        # Listing a fridge (ordered by spoil date) and per-fridge scans
+        Index("ix_fridge_items_fridge_spoil", "fridge_id", "spoil_date"),
+        # Notification generation window (spoil_date <= tomorrow)
+        Index("ix_fridge_items_spoil_date", "spoil_date"),
+        # Items changed since a sync version
+        Index("ix_fridge_items_fridge_version", "fridge_id", "version"),
+    )
+
 
 class Notification(Base):
     __tablename__ = "notifications"
@@ -96,10 +124,67 @@ class Notification(Base):
     note_id     = Column(Integer, primary_key=True, index=True)
     item_id     = Column(Integer, ForeignKey("fridge_items.item_id", ondelete="CASCADE"), nullable=False)
     user_id     = Column(Integer, ForeignKey("users.user_id"),          nullable=False)
-    notified_at = Column(Date,    nullable=False)
+    notified_at = Column(DateTime, nullable=False)
     type        = Column(String(20), nullable=False)
     sent        = Column(Boolean, default=False)
+    # 1 while un-sent, NULL once sent: lets the unique key below allow any
+    # number of sent rows but only one un-sent row per (item, user, type)
+    pending     = Column(Boolean, Computed("CASE WHEN sent THEN NULL ELSE 1 END", persisted=True))
+    # Set while a delivery worker holds the notification (see crud.claim_notifications)
+    claim_token      = Column(String(32))
+    lease_expires_at = Column(DateTime)
 
     # Relationships
     user = relationship("User",      back_populates="notifications")
     item = relationship("FridgeItem")
+
+    __table_args__ = (
+        # A user's notifications, in id order
+        Index("ix_notifications_user", "user_id", "note_id"),
+        # Un-sent notifications in id order, for delivery claims
+        Index("ix_notifications_sent", "sent", "note_id"),
+        # Notification dedupe key, also serves the generator's anti-join
+        UniqueConstraint("item_id", "user_id", "type", "pending", name="uq_notifications_pending"),
+    )
+
+
+class NotificationScan(Base):
+    __tablename__ = "notification_scans"
+
+    # One row per scanner; "notifications" is the generator's watermark
+    name           = Column(String(50), primary_key=True)
+    last_scan_date = Column(Date, nullable=False)
+
+
+class PendingItemScan(Base):
+    __tablename__ = "pending_item_scans"
+
+    # Items created or re-dated since the last scan
+    item_id = Column(Integer, ForeignKey("fridge_items.item_id", ondelete="CASCADE"), primary_key=True)
+    # Bumped each time the item is queued again (spoil.queue_scans)
+    seq     = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class FridgeSpoilCount(Base):
+    __tablename__ = "fridge_spoil_counts"
+
+    # Items of a fridge per spoil date, kept in step by the item writes
+    # (app/summary.py); the expiring-soon dashboard reads only this
+    fridge_id  = Column(Integer, ForeignKey("fridges.fridge_id", ondelete="CASCADE"), primary_key=True)
+    spoil_date = Column(Date, primary_key=True)
+    item_count = Column(Integer, nullable=False)
+
+
+class FridgeTombstone(Base):
+    __tablename__ = "fridge_tombstones"
+
+    # A deleted item or revoked share, at the fridge version of the delete
+    tombstone_id = Column(Integer, primary_key=True)
+    fridge_id    = Column(Integer, ForeignKey("fridges.fridge_id", ondelete="CASCADE"), nullable=False)
+    version      = Column(Integer, nullable=False)
+    kind         = Column(String(10), nullable=False)   # 'item' or 'member'
+    ref_id       = Column(Integer, nullable=False)      # item_id or user_id
+
+    __table_args__ = (
+        Index("ix_fridge_tombstones_fridge_version", "fridge_id", "version"),
+    )
@@ -0,0 +1,67 @@
+# app/pagination.py
+#
+# Opaque cursors for keyset pagination: the sort key of the last row of a
+# page, JSON-encoded and base64url'd. Clients pass it back unchanged.
+
+import base64
+import binascii
+import json
+from datetime import date
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+
+
+def encode_cursor(*key: Any) -> str:
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, date) else value for value in key],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple:
+    """Decode a cursor into a key whose parts have the given types; ValueError if invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != len(types):
+        raise ValueError("Invalid cursor")
+    return tuple(_coerce(value, typ) for value, typ in zip(key, types))
+
+
+def _coerce(value: Any, typ: type) -> Optional[Any]:
+    if value is None:
+        return None
+    if typ is date and isinstance(value, str):
+        return date.fromisoformat(value)
+    if typ is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError("Invalid cursor")
+
+
+def next_cursor(rows: list, limit: int, key) -> Optional[str]:
+    """Cursor for the page after rows, or None when this was the last page."""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(*key(rows[-1]))
+
+
+def cursor_key(cursor: Optional[str], *types: type) -> Optional[Tuple]:
+    """Decode a cursor query parameter, answering 400 when it is malformed."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor, *types)
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, key) -> list:
+    """Expose the next page's cursor as the X-Next-Cursor header."""
+    cursor = next_cursor(rows, limit, key)
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    return rows
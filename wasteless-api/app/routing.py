@@ -0,0 +1,94 @@
+# app/routing.py
+#
+# Read/write splitting. Routes that only read take their session from
+# get_read_db, which sends them round robin to the replicas listed in
+# WASTELESS_DATABASE_REPLICA_URLS; every other route (and every read when
+# no replica is configured) uses the primary.
+#
+# Replicas lag behind the primary, so a client that has just written
+# reads from the primary for a while: StickyWritesMiddleware sets a
+# short-lived cookie on every successful write response, and choose()
+# routes requests carrying it to the primary (read-your-writes). For the
+# same reason a replica's rows must not be cached as current: on_primary()
+# tells a route whether its reads came from the primary.
+#
+# Locally, replicas can be copies of the SQLite file:
+#
+#   cp wasteless.db replica1.db
+#   WASTELESS_DATABASE_URL=sqlite:///wasteless.db \
+#   WASTELESS_DATABASE_REPLICA_URLS=sqlite:///replica1.db uvicorn app.main:app
+
+import itertools
+import time
+from typing import Sequence, TypeVar
+
+from fastapi import Request
+
+from . import metrics
+from .config import READ_STICKY_SECONDS
+
+# Holds the time (epoch seconds) until which the client reads from the primary
+STICKY_COOKIE = "wasteless_primary"
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+Factory = TypeVar("Factory")
+
+_next_replica = itertools.count()
+
+
+def reads_primary(request: Request) -> bool:
+    """Whether the client wrote recently enough to need the primary."""
+    value = request.cookies.get(STICKY_COOKIE)
+    if value is None:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+def choose(request: Request, primary: Factory, replicas: Sequence[Factory]) -> Factory:
+    """The session factory for a read-only request: a replica unless sticky."""
+    if not replicas:
+        target, factory = "primary", primary
+    elif reads_primary(request):
+        target, factory = "sticky", primary
+    else:
+        index = next(_next_replica) % len(replicas)
+        target, factory = "replica-%d" % index, replicas[index]
+    metrics.DB_READS.inc(target)
+    request.state.read_target = target
+    return factory
+
+
+def on_primary(request: Request) -> bool:
+    """Whether choose() sent the request's reads to the primary."""
+    return getattr(request.state, "read_target", "primary") in ("primary", "sticky")
+
+
+class StickyWritesMiddleware:
+    """Pins a client's reads to the primary for READ_STICKY_SECONDS after it writes."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = "%s=%d; Max-Age=%d; Path=/; HttpOnly; SameSite=lax" % (
+                    STICKY_COOKIE, time.time() + READ_STICKY_SECONDS, READ_STICKY_SECONDS
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def install(app, replicas: Sequence):
+    """Add StickyWritesMiddleware when there are replicas to be sticky about."""
+    if replicas and READ_STICKY_SECONDS > 0:
+        app.add_middleware(StickyWritesMiddleware)
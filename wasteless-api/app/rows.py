@@ -0,0 +1,53 @@
+# app/rows.py
+#
+# Fast path for list routes: pages are selected as plain column tuples
+# (no ORM instances, no per-row Pydantic validation) and encoded straight
+# to JSON with orjson when it is installed. The columns are the *Read
+# schema's fields in the schema's order, so the bytes are the same as
+# FastAPI's own encoding of the response_model: dates and datetimes as
+# ISO 8601, non-ASCII left as UTF-8, no whitespace.
+#
+#   python -m bench.serialize      # CPU per 1,000 rows, both paths
+
+import json
+from datetime import date
+from typing import List, Optional, Sequence
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:     # optional: the stdlib encoder gives the same bytes, slower
+    orjson = None
+
+
+def fields(schema) -> List[str]:
+    return list(schema.__fields__)
+
+
+def columns(model, schema) -> list:
+    """The model's columns for the schema's fields, in the schema's order."""
+    return [getattr(model, name) for name in schema.__fields__]
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError("%r is not JSON serializable" % type(value).__name__)
+
+
+def dumps(rows: Sequence[Sequence], names: Sequence[str]) -> bytes:
+    """rows as a JSON array of objects keyed by names."""
+    objects = [dict(zip(names, row)) for row in rows]
+    if orjson is not None:
+        return orjson.dumps(objects)
+    # Same settings as FastAPI's JSONResponse
+    return json.dumps(
+        objects, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def response(rows: Sequence[Sequence], schema, next_cursor: Optional[str] = None) -> Response:
+    """rows (selected with columns(model, schema)) as a JSON list of schema objects."""
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return Response(dumps(rows, fields(schema)), media_type="application/json", headers=headers)
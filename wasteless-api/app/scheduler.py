@@ -0,0 +1,174 @@
+# app/scheduler.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from . import crud, metrics
+from .config import NOTIFICATION_INTERVAL_SECONDS, NOTIFICATION_SHARDS, NOTIFICATION_WORKERS
+from .db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationScheduler:
+    """
+    Runs notification generation in the background.
+
+    Each run is split into fridge shards that are generated concurrently
+    on a thread pool, every shard with its own session. The watermark only
+    advances once all shards have succeeded. Every worker process has a
+    scheduler; crud.notification_run_lock lets one of them run at a time,
+    and the others skip their turn.
+    """
+
+    def __init__(self, session_factory, interval: int, workers: int, shards: int):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.workers = max(workers, 1)
+        self.shards = max(shards, 1)
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._full_scan_requested = False
+        self._lock = threading.Lock()
+        self._status = {
+            "state": "stopped",
+            "runs": 0,
+            "skipped": 0,
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_duration_seconds": None,
+            "last_created": None,
+            "last_error": None,
+        }
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="notification-shard"
+        )
+        self._thread = threading.Thread(
+            target=self._loop,
+            name="notification-scheduler",
+            daemon=True
+        )
+        self._set_status(state="idle")
+        self._thread.start()
+        # Run once right away when on a cadence
+        if self.interval:
+            self._wake.set()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+        self._thread = None
+        self._pool = None
+        self._set_status(state="stopped")
+
+    def trigger(self, full_scan: bool = False):
+        """Ask for a run as soon as the current one (if any) is done."""
+        with self._lock:
+            self._full_scan_requested |= full_scan
+        self._wake.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def _set_status(self, **changes):
+        with self._lock:
+            self._status.update(changes)
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval or None)
+            self._wake.clear()
+            if self._stopping.is_set():
+                return
+            with self._lock:
+                full_scan, self._full_scan_requested = self._full_scan_requested, False
+            try:
+                self.run_once(full_scan)
+            except Exception:
+                logger.exception("Notification generation run failed")
+
+    def run_once(self, full_scan: bool = False) -> int:
+        """
+        Generate notifications for every shard; returns how many were
+        created (0 when another process was already running).
+        """
+        db = self.session_factory()
+        try:
+            with crud.notification_run_lock(db) as acquired:
+                if not acquired:
+                    logger.info("Notification generation is running in another process; skipped")
+                    with self._lock:
+                        self._status["skipped"] += 1
+                    return 0
+                return self._run_locked(db, full_scan)
+        finally:
+            db.close()
+
+    def _run_locked(self, db, full_scan: bool) -> int:
+        started = time.perf_counter()
+        self._set_status(state="running", last_started_at=datetime.utcnow())
+        try:
+            today, since, pending = crud.start_notification_scan(db, full_scan)
+            db.close()
+
+            futures = [
+                self._pool.submit(self._run_shard, today, since, pending, shard)
+                for shard in range(self.shards)
+            ]
+            created = sum(future.result() for future in futures)
+
+            crud.finish_notification_scan(db, today, pending)
+        except Exception as exc:
+            self._finish_run(started, created=None, error=repr(exc))
+            raise
+        self._finish_run(started, created=created, error=None)
+        return created
+
+    def _run_shard(self, today, since, pending, shard: int) -> int:
+        db = self.session_factory()
+        try:
+            notes = crud.generate_missing_notifications(
+                db, today, since, pending, shard=shard, shards=self.shards
+            )
+            return len(notes)
+        finally:
+            db.close()
+
+    def _finish_run(self, started: float, created: Optional[int], error: Optional[str]):
+        duration = time.perf_counter() - started
+        metrics.GENERATION_SECONDS.observe(duration, "error" if error else "ok")
+        with self._lock:
+            self._status.update(
+                state="idle" if self._thread is not None else "stopped",
+                runs=self._status["runs"] + 1,
+                last_finished_at=datetime.utcnow(),
+                last_duration_seconds=duration,
+                last_created=created,
+                last_error=error,
+            )
+
+
+notification_scheduler = NotificationScheduler(
+    SessionLocal,
+    interval=NOTIFICATION_INTERVAL_SECONDS,
+    workers=NOTIFICATION_WORKERS,
+    shards=NOTIFICATION_SHARDS,
+)
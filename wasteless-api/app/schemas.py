@@ -1,6 +1,6 @@
 # app/schemas.py
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, root_validator
 from datetime import datetime, date
 from typing import Optional, List, Literal
 
@@ -53,6 +53,10 @@ class FridgeUserRead(FridgeUserBase):
 
     class Config:
         orm_mode = True
+
+# For listing a fridge's members together with who they are
+class FridgeMemberRead(FridgeUserRead):
+    user: UserRead
        
 # Shared fields for FridgeItem
 class FridgeItemBase(BaseModel):
@@ -61,8 +65,11 @@ class FridgeItemBase(BaseModel):
     opened_at: Optional[date] = None
     open_life_days: int
 
-# For creation
+# For creation; leave factory_expires_at / open_life_days out to default
+# them from the scanned product's shelf life
 class FridgeItemCreate(FridgeItemBase):
+    factory_expires_at: Optional[date] = None
+    open_life_days: Optional[int] = None
     added_by: int  # user_id of the person adding
 
 # For updates (you can change opened_at or open_life_days)
@@ -76,12 +83,23 @@ class FridgeItemRead(FridgeItemBase):
     fridge_id: int
     added_by: int
     added_at: datetime
-    spoil_date: date
+    spoil_date: Optional[date] = None   # stored column; NULL until recompute fills it
 
     class Config:
         orm_mode = True      
 
 
+# For bulk creation: one rejected row of the batch
+class FridgeItemBulkError(BaseModel):
+    index: int       # position in the submitted list
+    detail: str
+
+# For bulk creation: what was created and what was rejected
+class FridgeItemBulkResult(BaseModel):
+    created: List[FridgeItemRead]
+    errors: List[FridgeItemBulkError]
+
+
 # Shared notification fields
 class NotificationBase(BaseModel):
     item_id: int
@@ -100,3 +118,137 @@ class NotificationRead(NotificationBase):
 
     class Config:
         orm_mode = True
+
+# Catalog details shown alongside items
+class ProductRead(BaseModel):
+    product_id: int
+    name: str
+    category: Optional[str] = None
+    default_shelf_life: int
+    default_open_life: Optional[int] = None
+
+    class Config:
+        orm_mode = True
+
+class QRCodeRead(BaseModel):
+    qr_code: str
+    batch_info: Optional[str] = None
+    info_url: Optional[str] = None
+    product: ProductRead
+
+    class Config:
+        orm_mode = True
+
+# An item with what it is, for rendering notifications
+class FridgeItemDetailRead(FridgeItemRead):
+    qr: QRCodeRead
+
+# A notification with its item and product
+class NotificationDetailRead(NotificationRead):
+    item: FridgeItemDetailRead
+
+# Batch acknowledgement: the given ids, or a user's un-sent notifications
+# up to a cursor (an X-Next-Cursor of their listing; all without one)
+class NotificationAck(BaseModel):
+    note_ids: Optional[List[int]] = None
+    user_id: Optional[int] = None
+    cursor: Optional[str] = None
+    claim_token: Optional[str] = None   # only acknowledge rows still held by this claim
+
+    @root_validator(skip_on_failure=True)
+    def one_target(cls, values):
+        if (values.get("note_ids") is None) == (values.get("user_id") is None):
+            raise ValueError("Give either note_ids or user_id")
+        if values.get("cursor") is not None and values.get("user_id") is None:
+            raise ValueError("cursor needs user_id")
+        return values
+
+class NotificationAckResult(BaseModel):
+    acknowledged: int
+
+# A delivery worker's batch of claimed notifications
+class NotificationClaim(BaseModel):
+    claim_token: str
+    lease_expires_at: datetime
+    notifications: List[NotificationDetailRead]
+
+# Background notification generation job
+class NotificationJobStatus(BaseModel):
+    state: Literal['stopped', 'idle', 'running']
+    runs: int
+    skipped: int = 0    # turns left to a run in another worker process
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_duration_seconds: Optional[float] = None
+    last_created: Optional[int] = None
+    last_error: Optional[str] = None
+
+# Connection pool usage (see app.db.pool_stats)
+class PoolStats(BaseModel):
+    pool: str
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    idle: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    total_wait_seconds: Optional[float] = None
+    max_wait_seconds: Optional[float] = None
+
+# QR code catalog cache counters (see app.catalog)
+class CatalogCacheStats(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+    ttl_seconds: float
+
+# Per-route SQL totals (see app.sqlstats)
+class SQLRouteStats(BaseModel):
+    route: str
+    requests: int
+    statements: int
+    statements_per_request: float
+    max_statements: int
+    db_ms: float
+    db_ms_per_request: float
+    slowest_ms: float
+    slowest: Optional[str] = None
+    repeated_requests: int
+    repeated: List[str]
+
+# Changing a product's default open life (see crud.set_product_open_life)
+class ProductOpenLifeUpdate(BaseModel):
+    default_open_life: int
+
+# Items changed by a bulk spoil-date recompute
+class SpoilRecomputeResult(BaseModel):
+    updated: int
+
+# Expiring-soon dashboard: one fridge's counts (see app.summary)
+class FridgeSpoilSummary(BaseModel):
+    fridge_id: int
+    name: str
+    items: int
+    spoiled: int            # spoil date today or earlier (spoil.spoiled)
+    expiring_soon: int      # spoiling tomorrow through today + days
+    next_spoil_date: Optional[date] = None
+
+# Expiring-soon dashboard across all fridges a user shares
+class ExpiringDashboard(BaseModel):
+    today: date
+    days: int
+    items: int
+    spoiled: int
+    expiring_soon: int
+    fridges: List[FridgeSpoilSummary]
+    soonest: List[FridgeItemRead]   # unspoiled items, soonest first
+
+# Delta sync: what changed in a fridge after the client's version (see app.sync)
+class FridgeChanges(BaseModel):
+    fridge_id: int
+    version: int                    # pass back as ?since= next time
+    full: bool                      # everything current, not a delta: replace the local copy
+    items: List[FridgeItemRead]     # created or updated
+    members: List[FridgeUserRead]   # shared or re-shared
+    deleted_items: List[int]
+    removed_members: List[int]      # user_ids whose share was revoked
@@ -0,0 +1,142 @@
+# app/spoil.py
+#
+# The spoil-date rule, kept in one place: opened items spoil
+# open_life_days after opening, others at factory expiry. It comes in
+# three forms that must agree:
+#
+#   spoil_date()      one item, in Python
+#   spoil_dates()     a batch, as NumPy datetime64 arrays when NumPy is
+#                     installed (a plain loop otherwise)
+#   spoil_date_sql()  a SQL expression, for set-based UPDATEs
+#
+# spoiled() is the matching boundary: an item counts as spoiled from its
+# spoil date on, for notifications and the dashboard alike.
+#
+# recompute_statements() builds the statements that bring stored
+# spoil_date values back in line with the rule in bulk; queue_scans()
+# hands changed items to the next notification scan.
+
+from datetime import date, timedelta
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Date, and_, case, exists, insert, or_, select, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from . import models
+
+try:
+    import numpy as np
+except ImportError:     # optional: batches fall back to the scalar rule
+    np = None
+
+
+def spoil_date(factory_expires_at: date, opened_at: Optional[date], open_life_days: int) -> date:
+    """Opened items spoil open_life_days after opening, others at factory expiry."""
+    if opened_at:
+        return opened_at + timedelta(days=open_life_days)
+    return factory_expires_at
+
+
+def spoil_dates(
+    factory_expires_at: Sequence[date],
+    opened_at: Sequence[Optional[date]],
+    open_life_days: Sequence[int]
+) -> List[date]:
+    """spoil_date() over parallel sequences, evaluated as arrays."""
+    if np is None:
+        return [spoil_date(*row) for row in zip(factory_expires_at, opened_at, open_life_days)]
+    factory = np.array(factory_expires_at, dtype="datetime64[D]")
+    opened = np.array(opened_at, dtype="datetime64[D]")     # None -> NaT
+    life = np.asarray(open_life_days, dtype="int64").astype("timedelta64[D]")
+    return np.where(np.isnat(opened), factory, opened + life).tolist()
+
+
+def spoiled(spoil_date, today: date):
+    """Whether an item has spoiled by today; spoil_date may be a date or a column."""
+    return spoil_date <= today
+
+
+# SQL
+
+class add_days(FunctionElement):
+    """date + n days, in each dialect's own spelling."""
+
+    type = Date()
+    name = "add_days"
+    inherit_cache = True
+
+
+@compiles(add_days)
+def _add_days(element, compiler, **kw):
+    day, days = (compiler.process(arg, **kw) for arg in element.clauses)
+    return "DATE_ADD(%s, INTERVAL %s DAY)" % (day, days)
+
+
+@compiles(add_days, "sqlite")
+def _add_days_sqlite(element, compiler, **kw):
+    day, days = (compiler.process(arg, **kw) for arg in element.clauses)
+    return "date(%s, (%s) || ' days')" % (day, days)
+
+
+def spoil_date_sql(factory_expires_at, opened_at, open_life_days):
+    """spoil_date() as a SQL expression over columns (or bound values)."""
+    return case(
+        (opened_at.isnot(None), add_days(opened_at, open_life_days)),
+        else_=factory_expires_at,
+    )
+
+
+def recompute_statements(where=None, open_life_days=None):
+    """
+    (fridges, scans, update) statements that recompute spoil_date in bulk.
+
+    where narrows the items (default: all of them); open_life_days, when
+    given, is written to those items too and used for their new dates.
+    Only items whose spoil date actually changes are touched:
+      fridges  SELECT DISTINCT fridge_id of those items (cache invalidation)
+      scans    queue them for the next notification scan (queue_scans())
+      update   the one UPDATE that rewrites them
+    Run them in that order, in one transaction.
+    """
+    item = models.FridgeItem
+    new_life = item.open_life_days if open_life_days is None else open_life_days
+    new_spoil = spoil_date_sql(item.factory_expires_at, item.opened_at, new_life)
+    changed = or_(item.spoil_date.is_(None), item.spoil_date != new_spoil)
+    if open_life_days is not None:
+        changed = or_(changed, item.open_life_days != open_life_days)
+    if where is not None:
+        changed = and_(where, changed)
+
+    fridges = select(item.fridge_id).distinct().where(changed)
+    scans = queue_scans(changed)
+    values = {"spoil_date": new_spoil}
+    if open_life_days is not None:
+        values["open_life_days"] = open_life_days
+    return fridges, scans, update(item).where(changed).values(**values)
+
+
+def queue_scans(where):
+    """
+    (requeue, insert) statements that queue the items matching where for
+    the next notification scan. Items already queued get a new seq, so a
+    scan that started before this write leaves them queued when it ends
+    (see crud.finish_notification_scan).
+    """
+    item, pending = models.FridgeItem, models.PendingItemScan
+    matching = select(item.item_id).where(where)
+    already_queued = exists().where(pending.item_id == item.item_id)
+    return [
+        update(pending)
+        .where(pending.item_id.in_(matching))
+        .values(seq=pending.seq + 1)
+        .execution_options(synchronize_session=False),
+        insert(pending).from_select(["item_id"], matching.where(~already_queued)),
+    ]
+
+
+def of_product(product_id: int):
+    """Filter for the items scanned from any of a product's QR codes."""
+    return models.FridgeItem.qr_code.in_(
+        select(models.QRCode.qr_code).where(models.QRCode.product_id == product_id)
+    )
@@ -0,0 +1,204 @@
+# app/sqlstats.py
+#
+# Per-request SQL instrumentation. Engine events count every statement and
+# its duration into the current request's RequestStats (a context
+# variable, so sync routes in the threadpool and async routes both see
+# it). The middleware reports them as a Server-Timing header and folds
+# them into per-route totals for GET /debug/sql-stats.
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import SQL_QUERY_BUDGET, SQL_REPEAT_THRESHOLD, SQL_STATS, SQL_STRICT
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request (or query_budget block) ran more statements than allowed."""
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds", "slowest_seconds", "slowest", "counts", "budget")
+
+    def __init__(self, budget: int = 0):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest = None
+        self.counts = Counter()     # statement text -> executions
+        self.budget = budget
+
+    def record(self, statement: str, seconds: float):
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest = statement
+
+    def repeated(self, threshold: int = SQL_REPEAT_THRESHOLD) -> list:
+        """(statement, count) for statements run at least threshold times: likely N+1 loops."""
+        return [(s, n) for s, n in self.counts.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return 'db;dur=%.2f;desc="%d queries"' % (self.db_seconds * 1000, self.statements)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("wasteless_sql_stats", default=None)
+
+
+# Engine hooks (every engine, sync or async)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.counts[statement] += 1
+    if stats.budget and stats.statements > stats.budget:
+        raise QueryBudgetExceeded(
+            "%d statements exceed the budget of %d; most repeated: %r"
+            % (stats.statements, stats.budget, stats.counts.most_common(1)[0][0][:200])
+        )
+    # On the execution context, which is dropped with the statement even
+    # when it fails (after_cursor_execute then never runs)
+    context._sqlstats_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = getattr(context, "_sqlstats_started", None)
+    if started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+@contextmanager
+def query_budget(limit: int):
+    """Fail with QueryBudgetExceeded when the block runs more than limit statements."""
+    stats = RequestStats(budget=limit)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# Per-route totals
+
+class RouteStats:
+    __slots__ = ("requests", "statements", "db_seconds", "max_statements",
+                 "slowest_seconds", "slowest", "repeated_requests", "repeated")
+
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.max_statements = 0
+        self.slowest_seconds = 0.0
+        self.slowest = None
+        self.repeated_requests = 0      # requests with a repeated statement
+        self.repeated = Counter()       # statement -> requests it repeated in
+
+    def add(self, stats: RequestStats):
+        self.requests += 1
+        self.statements += stats.statements
+        self.db_seconds += stats.db_seconds
+        self.max_statements = max(self.max_statements, stats.statements)
+        if stats.slowest_seconds > self.slowest_seconds:
+            self.slowest_seconds = stats.slowest_seconds
+            self.slowest = stats.slowest
+        repeated = stats.repeated()
+        if repeated:
+            self.repeated_requests += 1
+            self.repeated.update(statement for statement, _ in repeated)
+
+    def as_dict(self, route: str) -> dict:
+        return {
+            "route": route,
+            "requests": self.requests,
+            "statements": self.statements,
+            "statements_per_request": self.statements / self.requests,
+            "max_statements": self.max_statements,
+            "db_ms": self.db_seconds * 1000,
+            "db_ms_per_request": self.db_seconds * 1000 / self.requests,
+            "slowest_ms": self.slowest_seconds * 1000,
+            "slowest": self.slowest,
+            "repeated_requests": self.repeated_requests,
+            "repeated": [statement for statement, _ in self.repeated.most_common(5)],
+        }
+
+
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+def route_stats() -> list:
+    with _routes_lock:
+        return [stats.as_dict(route) for route, stats in sorted(_routes.items())]
+
+
+def reset_route_stats():
+    with _routes_lock:
+        _routes.clear()
+
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "<unmatched>"
+    return "%s %s" % (scope["method"], path)
+
+
+class SQLStatsMiddleware:
+    """
+    ASGI middleware that collects RequestStats for each HTTP request.
+
+    With strict=True, a request past budget statements fails with
+    QueryBudgetExceeded (meant for tests; WASTELESS_SQL_STRICT).
+    """
+
+    def __init__(self, app, budget: int = SQL_QUERY_BUDGET, strict: bool = SQL_STRICT):
+        self.app = app
+        self.budget = budget if strict else 0
+        self.warn_budget = budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(budget=self.budget)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = _route_name(scope)
+            with _routes_lock:
+                _routes.setdefault(route, RouteStats()).add(stats)
+            if self.warn_budget and stats.statements > self.warn_budget:
+                logger.warning("%s ran %d statements (budget %d)", route, stats.statements, self.warn_budget)
+
+
+def install(app):
+    """Add SQLStatsMiddleware to app unless WASTELESS_SQL_STATS is off."""
+    if SQL_STATS:
+        app.add_middleware(SQLStatsMiddleware)
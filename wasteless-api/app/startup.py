@@ -0,0 +1,76 @@
+# app/startup.py
+#
+# Startup timing. Worker start-up should be import time only: no schema
+# work and no database connection until the first request needs one.
+# Phases are timed where they happen (app.db wraps engine creation) and
+# reported by `python -m app.startup`, or logged at start-up with
+# WASTELESS_STARTUP_PROFILE=1.
+#
+#   python -m app.startup            # libraries, app import, engine, first connection
+#
+# Nothing here may import the rest of the app: app.db imports it early.
+
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# phase -> seconds, in the order the phases finished
+timings: Dict[str, float] = {}
+
+
+@contextmanager
+def phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def report() -> str:
+    width = max((len(name) for name in timings), default=0)
+    return "\n".join("%-*s %8.1f ms" % (width, name, seconds * 1000) for name, seconds in timings.items())
+
+
+def first_connection(engine):
+    """Open (and return to the pool) one connection, timed as "first_connection"."""
+    with phase("first_connection"):
+        with engine.connect():
+            pass
+
+
+async def afirst_connection(async_engine):
+    """first_connection() for the async engine."""
+    with phase("first_connection"):
+        async with async_engine.connect():
+            pass
+
+
+def main():
+    # Run as __main__, so record into the app.startup module that app.db uses
+    from . import startup
+
+    with startup.phase("libraries"):
+        import fastapi  # noqa: F401
+        import sqlalchemy  # noqa: F401
+    with startup.phase("app import"):
+        from .asgi import app  # noqa: F401
+    from .config import DB_MODE
+    from .db import async_engine, engine
+
+    if DB_MODE == "async":
+        import asyncio
+
+        asyncio.run(startup.afirst_connection(async_engine))
+    else:
+        startup.first_connection(engine)
+    # "engine" is part of "app import"
+    print(startup.report())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# app/summary.py
+#
+# Per-fridge spoil summary behind the expiring-soon dashboard.
+#
+# fridge_spoil_counts holds how many items of a fridge spoil on each date.
+# Item writes keep it in step in their own transaction (deltas() +
+# count_statements()); bulk rewrites rebuild the affected fridges instead
+# (rebuild_statements()). Buckets like "spoiled" or "expiring soon" move
+# with the calendar, so they are summed from the per-date counts at read
+# time. A dashboard therefore reads a handful of rows per fridge, however
+# many items the fridges hold.
+
+from collections import Counter
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from . import models, spoil
+
+SpoilChange = Tuple[int, Optional[date], int]   # (fridge_id, spoil_date, +/- items)
+
+
+def deltas(changes: Iterable[SpoilChange]) -> List[dict]:
+    """Net count changes per (fridge, spoil date), as upsert() parameters."""
+    net = Counter()
+    for fridge_id, spoil_date, delta in changes:
+        if spoil_date is not None:
+            net[fridge_id, spoil_date] += delta
+    return [
+        {"fridge_id": fridge_id, "spoil_date": spoil_date, "item_count": delta}
+        for (fridge_id, spoil_date), delta in sorted(net.items()) if delta
+    ]
+
+
+def upsert(dialect):
+    """
+    INSERT that adds item_count onto an existing (fridge, spoil date) row,
+    or None if the backend has no upsert we know of.
+    """
+    table = models.FridgeSpoilCount.__table__
+    if dialect.name in ("mysql", "mariadb"):
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(item_count=table.c.item_count + stmt.inserted.item_count)
+    if dialect.name in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect.name == "sqlite" else postgresql).insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.fridge_id, table.c.spoil_date],
+            set_={"item_count": table.c.item_count + stmt.excluded.item_count},
+        )
+    return None
+
+
+def count_statements(dialect, rows: List[dict]) -> List[Tuple]:
+    """
+    (statement, parameters) pairs that apply deltas() rows: one upsert
+    executemany, or where there is none, a rebuild of the fridges involved.
+    """
+    stmt = upsert(dialect)
+    if stmt is not None:
+        return [(stmt, rows)]
+    return [(rebuild, None) for rebuild in rebuild_statements(sorted({row["fridge_id"] for row in rows}))]
+
+
+def rebuild_statements(fridge_ids: Optional[List[int]] = None):
+    """(delete, insert) that recount the given fridges (default: all) from fridge_items."""
+    count, item = models.FridgeSpoilCount, models.FridgeItem
+    recount = (
+        select(item.fridge_id, item.spoil_date, func.count())
+        .where(item.spoil_date.isnot(None))
+        .group_by(item.fridge_id, item.spoil_date)
+    )
+    clear = delete(count)
+    if fridge_ids is not None:
+        recount = recount.where(item.fridge_id.in_(fridge_ids))
+        clear = clear.where(count.fridge_id.in_(fridge_ids))
+    return clear, insert(count).from_select(["fridge_id", "spoil_date", "item_count"], recount)
+
+
+# Dashboard
+
+def user_fridges(user_id: int):
+    return (
+        select(models.Fridge.fridge_id, models.Fridge.name)
+        .join(models.FridgeUser, models.FridgeUser.fridge_id == models.Fridge.fridge_id)
+        .where(models.FridgeUser.user_id == user_id)
+        .order_by(models.Fridge.fridge_id)
+    )
+
+
+def counts(fridge_ids: List[int]):
+    count = models.FridgeSpoilCount
+    return (
+        select(count.fridge_id, count.spoil_date, count.item_count)
+        .where(count.fridge_id.in_(fridge_ids), count.item_count > 0)
+        .order_by(count.spoil_date)
+    )
+
+
+def soonest_items(fridge_ids: List[int], today: date, until: date, limit: int):
+    """Unspoiled items by spoil date, bounded by the cutoff from summarize()."""
+    item = models.FridgeItem
+    return (
+        select(item)
+        .where(
+            item.fridge_id.in_(fridge_ids),
+            ~spoil.spoiled(item.spoil_date, today),
+            item.spoil_date <= until,
+        )
+        .order_by(item.spoil_date, item.item_id)
+        .limit(limit)
+    )
+
+
+def summarize(fridges, rows, today: date, days: int, limit: int) -> Tuple[dict, Optional[date]]:
+    """
+    Dashboard counts from user_fridges() and counts() rows.
+
+    Also returns the date by which at least limit unspoiled items spoil
+    (the last date if there are fewer), so soonest_items() only has to
+    read about limit rows; None when nothing is left to spoil.
+    """
+    soon = today + timedelta(days=days)
+    per_fridge = {
+        fridge_id: {
+            "fridge_id": fridge_id, "name": name, "items": 0, "spoiled": 0,
+            "expiring_soon": 0, "next_spoil_date": None,
+        }
+        for fridge_id, name in fridges
+    }
+    cutoff, upcoming = None, 0
+    for fridge_id, spoil_date, items in rows:       # in spoil date order
+        fridge = per_fridge[fridge_id]
+        fridge["items"] += items
+        if spoil.spoiled(spoil_date, today):
+            fridge["spoiled"] += items
+            continue
+        if spoil_date <= soon:
+            fridge["expiring_soon"] += items
+        if fridge["next_spoil_date"] is None:
+            fridge["next_spoil_date"] = spoil_date
+        if upcoming < limit:
+            upcoming += items
+            cutoff = spoil_date
+
+    summaries = list(per_fridge.values())
+    dashboard = {
+        "today": today,
+        "days": days,
+        "items": sum(f["items"] for f in summaries),
+        "spoiled": sum(f["spoiled"] for f in summaries),
+        "expiring_soon": sum(f["expiring_soon"] for f in summaries),
+        "fridges": summaries,
+        "soonest": [],
+    }
+    return dashboard, cutoff
@@ -0,0 +1,110 @@
+# app/sync.py
+#
+# Delta sync for clients that keep a local copy of a fridge.
+#
+# Every write to a fridge's items or members bumps fridges.sync_version
+# first and stamps the rows it writes with the new value; deletes leave a
+# tombstone at that version. GET /fridges/{id}/changes?since=<version>
+# then reads only rows stamped after the client's version, through the
+# (fridge_id, version) indexes, so a sync costs what was edited since,
+# not what the fridge holds.
+#
+# The bump is an UPDATE of the fridge row, which holds the row lock until
+# commit: writes to one fridge commit in version order, so a reader never
+# sees version n+1 without n. Writes therefore take the fridge lock
+# before touching item rows, to keep one lock order everywhere.
+
+from typing import List, Optional
+
+from sqlalchemy import literal, select, update
+
+from . import models
+
+ITEM = "item"
+MEMBER = "member"
+
+
+def bump(fridges):
+    """UPDATE that moves the given fridges (ids or a SELECT of ids) to their next version."""
+    fridge = models.Fridge
+    return (
+        update(fridge)
+        .where(fridge.fridge_id.in_(fridges))
+        .values(sync_version=fridge.sync_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def current_version(fridge_id):
+    """SELECT of a fridge's sync_version (fridge_id may be a column)."""
+    return select(models.Fridge.sync_version).where(models.Fridge.fridge_id == fridge_id)
+
+
+def version_of(fridge_id):
+    """current_version() as a scalar subquery, for stamping rows inside a statement."""
+    return current_version(fridge_id).scalar_subquery()
+
+
+def item_tombstones(where):
+    """INSERT ... SELECT of tombstones for the items matching where, at their fridge's version."""
+    item = models.FridgeItem
+    return models.FridgeTombstone.__table__.insert().from_select(
+        ["fridge_id", "version", "kind", "ref_id"],
+        select(item.fridge_id, version_of(item.fridge_id), literal(ITEM), item.item_id).where(where),
+    )
+
+
+def member_tombstones(where):
+    """INSERT ... SELECT of tombstones for the memberships matching where."""
+    member = models.FridgeUser
+    return models.FridgeTombstone.__table__.insert().from_select(
+        ["fridge_id", "version", "kind", "ref_id"],
+        select(member.fridge_id, version_of(member.fridge_id), literal(MEMBER), member.user_id).where(where),
+    )
+
+
+# Reads
+
+def changed_items(fridge_id: int, since: int):
+    item = models.FridgeItem
+    return (
+        select(item)
+        .where(item.fridge_id == fridge_id, item.version > since)
+        .order_by(item.version, item.item_id)
+    )
+
+
+def changed_members(fridge_id: int, since: int):
+    member = models.FridgeUser
+    return (
+        select(member)
+        .where(member.fridge_id == fridge_id, member.version > since)
+        .order_by(member.user_id)
+    )
+
+
+def tombstones(fridge_id: int, since: int):
+    tombstone = models.FridgeTombstone
+    return (
+        select(tombstone.kind, tombstone.ref_id)
+        .where(tombstone.fridge_id == fridge_id, tombstone.version > since)
+        .order_by(tombstone.version, tombstone.tombstone_id)
+    )
+
+
+def is_full(since: Optional[int], version: int) -> bool:
+    """Whether since calls for a full snapshot: a first sync, or a version this fridge never had."""
+    return since is None or since > version
+
+
+def changes(fridge_id: int, version: int, since: Optional[int], items: List, members: List, deleted: List) -> dict:
+    """The FridgeChanges body from changed_items(), changed_members() and tombstones() rows."""
+    return {
+        "fridge_id": fridge_id,
+        "version": version,
+        "full": is_full(since, version),
+        "items": items,
+        "members": members,
+        "deleted_items": [ref_id for kind, ref_id in deleted if kind == ITEM],
+        "removed_members": [ref_id for kind, ref_id in deleted if kind == MEMBER],
+    }
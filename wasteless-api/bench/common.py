@@ -0,0 +1,111 @@
+# bench/common.py
+#
+# Helpers shared by the benchmark scripts: a throwaway SQLite database,
+# statement counting, latency percentiles and the JSON result format.
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event
+
+
+def use_sqlite(path: Optional[str] = None, cache: bool = True) -> str:
+    """
+    Point the app at a SQLite file; call before anything imports app.*.
+
+    The background notification scheduler is disabled so it does not run
+    during measurements. With cache=False the listing cache is turned off.
+    """
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="wasteless-bench-"), "bench.db")
+    os.environ["WASTELESS_DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["WASTELESS_NOTIFICATION_INTERVAL"] = "0"
+    if not cache:
+        os.environ["WASTELESS_CACHE_BACKEND"] = "none"
+    return path
+
+
+class QueryCounter:
+    """Counts statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+    def take(self) -> int:
+        """Statements since the last call."""
+        with self._lock:
+            count, self.count = self.count, 0
+        return count
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, queries: int) -> dict:
+    """Throughput, latency percentiles (ms) and queries per operation."""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "count": count,
+        "ops_per_second": count / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "queries_per_op": queries / count if count else 0.0,
+    }
+
+
+def metadata() -> dict:
+    """Where and on what code a run happened, to tell result files apart."""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    import sqlalchemy
+
+    return {
+        "revision": revision,
+        "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def write_results(benchmark: str, params: dict, results: dict, output: Optional[str]):
+    """Write {"benchmark", "meta", "params", "results"} JSON to output or stdout."""
+    document = {
+        "benchmark": benchmark,
+        "meta": metadata(),
+        "params": params,
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write("\n")
@@ -0,0 +1,64 @@
+# bench/compare.py
+"""
+Compare two result files from bench.micro or bench.http_load and list
+the cases that got slower or issue more queries.
+
+    python -m bench.compare before.json after.json --threshold 0.10
+"""
+
+import argparse
+import json
+import sys
+
+# Metric -> True when larger is better
+METRICS = {
+    "ops_per_second": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "queries_per_op": False,
+}
+
+
+def regressions(before: dict, after: dict, threshold: float) -> list:
+    """(case, metric, before, after) for every metric worse by more than threshold."""
+    found = []
+    for case, old in before["results"].items():
+        new = after["results"].get(case)
+        if new is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in old or metric not in new:
+                continue
+            a, b = old[metric], new[metric]
+            if metric == "queries_per_op":
+                worse = b > a      # any extra query is a regression
+            elif higher_is_better:
+                worse = b < a * (1 - threshold)
+            else:
+                worse = b > a * (1 + threshold)
+            if worse:
+                found.append((case, metric, a, b))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    found = regressions(before, after, args.threshold)
+    for case, metric, a, b in found:
+        print(f"{case}: {metric} {a:.3f} -> {b:.3f}")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
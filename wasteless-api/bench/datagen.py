@@ -0,0 +1,175 @@
+# bench/datagen.py
+"""
+Synthetic WasteLess data, from the size of the WastLess.sql sample
+(4 users, 4 fridges, 30 items, 8 notifications) up to millions of items.
+
+    python -m bench.datagen --items 1000000 --path /tmp/wasteless.db
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+# The catalog from WastLess.sql: (name, category, shelf life, open life)
+PRODUCTS = [
+    ("Milk", "Dairy", 7, 3),
+    ("Eggs", "Dairy", 21, 7),
+    ("Butter", "Dairy", 90, 14),
+    ("Cheese", "Dairy", 30, 7),
+    ("Lettuce", "Produce", 7, 3),
+    ("Carrot", "Produce", 14, 7),
+    ("Yogurt", "Dairy", 14, 5),
+    ("Chicken Breast", "Meat", 3, 2),
+    ("Orange Juice", "Beverage", 14, 5),
+    ("Apple", "Produce", 30, 14),
+    ("Ham", "Meat", 14, 7),
+    ("Tomato", "Produce", 10, 5),
+    ("Cucumber", "Produce", 14, 7),
+    ("Spinach", "Produce", 7, 3),
+    ("Beef Steak", "Meat", 5, 2),
+]
+ROLES = ("owner", "editor", "viewer")
+TYPES = ("about_to_spoil", "spoiled")
+
+
+class Scale(NamedTuple):
+    users: int
+    fridges: int
+    items: int
+    notifications: int
+
+    @classmethod
+    def for_items(cls, items: int, notifications: Optional[int] = None) -> "Scale":
+        """Keep the sample's proportions: ~7.5 items per fridge, a user per fridge."""
+        fridges = max(4, items * 4 // 30)
+        if notifications is None:
+            notifications = items * 8 // 30
+        return cls(users=fridges, fridges=fridges, items=items, notifications=notifications)
+
+
+SAMPLE = Scale(users=4, fridges=4, items=30, notifications=8)
+
+
+def generate(engine, scale: Scale, seed: int = 0, chunk: int = 50_000):
+    """
+    Create the schema and fill it with deterministic rows.
+
+    Rows get explicit ids (1..n) so benchmarks can address them. Every
+    fridge is owned by user ((fridge_id - 1) % users) + 1, who adds its
+    items; items spread over the fridges round-robin.
+    """
+    from sqlalchemy import insert
+    from app import models, summary
+    from app.spoil import spoil_date
+    from app.db import Base
+
+    Base.metadata.create_all(bind=engine)
+    rnd = random.Random(seed)
+    now = datetime.utcnow()
+    today = now.date()
+
+    def owner(fridge_id: int) -> int:
+        return (fridge_id - 1) % scale.users + 1
+
+    def fridge_of(item_id: int) -> int:
+        return (item_id - 1) % scale.fridges + 1
+
+    def insert_chunked(model, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk:
+                conn.execute(insert(model), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(model), batch)
+
+    def items():
+        for item_id in range(1, scale.items + 1):
+            product = rnd.randrange(len(PRODUCTS))
+            shelf_life, open_life = PRODUCTS[product][2], PRODUCTS[product][3]
+            factory = today + timedelta(days=rnd.randint(-shelf_life // 2, shelf_life))
+            opened = today - timedelta(days=rnd.randint(0, open_life)) if rnd.random() < 0.3 else None
+            fridge_id = fridge_of(item_id)
+            yield {
+                "item_id": item_id,
+                "fridge_id": fridge_id,
+                "added_by": owner(fridge_id),
+                "qr_code": "QR%03d" % (product + 1),
+                "added_at": now,
+                "factory_expires_at": factory,
+                "opened_at": opened,
+                "open_life_days": open_life,
+                "spoil_date": spoil_date(factory, opened, open_life),
+            }
+
+    def members():
+        # The owner plus up to two other users per fridge
+        for fridge_id in range(1, scale.fridges + 1):
+            roles = {owner(fridge_id): "owner"}
+            for _ in range(rnd.randint(0, 2)):
+                roles.setdefault(rnd.randint(1, scale.users), rnd.choice(ROLES[1:]))
+            for user_id, role in roles.items():
+                yield {"fridge_id": fridge_id, "user_id": user_id, "role": role}
+
+    def notifications():
+        for note_id in range(1, scale.notifications + 1):
+            # Distinct (item, type) pairs first; past that, only sent rows,
+            # which the pending dedupe key does not restrict
+            item_id = (note_id - 1) % scale.items + 1
+            round_ = (note_id - 1) // scale.items
+            yield {
+                "note_id": note_id,
+                "item_id": item_id,
+                "user_id": owner(fridge_of(item_id)),
+                "type": TYPES[round_ % 2],
+                "notified_at": now,
+                "sent": round_ >= 2 or rnd.random() < 0.5,
+            }
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.Product), [
+            {"product_id": i, "name": name, "category": category,
+             "default_shelf_life": shelf_life, "default_open_life": open_life}
+            for i, (name, category, shelf_life, open_life) in enumerate(PRODUCTS, 1)
+        ])
+        conn.execute(insert(models.QRCode), [
+            {"qr_code": "QR%03d" % i, "product_id": i} for i in range(1, len(PRODUCTS) + 1)
+        ])
+        insert_chunked(models.User, (
+            {"user_id": u, "email": f"user{u}@example.com", "password_hash": "x",
+             "name": f"User {u}", "created_at": now}
+            for u in range(1, scale.users + 1)
+        ))
+        insert_chunked(models.Fridge, (
+            {"fridge_id": f, "name": f"Fridge {f}", "location_desc": None, "created_at": now}
+            for f in range(1, scale.fridges + 1)
+        ))
+        insert_chunked(models.FridgeUser, members())
+        insert_chunked(models.FridgeItem, items())
+        insert_chunked(models.Notification, notifications())
+        for stmt in summary.rebuild_statements():
+            conn.execute(stmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--path", required=True, help="SQLite file to create")
+    parser.add_argument("--items", type=int, default=SAMPLE.items)
+    parser.add_argument("--notifications", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from bench.common import use_sqlite
+
+    use_sqlite(args.path)
+    from app.db import engine
+
+    scale = Scale.for_items(args.items, args.notifications)
+    generate(engine, scale, seed=args.seed)
+    print(scale._asdict())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench/http_load.py
+"""
+HTTP load test of the main app.main routes on a generated SQLite database:
+requests/sec, p50/p95/p99 latency and queries per request, per route.
+
+    python -m bench.http_load --items 100000 --requests 2000 --concurrency 16 --output http.json
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+
+def routes(scale):
+    """(name, request) per route; request(i) gives (method, path, json body)."""
+    fridge = lambda i: i % scale.fridges + 1
+    user = lambda i: (fridge(i) - 1) % scale.users + 1
+    item = lambda i: i % scale.items + 1
+
+    def new_item(i):
+        return {
+            "added_by": user(i),
+            "qr_code": "QR%03d" % (i % 15 + 1),
+            "factory_expires_at": (date.today() + timedelta(days=i % 20)).isoformat(),
+        }
+
+    return [
+        ("GET /ping", lambda i: ("GET", "/ping", None)),
+        ("GET /users/", lambda i: ("GET", "/users/", None)),
+        ("GET /fridges/", lambda i: ("GET", "/fridges/", None)),
+        ("GET /fridges/{id}/users/", lambda i: ("GET", f"/fridges/{fridge(i)}/users/", None)),
+        ("GET /fridges/{id}/members", lambda i: ("GET", f"/fridges/{fridge(i)}/members", None)),
+        ("GET /fridges/{id}/items/", lambda i: ("GET", f"/fridges/{fridge(i)}/items/", None)),
+        ("GET /users/{id}/notifications/", lambda i: ("GET", f"/users/{user(i)}/notifications/", None)),
+        ("GET /users/{id}/notifications/details", lambda i: (
+            "GET", f"/users/{user(i)}/notifications/details", None)),
+        ("GET /users/{id}/expiring", lambda i: ("GET", f"/users/{user(i)}/expiring", None)),
+        ("POST /fridges/{id}/items/", lambda i: ("POST", f"/fridges/{fridge(i)}/items/", new_item(i))),
+        ("POST /fridges/{id}/items/bulk", lambda i: (
+            "POST", f"/fridges/{fridge(i)}/items/bulk", [new_item(i + k) for k in range(20)])),
+        ("PUT /items/{id}", lambda i: (
+            "PUT", f"/items/{item(i)}", {"opened_at": date.today().isoformat(), "open_life_days": i % 7 + 1})),
+    ]
+
+
+async def load(app, counter, request, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    from bench.common import summarize
+
+    latencies, errors = [], 0
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            nonlocal errors
+            method, path, body = request(i)
+            async with gate:
+                started = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        counter.take()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed, counter.take())
+    result["errors"] = errors
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--no-cache", action="store_true", help="disable the item listing cache")
+    parser.add_argument("--only", action="append", help="run just these routes")
+    parser.add_argument("--output", help="JSON file (default: stdout)")
+    args = parser.parse_args()
+
+    from bench.common import QueryCounter, use_sqlite, write_results
+
+    use_sqlite(cache=not args.no_cache)
+    from bench.datagen import Scale, generate
+    from app.db import engine
+    from app.main import app
+
+    scale = Scale.for_items(args.items)
+    generate(engine, scale)
+    counter = QueryCounter(engine)
+
+    results = {}
+    for name, request in routes(scale):
+        if args.only and name not in args.only:
+            continue
+        results[name] = asyncio.run(load(app, counter, request, args.requests, args.concurrency))
+    params = {
+        "scale": scale._asdict(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "cache": not args.no_cache,
+    }
+    write_results("http", params, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
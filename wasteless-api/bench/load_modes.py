@@ -0,0 +1,104 @@
+# bench/load_modes.py
+"""
+Compare requests/sec and p99 latency of the sync (app.main) and async
+(app.main_async) stacks against the same seeded SQLite database.
+
+    python -m bench.load_modes --requests 2000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def seed(session_factory, fridges: int, items_per_fridge: int):
+    from app import models
+
+    db = session_factory()
+    today = date.today()
+    db.add(models.Product(product_id=1, name="Milk", default_shelf_life=7, default_open_life=3))
+    db.add(models.QRCode(qr_code="QR001", product_id=1))
+    db.add_all(
+        models.User(user_id=u, email=f"user{u}@example.com", password_hash="x", created_at=today)
+        for u in range(1, fridges + 1)
+    )
+    db.add_all(models.Fridge(fridge_id=f, name=f"Fridge {f}", created_at=today) for f in range(1, fridges + 1))
+    db.flush()
+    db.add_all(models.FridgeUser(fridge_id=f, user_id=f, role="owner") for f in range(1, fridges + 1))
+    rnd = random.Random(0)
+    for f in range(1, fridges + 1):
+        for _ in range(items_per_fridge):
+            expires = today + timedelta(days=rnd.randint(-10, 30))
+            db.add(models.FridgeItem(
+                fridge_id=f, added_by=f, qr_code="QR001", added_at=today,
+                factory_expires_at=expires, open_life_days=3, spoil_date=expires
+            ))
+    db.commit()
+    db.close()
+
+
+async def load(app, paths, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with gate:
+                started = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "requests_per_second": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--fridges", type=int, default=50)
+    parser.add_argument("--items-per-fridge", type=int, default=100)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="wasteless-bench-"), "bench.db")
+    os.environ["WASTELESS_DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["WASTELESS_DB_MODE"] = "async"     # builds both engines
+    os.environ["WASTELESS_NOTIFICATION_INTERVAL"] = "0"
+
+    from app.bootstrap import create_schema
+    from app.db import SessionLocal
+    from app.main import app as sync_app
+    from app.main_async import app as async_app
+
+    create_schema()
+    seed(SessionLocal, args.fridges, args.items_per_fridge)
+
+    paths = [f"/fridges/{f}/items/" for f in range(1, args.fridges + 1)]
+    paths += [f"/users/{u}/notifications/" for u in range(1, args.fridges + 1)]
+    results = {
+        mode: asyncio.run(load(app, paths, args.requests, args.concurrency))
+        for mode, app in (("sync", sync_app), ("async", async_app))
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
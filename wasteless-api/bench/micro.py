@@ -0,0 +1,148 @@
+# bench/micro.py
+"""
+Micro-benchmarks for the functions in app/crud.py on a generated SQLite
+database: ops/sec, p50/p95/p99 latency and queries per call.
+
+    python -m bench.micro --items 100000 --iterations 200 --output micro.json
+"""
+
+import argparse
+import itertools
+import time
+from datetime import date, timedelta
+
+
+def cases(scale):
+    """
+    (name, prepare, call) per crud function.
+
+    prepare(db, i) runs untimed and returns the arguments for call(db, *args),
+    which is the part measured. Write cases create what they need in
+    prepare so every iteration has fresh rows to work on.
+    """
+    from app import crud, models, schemas
+
+    fridge = lambda i: i % scale.fridges + 1
+    user = lambda i: (fridge(i) - 1) % scale.users + 1
+    item = lambda i: i % scale.items + 1
+    counter = itertools.count(1)
+
+    def new_user(db, i):
+        return crud.create_user(db, schemas.UserCreate(
+            email=f"bench{next(counter)}@example.com", password_hash="x"
+        ))
+
+    def new_fridge(db, i):
+        return crud.create_fridge(db, schemas.FridgeCreate(name="Bench fridge"))
+
+    def new_item(db, i):
+        return crud.create_fridge_item(db, fridge(i), new_item_in(i))
+
+    def new_item_in(i):
+        return schemas.FridgeItemCreate(
+            added_by=user(i), qr_code="QR%03d" % (i % 15 + 1),
+            factory_expires_at=date.today() + timedelta(days=i % 20)
+        )
+
+    def second_page_args(db, i):
+        page = crud.get_fridge_items(db, fridge(i), limit=100)
+        return fridge(i), (page[-1].spoil_date, page[-1].item_id) if page else None
+
+    def with_new_item(db, i):
+        new_item(db, i)
+        return ()
+
+    return [
+        ("get_user", lambda db, i: (user(i),), crud.get_user),
+        ("get_user_by_email", lambda db, i: (f"user{user(i)}@example.com",), crud.get_user_by_email),
+        ("get_users", lambda db, i: (), lambda db: crud.get_users(db, limit=100)),
+        ("create_user", lambda db, i: (schemas.UserCreate(
+            email=f"bench{next(counter)}@example.com", password_hash="x"),), crud.create_user),
+        ("update_user", lambda db, i: (new_user(db, i).user_id, schemas.UserBase(
+            email=f"bench{next(counter)}@example.com", name="Renamed")), crud.update_user),
+        ("delete_user", lambda db, i: (new_user(db, i).user_id,), crud.delete_user),
+        ("get_fridge", lambda db, i: (fridge(i),), crud.get_fridge),
+        ("get_fridges", lambda db, i: (), lambda db: crud.get_fridges(db, limit=100)),
+        ("create_fridge", lambda db, i: (schemas.FridgeCreate(name="Bench fridge"),), crud.create_fridge),
+        ("update_fridge", lambda db, i: (new_fridge(db, i).fridge_id, schemas.FridgeBase(
+            name="Renamed", location_desc="Bench")), crud.update_fridge),
+        ("delete_fridge", lambda db, i: (new_fridge(db, i).fridge_id,), crud.delete_fridge),
+        ("add_user_to_fridge", lambda db, i: (new_fridge(db, i).fridge_id, schemas.FridgeUserCreate(
+            user_id=user(i), role="viewer")), crud.add_user_to_fridge),
+        ("remove_user_from_fridge", lambda db, i: (
+            crud.add_user_to_fridge(db, new_fridge(db, i).fridge_id, schemas.FridgeUserCreate(
+                user_id=user(i), role="viewer")).fridge_id, user(i)), crud.remove_user_from_fridge),
+        ("list_fridge_users", lambda db, i: (fridge(i),), crud.list_fridge_users),
+        ("list_fridge_members", lambda db, i: (fridge(i),), crud.list_fridge_members),
+        ("get_fridge_changes", lambda db, i: (fridge(i), 0), crud.get_fridge_changes),
+        ("get_fridge_item", lambda db, i: (item(i),), crud.get_fridge_item),
+        ("get_fridge_items", lambda db, i: (fridge(i),), lambda db, f: crud.get_fridge_items(db, f, limit=100)),
+        ("get_fridge_items_keyset", second_page_args,
+            lambda db, f, after: crud.get_fridge_items(db, f, limit=100, after=after)),
+        ("create_fridge_item", lambda db, i: (fridge(i), new_item_in(i)), crud.create_fridge_item),
+        ("create_fridge_items_bulk", lambda db, i: (fridge(i), [new_item_in(i + k) for k in range(50)]),
+            crud.create_fridge_items_bulk),
+        ("update_fridge_item", lambda db, i: (new_item(db, i).item_id, schemas.FridgeItemUpdate(
+            opened_at=date.today(), open_life_days=i % 7 + 1)), crud.update_fridge_item),
+        ("delete_fridge_item", lambda db, i: (new_item(db, i).item_id,), crud.delete_fridge_item),
+        ("get_notifications_for_user", lambda db, i: (user(i),), crud.get_notifications_for_user),
+        ("get_notification_details_for_user", lambda db, i: (user(i),), crud.get_notification_details_for_user),
+        ("expiring_dashboard", lambda db, i: (user(i),), crud.expiring_dashboard),
+        ("create_notification", lambda db, i: (schemas.NotificationCreate(
+            item_id=item(i), user_id=user(i), type="about_to_spoil", sent=True),), crud.create_notification),
+        ("mark_notification_sent", lambda db, i: (crud.create_notification(db, schemas.NotificationCreate(
+            item_id=new_item(db, i).item_id, user_id=user(i), type="spoiled", sent=False)).note_id,),
+            crud.mark_notification_sent),
+        ("generate_notifications", with_new_item, crud.generate_notifications),
+    ]
+
+
+def run_case(session_factory, counter, prepare, call, iterations: int):
+    """Latencies and total queries of iterations calls, after one warm-up call."""
+    latencies, queries = [], 0
+    for i in range(-1, iterations):
+        db = session_factory()
+        try:
+            args = prepare(db, i)
+            db.expunge_all()        # measure the call, not the identity map
+            counter.take()
+            started = time.perf_counter()
+            call(db, *args)
+            elapsed = time.perf_counter() - started
+            if i >= 0:
+                latencies.append(elapsed)
+                queries += counter.take()
+        finally:
+            db.close()
+    return latencies, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--only", action="append", help="run just these cases")
+    parser.add_argument("--output", help="JSON file (default: stdout)")
+    args = parser.parse_args()
+
+    from bench.common import QueryCounter, summarize, use_sqlite, write_results
+
+    use_sqlite()
+    from bench.datagen import Scale, generate
+    from app.db import SessionLocal, engine
+
+    scale = Scale.for_items(args.items)
+    generate(engine, scale)
+    counter = QueryCounter(engine)
+
+    results = {}
+    for name, prepare, call in cases(scale):
+        if args.only and name not in args.only:
+            continue
+        latencies, queries = run_case(SessionLocal, counter, prepare, call, args.iterations)
+        results[name] = summarize(latencies, sum(latencies), queries)
+    write_results("micro", {"scale": scale._asdict(), "iterations": args.iterations}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
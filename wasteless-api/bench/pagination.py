@@ -0,0 +1,87 @@
+# bench/pagination.py
+"""
+Page latency at increasing depth for OFFSET paging vs keyset (cursor)
+paging of one fridge's items, on a seeded SQLite database.
+
+    python -m bench.pagination --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+
+def seed(session_factory, rows: int, chunk: int = 50_000):
+    from sqlalchemy import insert
+    from app import models
+
+    db = session_factory()
+    now = datetime.utcnow()
+    today = now.date()
+    db.add(models.Product(product_id=1, name="Milk", default_shelf_life=7, default_open_life=3))
+    db.add(models.QRCode(qr_code="QR001", product_id=1))
+    db.add(models.User(user_id=1, email="bench@example.com", password_hash="x", created_at=now))
+    db.add(models.Fridge(fridge_id=1, name="Bench fridge", created_at=now))
+    db.commit()
+    rnd = random.Random(0)
+    for start in range(0, rows, chunk):
+        batch = []
+        for _ in range(min(chunk, rows - start)):
+            expires = today + timedelta(days=rnd.randint(-365, 365))
+            batch.append({
+                "fridge_id": 1, "added_by": 1, "qr_code": "QR001", "added_at": now,
+                "factory_expires_at": expires, "open_life_days": 3, "spoil_date": expires,
+            })
+        db.execute(insert(models.FridgeItem), batch)
+        db.commit()
+    db.close()
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="wasteless-bench-"), "bench.db")
+    os.environ["WASTELESS_DATABASE_URL"] = f"sqlite:///{path}"
+
+    from app import crud
+    from app.db import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    seed(SessionLocal, args.rows)
+
+    db = SessionLocal()
+    results = []
+    for fraction in (0, 0.01, 0.1, 0.5, 0.9):
+        depth = int(args.rows * fraction)
+        # The cursor a client would hold after paging down to this depth
+        after = None
+        if depth:
+            last = crud.get_fridge_items(db, 1, skip=depth - 1, limit=1)[0]
+            after = (last.spoil_date, last.item_id)
+        offset_ms = timed(lambda: crud.get_fridge_items(db, 1, skip=depth, limit=args.limit), args.repeat)
+        keyset_ms = timed(lambda: crud.get_fridge_items(db, 1, limit=args.limit, after=after), args.repeat)
+        results.append({"depth": depth, "offset_ms": offset_ms, "keyset_ms": keyset_ms})
+        db.expunge_all()
+    db.close()
+    print(json.dumps({"rows": args.rows, "limit": args.limit, "pages": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
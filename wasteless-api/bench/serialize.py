@@ -0,0 +1,119 @@
+# bench/serialize.py
+"""
+CPU per 1,000 rows of the list routes' two serialization paths, on a
+seeded SQLite database: ORM instances validated through the orm_mode
+schemas, vs column tuples encoded directly (app/rows.py).
+
+    python -m bench.serialize --rows 5000 --repeat 20
+"""
+
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+
+
+def seed(session_factory, rows: int):
+    """rows users, rows items in fridge 1 and rows notifications for user 1."""
+    from sqlalchemy import insert
+    from app import models
+
+    db = session_factory()
+    now = datetime.utcnow()
+    today = now.date()
+    db.add(models.Product(product_id=1, name="Milk", default_shelf_life=7, default_open_life=3))
+    db.add(models.QRCode(qr_code="QR001", product_id=1))
+    db.execute(insert(models.User), [
+        {"user_id": i, "email": f"user{i}@example.com", "password_hash": "x",
+         "name": "Zoë %d" % i if i % 2 else None, "created_at": now - timedelta(seconds=i)}
+        for i in range(1, rows + 1)
+    ])
+    db.add(models.Fridge(fridge_id=1, name="Bench fridge", created_at=now))
+    db.flush()
+    db.execute(insert(models.FridgeItem), [
+        {"item_id": i, "fridge_id": 1, "added_by": 1, "qr_code": "QR001", "added_at": now,
+         "factory_expires_at": today + timedelta(days=i % 30),
+         "opened_at": today if i % 3 == 0 else None, "open_life_days": 3,
+         "spoil_date": today + timedelta(days=3 if i % 3 == 0 else i % 30)}
+        for i in range(1, rows + 1)
+    ])
+    db.execute(insert(models.Notification), [
+        {"item_id": i, "user_id": 1, "type": "spoiled" if i % 2 else "about_to_spoil",
+         "notified_at": now, "sent": i % 4 == 0}
+        for i in range(1, rows + 1)
+    ])
+    db.commit()
+    db.close()
+
+
+def orm_body(instances, schema) -> bytes:
+    """What a response_model list route does: from_orm, then FastAPI's JSONResponse encoding."""
+    from fastapi.encoders import jsonable_encoder
+
+    return json.dumps(
+        jsonable_encoder([schema.from_orm(obj) for obj in instances]),
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    """Best process CPU time of fn over repeat runs, in ms."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        best = min(best, time.process_time() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000, help="rows per listing (one page)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from bench.common import use_sqlite
+
+    use_sqlite()
+    from app import crud, rows, schemas
+    from app.bootstrap import create_schema
+    from app.db import SessionLocal
+
+    create_schema()
+    seed(SessionLocal, args.rows)
+    n = args.rows
+    listings = {
+        "users": (schemas.UserRead,
+                  lambda db: crud.get_users(db, limit=n), lambda db: crud.get_user_rows(db, limit=n)),
+        "fridge_items": (schemas.FridgeItemRead,
+                         lambda db: crud.get_fridge_items(db, 1, limit=n),
+                         lambda db: crud.get_fridge_item_rows(db, 1, limit=n)),
+        "notifications": (schemas.NotificationRead,
+                          lambda db: crud.get_notifications_for_user(db, 1, limit=n),
+                          lambda db: crud.get_notification_rows(db, 1, limit=n)),
+    }
+
+    results = {}
+    db = SessionLocal()
+    for name, (schema, load_orm, load_rows) in listings.items():
+        def orm():
+            body = orm_body(load_orm(db), schema)
+            db.expunge_all()    # a request starts with an empty identity map
+            return body
+
+        def fast():
+            return rows.dumps(load_rows(db), rows.fields(schema))
+
+        per_1000 = 1000 / n
+        results[name] = {
+            "orm_cpu_ms_per_1000": cpu_ms(orm, args.repeat) * per_1000,
+            "rows_cpu_ms_per_1000": cpu_ms(fast, args.repeat) * per_1000,
+            "same_body": orm() == fast(),
+        }
+        results[name]["speedup"] = results[name]["orm_cpu_ms_per_1000"] / results[name]["rows_cpu_ms_per_1000"]
+    db.close()
+    print(json.dumps({"rows": n, "orjson": rows.orjson is not None, "listings": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# tests/conftest.py
+#
+# Every test runs against a fresh SQLite file. The app is pointed at it
+# before anything imports app.*, with the notification scheduler only
+# running when triggered, the listing cache off (tests/test_cache.py swaps
+# a backend in) and strict SQL budgets on (a request over
+# WASTELESS_SQL_QUERY_BUDGET statements fails the test).
+#
+#   python -m pytest          # from wasteless-api/
+
+import os
+import tempfile
+
+os.environ["WASTELESS_DATABASE_URL"] = "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="wasteless-tests-"), "test.db"
+)
+os.environ["WASTELESS_DB_MODE"] = "sync"
+os.environ["WASTELESS_DATABASE_REPLICA_URLS"] = ""
+os.environ["WASTELESS_NOTIFICATION_INTERVAL"] = "0"
+os.environ["WASTELESS_CACHE_BACKEND"] = "none"
+os.environ["WASTELESS_SQL_STRICT"] = "1"
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models, summary
+from app.bootstrap import create_schema
+from app.db import Base, SessionLocal, engine
+
+# Spoil dates of the seeded items, in days from today: long spoiled,
+# spoiled, spoiling today and tomorrow (both notification thresholds),
+# and well outside the window
+SPOIL_OFFSETS = (-30, -1, 0, 1, 2, 10)
+
+
+@pytest.fixture
+def db():
+    create_schema()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def async_sessions(db):
+    """An async_sessionmaker on the same database, for app.async_crud."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.db import async_url_for, enforce_sqlite_foreign_keys
+
+    async_engine = create_async_engine(async_url_for(engine.url.render_as_string()))
+    enforce_sqlite_foreign_keys(async_engine.sync_engine)
+    yield async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture
+def client(db):
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def seeded(db):
+    """
+    Three fridges: 1 shared by users 1 and 2, 2 by users 2 and 3, 3 by
+    nobody; each holds an item per SPOIL_OFFSETS and one without a spoil
+    date. Some notifications exist already: un-sent, sent, and un-sent of
+    the other type. Returns today's date.
+    """
+    today = date.today()
+    now = datetime.utcnow()
+    db.add(models.Product(product_id=1, name="Milk", default_shelf_life=7, default_open_life=3))
+    db.add(models.QRCode(qr_code="QR001", product_id=1))
+    for user_id in (1, 2, 3, 4):
+        db.add(models.User(user_id=user_id, email="user%d@example.com" % user_id,
+                           password_hash="x", name="User %d" % user_id, created_at=now))
+    for fridge_id in (1, 2, 3):
+        db.add(models.Fridge(fridge_id=fridge_id, name="Fridge %d" % fridge_id, created_at=now))
+    db.flush()
+    for fridge_id, user_id in ((1, 1), (1, 2), (2, 2), (2, 3)):
+        db.add(models.FridgeUser(fridge_id=fridge_id, user_id=user_id, role="owner"))
+    item_id = 0
+    for fridge_id in (1, 2, 3):
+        for offset in SPOIL_OFFSETS + (None,):
+            item_id += 1
+            spoil_date = today + timedelta(days=offset) if offset is not None else None
+            db.add(models.FridgeItem(
+                item_id=item_id, fridge_id=fridge_id, added_by=1, qr_code="QR001", added_at=now,
+                factory_expires_at=spoil_date or today + timedelta(days=30),
+                open_life_days=3, spoil_date=spoil_date,
+            ))
+    db.flush()
+    for recount in summary.rebuild_statements():
+        db.execute(recount)
+    # Items 2 (spoiled yesterday) and 4 (spoils tomorrow) of fridge 1
+    for item_id, user_id, note_type, sent in (
+        (2, 1, "spoiled", False),
+        (2, 2, "spoiled", True),
+        (2, 2, "about_to_spoil", False),
+        (4, 1, "about_to_spoil", False),
+    ):
+        db.add(models.Notification(item_id=item_id, user_id=user_id, type=note_type,
+                                   notified_at=now, sent=sent))
+    db.commit()
+    return today
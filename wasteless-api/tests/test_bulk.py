@@ -0,0 +1,79 @@
+# tests/test_bulk.py
+
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from app import async_crud, crud, models, schemas
+
+
+def haul(today):
+    """Two good items, one from an unknown user and one with an unknown QR code."""
+    return [
+        schemas.FridgeItemCreate(added_by=1, qr_code="QR001", factory_expires_at=today + timedelta(days=5)),
+        schemas.FridgeItemCreate(added_by=99, qr_code="QR001", factory_expires_at=today),
+        schemas.FridgeItemCreate(added_by=2, qr_code="NOPE", factory_expires_at=today),
+        schemas.FridgeItemCreate(added_by=2, qr_code="QR001", factory_expires_at=today + timedelta(days=9),
+                                 opened_at=today, open_life_days=2),
+    ]
+
+
+def outcome(db, fridge_id, created, errors):
+    ids = [item.item_id for item in created]
+    return {
+        "items": [(item.added_by, item.spoil_date, item.open_life_days) for item in created],
+        "errors": errors,
+        "queued": sorted(db.scalars(
+            select(models.PendingItemScan.item_id).where(models.PendingItemScan.item_id.in_(ids))
+        )) == sorted(ids),
+        "counts": db.execute(
+            select(models.FridgeSpoilCount.spoil_date, models.FridgeSpoilCount.item_count)
+            .where(models.FridgeSpoilCount.fridge_id == fridge_id)
+            .order_by(models.FridgeSpoilCount.spoil_date)
+        ).all(),
+    }
+
+
+def test_bulk_create(db, seeded):
+    created, errors = crud.create_fridge_items_bulk(db, 3, haul(seeded))
+
+    result = outcome(db, 3, created, errors)
+    assert result["items"] == [
+        (1, seeded + timedelta(days=5), 3),     # open life from the product
+        (2, seeded + timedelta(days=2), 2),
+    ]
+    assert result["errors"] == [(1, "User not found"), (2, "QR code not found")]
+    assert result["queued"]
+    assert (seeded + timedelta(days=2), 2) in result["counts"]
+
+
+def test_async_bulk_create_matches_sync(db, seeded, async_sessions):
+    async def create():
+        async with async_sessions() as session:
+            return await async_crud.create_fridge_items_bulk(session, 2, haul(seeded))
+
+    created, errors = asyncio.run(create())
+    expected = outcome(db, 1, *crud.create_fridge_items_bulk(db, 1, haul(seeded)))
+
+    result = outcome(db, 2, created, errors)
+    assert result["items"] == expected["items"]
+    assert result["errors"] == expected["errors"]
+    assert result["queued"]
+    assert result["counts"] == expected["counts"]
+
+
+def test_bulk_route(client, seeded):
+    response = client.post("/fridges/3/items/bulk", json=[
+        {"added_by": 1, "qr_code": "QR001", "factory_expires_at": str(seeded)},
+        {"added_by": 1, "qr_code": "NOPE", "factory_expires_at": str(seeded)},
+    ])
+
+    assert response.status_code == 201
+    assert len(response.json()["created"]) == 1
+    assert response.json()["errors"] == [{"index": 1, "detail": "QR code not found"}]
+    assert client.post("/fridges/99/items/bulk", json=[]).status_code == 404
+    # With valid rows it is the version bump that finds the fridge missing
+    assert client.post("/fridges/99/items/bulk", json=[
+        {"added_by": 1, "qr_code": "QR001", "factory_expires_at": str(seeded)},
+    ]).status_code == 404
@@ -0,0 +1,94 @@
+# tests/test_cache.py
+
+import re
+from datetime import timedelta
+
+import pytest
+
+from app import cache
+from app.cache import LocalRedis, MemoryBackend
+
+
+@pytest.fixture(params=["memory", "redis-local"])
+def cached(request, monkeypatch):
+    monkeypatch.setattr(cache, "backend", cache.make_backend(request.param))
+
+
+def statements(response) -> int:
+    """Statement count from the Server-Timing header (0: served from the cache)."""
+    return int(re.search(r'desc="(\d+) queries"', response.headers["server-timing"]).group(1))
+
+
+def item_ids(response):
+    return [item["item_id"] for item in response.json()]
+
+
+def test_page_served_from_cache(client, seeded, cached):
+    first = client.get("/fridges/1/items/")
+    second = client.get("/fridges/1/items/")
+
+    assert statements(first) == 1
+    assert statements(second) == 0
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_unchanged_poll_gets_304(client, seeded, cached):
+    etag = client.get("/fridges/1/items/").headers["etag"]
+    response = client.get("/fridges/1/items/", headers={"If-None-Match": "W/" + etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert statements(response) == 0
+
+
+def test_item_writes_invalidate_the_fridge(client, seeded, cached):
+    etag = client.get("/fridges/1/items/").headers["etag"]
+    other = client.get("/fridges/2/items/")
+
+    created = client.post("/fridges/1/items/", json={
+        "added_by": 1, "qr_code": "QR001", "factory_expires_at": str(seeded + timedelta(days=4)),
+    }).json()
+    response = client.get("/fridges/1/items/", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and statements(response) == 1
+    assert created["item_id"] in item_ids(response)
+    # Other fridges keep their pages
+    assert statements(client.get("/fridges/2/items/")) == 0 and other.status_code == 200
+
+    client.put("/items/%d" % created["item_id"], json={"open_life_days": 1, "opened_at": str(seeded)})
+    response = client.get("/fridges/1/items/")
+    assert statements(response) == 1
+    assert [item["spoil_date"] for item in response.json() if item["item_id"] == created["item_id"]] == [
+        str(seeded + timedelta(days=1))
+    ]
+
+    assert client.delete("/items/%d" % created["item_id"]).status_code == 204
+    response = client.get("/fridges/1/items/")
+    assert statements(response) == 1
+    assert created["item_id"] not in item_ids(response)
+
+
+def test_local_redis_expiry_and_nx():
+    now = [0.0]
+    server = LocalRedis(maxsize=2, clock=lambda: now[0])
+    server.set("page", b"body", ex=60)
+    assert server.set("version", "v1", nx=True) is True
+    assert server.set("version", "v2", nx=True) is None
+    assert server.get("version") == b"v1"
+
+    now[0] = 61
+    assert server.get("page") is None
+    server.set("a", b"1")
+    server.set("b", b"2")
+    assert server.get("version") is None    # least recently used, evicted
+
+
+def test_memory_versions_are_bounded():
+    backend = MemoryBackend(maxsize=2, ttl=60)
+    first = backend.version("fridge-items:1")
+    backend.version("fridge-items:2")
+    backend.version("fridge-items:3")
+
+    assert len(backend._versions._entries) == 2
+    # An evicted version comes back as a fresh token, never the old one
+    assert backend.version("fridge-items:1") != first
@@ -0,0 +1,39 @@
+# tests/test_db.py
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import TimedAsyncQueuePool, async_url_for, engine, pool_stats, statement_timeout_sql
+
+
+def test_async_pool_times_checkouts(db):
+    async_engine = create_async_engine(
+        async_url_for(engine.url.render_as_string()), poolclass=TimedAsyncQueuePool, pool_size=2
+    )
+
+    async def query():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def run():
+        await asyncio.gather(query(), query(), query())
+        stats = pool_stats(async_engine.sync_engine)
+        await async_engine.dispose()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["pool"] == "TimedAsyncQueuePool"
+    assert stats["checkouts"] == 3
+    assert stats["max_wait_seconds"] >= 0
+
+
+@pytest.mark.parametrize("url, sql", [
+    ("mysql://", "SET SESSION max_execution_time = 1500"),
+    ("mariadb://", "SET SESSION max_statement_time = 1.500"),
+])
+def test_statement_timeout_per_server(url, sql):
+    assert statement_timeout_sql(make_url(url).get_dialect()(), 1500) == sql
@@ -0,0 +1,94 @@
+# tests/test_delivery.py
+
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app import crud, metrics, models
+
+
+def statements(response) -> int:
+    return int(re.search(r'desc="(\d+) queries"', response.headers["server-timing"]).group(1))
+
+
+def unsent(db, **where):
+    note = models.Notification
+    return db.scalars(
+        select(note.note_id).filter_by(sent=False, **where).order_by(note.note_id)
+    ).all()
+
+
+def sent_total() -> float:
+    return metrics.NOTIFICATIONS_SENT._totals().get((), 0)
+
+
+def test_claims_get_disjoint_batches(client, db, seeded):
+    crud.generate_notifications(db)
+    first = client.post("/notifications/claim", params={"limit": 4}).json()
+    second = client.post("/notifications/claim", params={"limit": 100}).json()
+
+    first_ids = [note["note_id"] for note in first["notifications"]]
+    second_ids = [note["note_id"] for note in second["notifications"]]
+    assert len(first_ids) == 4
+    assert not set(first_ids) & set(second_ids)
+    assert sorted(first_ids + second_ids) == unsent(db)
+    assert first["claim_token"] != second["claim_token"]
+    assert first["notifications"][0]["item"]["qr"]["product"]["name"] == "Milk"
+    # Everything is leased now
+    assert client.post("/notifications/claim").json()["notifications"] == []
+
+
+def test_expired_lease_can_be_claimed_again(client, db, seeded):
+    first = client.post("/notifications/claim", params={"limit": 2}).json()
+    note = models.Notification
+    db.execute(update(note).where(note.claim_token == first["claim_token"])
+               .values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+    again = client.post("/notifications/claim", params={"limit": 2}).json()
+
+    assert [n["note_id"] for n in again["notifications"]] == [n["note_id"] for n in first["notifications"]]
+    # The old claim no longer holds them
+    late = client.post("/notifications/ack", json={
+        "note_ids": [n["note_id"] for n in first["notifications"]], "claim_token": first["claim_token"],
+    })
+    assert late.json() == {"acknowledged": 0}
+
+
+def test_ack_needs_the_claim_token(client, db, seeded):
+    claim = client.post("/notifications/claim", params={"limit": 2}).json()
+    note_ids = [n["note_id"] for n in claim["notifications"]]
+
+    wrong = client.post("/notifications/ack", json={"note_ids": note_ids, "claim_token": "not-the-token"})
+    assert wrong.json() == {"acknowledged": 0}
+    assert set(note_ids) <= set(unsent(db))
+
+    right = client.post("/notifications/ack", json={"note_ids": note_ids, "claim_token": claim["claim_token"]})
+    assert right.json() == {"acknowledged": 2}
+    assert not set(note_ids) & set(unsent(db))
+
+
+def test_ack_by_user_in_one_update(client, db, seeded):
+    crud.generate_notifications(db)
+    expected = len(unsent(db, user_id=2))
+    before = sent_total()
+
+    response = client.post("/notifications/ack", json={"user_id": 2})
+
+    assert expected > 2
+    assert response.json() == {"acknowledged": expected}
+    assert statements(response) == 1
+    assert unsent(db, user_id=2) == []
+    assert sent_total() - before == expected
+
+
+def test_send_counts_once(client, db, seeded):
+    before = sent_total()
+
+    assert client.post("/notifications/1/send").status_code == 204
+    assert client.post("/notifications/1/send").status_code == 204
+    # Seeded as sent already
+    assert client.post("/notifications/2/send").status_code == 204
+    assert client.post("/notifications/999/send").status_code == 404
+    assert sent_total() - before == 1
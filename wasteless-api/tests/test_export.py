@@ -0,0 +1,62 @@
+# tests/test_export.py
+
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+from app import crud, export
+from app.db import SessionLocal
+
+
+def test_fridge_items_as_ndjson(client, db, seeded):
+    response = client.get("/fridges/1/items/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="fridge-1-items.ndjson"' in response.headers["content-disposition"]
+    items = [json.loads(line) for line in response.text.splitlines()]
+    # Same rows, order and encoding as the listing
+    assert items == client.get("/fridges/1/items/").json()
+    assert any(item["spoil_date"] is None for item in items)
+
+
+def test_notifications_as_csv(client, db, seeded):
+    response = client.get("/users/2/notifications/export", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    header, *lines = list(csv.reader(io.StringIO(response.text)))
+    notes = [dict(zip(header, line)) for line in lines]
+    expected = crud.get_notifications_for_user(db, 2)
+    assert [int(note["note_id"]) for note in notes] == [n.note_id for n in expected]
+    assert [note["sent"] for note in notes] == [str(n.sent) for n in expected]
+    assert all(note["notified_at"] == n.notified_at.isoformat() for note, n in zip(notes, expected))
+
+
+@pytest.mark.parametrize("path", ["/fridges/99/items/export", "/users/99/notifications/export"])
+def test_unknown_owner_is_404(client, seeded, path):
+    assert client.get(path).status_code == 404
+    assert client.get(path, params={"format": "csv"}).status_code == 404
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_one_chunk_per_batch(db, seeded, fmt):
+    chunks = list(export.stream(SessionLocal, export.fridge_items(1), fmt, batch_size=3))
+    header = chunks.pop(0) if fmt == "csv" else ""
+
+    # Fridge 1 holds 7 items: batches of 3, 3 and 1
+    assert [chunk.count("\n") for chunk in chunks] == [3, 3, 1]
+    whole = list(export.stream(SessionLocal, export.fridge_items(1), fmt, batch_size=100))
+    assert header + "".join(chunks) == "".join(whole)
+
+
+def test_async_stream_matches_sync(db, seeded, async_sessions):
+    async def collect():
+        return [chunk async for chunk in export.astream(async_sessions, export.notifications(2), "csv", 1)]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 1 + 2     # header, then user 2's two notifications one by one
+    assert "".join(chunks) == "".join(export.stream(SessionLocal, export.notifications(2), "csv"))
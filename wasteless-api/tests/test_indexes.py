@@ -0,0 +1,77 @@
+# tests/test_indexes.py
+#
+# EXPLAIN QUERY PLAN of the statements behind the hot paths: each must
+# reach its rows through an index, never by scanning the big tables.
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import crud
+from app.db import engine
+
+BIG_TABLES = ("fridge_items", "notifications", "fridge_users", "fridge_tombstones")
+
+
+def query_plans(db, call):
+    """Run call(); return (statement, plan steps) for every SELECT it ran."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    conn = db.connection()
+    return [
+        (statement, [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)])
+        for statement, parameters in captured
+    ]
+
+
+def full_scans(plans):
+    """Plan steps that read a big table without an index."""
+    return [
+        (statement, step) for statement, steps in plans for step in steps
+        if step.split()[:2] in (["SCAN", table] for table in BIG_TABLES) and "INDEX" not in step
+    ]
+
+
+HOT_PATHS = [
+    ("fridge item page", lambda db, today: crud.get_fridge_item_rows(db, 1, limit=3),
+     ["fridge_items USING INDEX ix_fridge_items_fridge_spoil (fridge_id=?)"]),
+    ("fridge item next page", lambda db, today: crud.get_fridge_item_rows(db, 1, limit=3, after=(today, 3)),
+     ["fridge_items USING INDEX ix_fridge_items_fridge_spoil (fridge_id=? AND spoil_date>?)"]),
+    ("user notifications", lambda db, today: crud.get_notification_rows(db, 1, after=1),
+     ["notifications USING INDEX ix_notifications_user (user_id=? AND note_id>?)"]),
+    # The incremental scan; a full one (first run, ?full_scan=true) reads
+    # every due item and may well scan
+    ("notification scan", lambda db, today: crud.generate_missing_notifications(
+        db, today, today - timedelta(days=1), [(9, 0)]),
+     ["fridge_items USING INDEX ix_fridge_items_spoil_date (spoil_date>? AND spoil_date<?)",
+      # the dedupe key (uq_notifications_pending) serves the anti-join
+      "notifications USING INDEX sqlite_autoindex_notifications_1 (item_id=? AND user_id=? AND type=?)"]),
+    ("delivery claim", lambda db, today: crud.claim_notifications(db, limit=2),
+     ["notifications USING INDEX ix_notifications_sent (sent=?)"]),
+    ("expiring dashboard", lambda db, today: crud.expiring_dashboard(db, 2),
+     ["fridge_users USING INDEX ix_fridge_users_user (user_id=?)",
+      "fridge_items USING INDEX ix_fridge_items_fridge_spoil (fridge_id=? AND spoil_date>? AND spoil_date<?)"]),
+    ("fridge changes", lambda db, today: crud.get_fridge_changes(db, 1, since=0),
+     ["fridge_items USING INDEX ix_fridge_items_fridge_version (fridge_id=? AND version>?)",
+      "fridge_tombstones USING INDEX ix_fridge_tombstones_fridge_version (fridge_id=? AND version>?)"]),
+]
+
+
+@pytest.mark.parametrize("name, call, indexes", HOT_PATHS, ids=[case[0] for case in HOT_PATHS])
+def test_hot_path_uses_indexes(db, seeded, name, call, indexes):
+    plans = query_plans(db, lambda: call(db, seeded))
+    steps = [step for _, steps in plans for step in steps]
+
+    for index in indexes:
+        assert any(step.endswith(index) for step in steps), (index, steps)
+    assert full_scans(plans) == []
@@ -0,0 +1,21 @@
+# tests/test_items.py
+
+from sqlalchemy import delete, select
+
+from app import crud, models, schemas
+
+
+def test_update_of_an_item_deleted_meanwhile(client, db, seeded, monkeypatch):
+    item_version = crud.item_version
+
+    def deleted_after_bump(session, item_id):
+        found = item_version(session, item_id)
+        session.execute(delete(models.FridgeItem).where(models.FridgeItem.item_id == item_id))
+        return found
+
+    monkeypatch.setattr(crud, "item_version", deleted_after_bump)
+
+    assert crud.update_fridge_item(db, 4, schemas.FridgeItemUpdate(open_life_days=1)) is None
+    assert client.put("/items/5", json={"open_life_days": 1}).status_code == 404
+    # Both writes were rolled back
+    assert db.scalars(select(models.FridgeItem.item_id).where(models.FridgeItem.item_id.in_([4, 5]))).all() == [4, 5]
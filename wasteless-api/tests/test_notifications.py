@@ -0,0 +1,101 @@
+# tests/test_notifications.py
+
+from datetime import timedelta
+
+from sqlalchemy import delete, select
+
+from app import crud, models, schemas
+from app.schemas import NotificationCreate
+
+
+def reference_generate_notifications(db, today):
+    """The original per-row generator: one existence query and one commit per (item, user)."""
+    upcoming = today + timedelta(days=1)
+    rows = (
+      db.query(models.FridgeItem, models.FridgeUser)
+        .join(models.FridgeUser, models.FridgeItem.fridge_id == models.FridgeUser.fridge_id)
+        .filter(models.FridgeItem.spoil_date <= upcoming)
+        .all()
+    )
+    created = []
+    for item, share in rows:
+        typ = 'spoiled' if item.spoil_date <= today else 'about_to_spoil'
+        exists = db.query(models.Notification).filter_by(
+            item_id=item.item_id,
+            user_id=share.user_id,
+            type=typ,
+            sent=False
+        ).first()
+        if exists:
+            continue
+        created.append(crud.create_notification(
+            db, NotificationCreate(item_id=item.item_id, user_id=share.user_id, type=typ)
+        ))
+    return created
+
+
+def triples(notes):
+    return sorted((n.item_id, n.user_id, n.type) for n in notes)
+
+
+def all_notifications(db):
+    return sorted(db.execute(
+        select(models.Notification.item_id, models.Notification.user_id,
+               models.Notification.type, models.Notification.sent)
+    ).all())
+
+
+def test_generate_matches_reference(db, seeded):
+    expected = reference_generate_notifications(db, seeded)
+    expected_table = all_notifications(db)
+    # Back to the seeded notifications
+    db.execute(delete(models.Notification).where(
+        models.Notification.note_id.in_([n.note_id for n in expected])
+    ))
+    db.commit()
+
+    created = crud.generate_notifications(db)
+
+    assert expected
+    assert triples(created) == triples(expected)
+    assert all_notifications(db) == expected_table
+    assert all(n.note_id is not None and n.sent is False for n in created)
+
+
+def test_second_run_creates_nothing(db, seeded):
+    assert crud.generate_notifications(db)
+    assert crud.generate_notifications(db) == []
+    assert crud.generate_notifications(db, full_scan=True) == []
+    assert reference_generate_notifications(db, seeded) == []
+
+
+def test_new_member_notified_about_due_items(db, seeded):
+    crud.generate_notifications(db)
+    crud.add_user_to_fridge(db, 1, schemas.FridgeUserCreate(user_id=4, role="viewer"))
+
+    created = crud.generate_notifications(db)
+
+    # Fridge 1's items 1-3 have spoiled, item 4 spoils tomorrow
+    assert triples(created) == [
+        (1, 4, "spoiled"), (2, 4, "spoiled"), (3, 4, "spoiled"), (4, 4, "about_to_spoil"),
+    ]
+    assert crud.generate_notifications(db, full_scan=True) == []
+
+
+def test_item_redated_during_a_run_stays_queued(db, seeded):
+    crud.generate_notifications(db)
+    item = crud.create_fridge_item(db, 1, schemas.FridgeItemCreate(
+        added_by=1, qr_code="QR001", factory_expires_at=seeded + timedelta(days=10), open_life_days=3
+    ))
+    today, since, pending = crud.start_notification_scan(db)
+    crud.generate_missing_notifications(db, today, since, pending)
+    # Found opened while the run is going: spoiled two days ago, before
+    # the watermark, so only the queue brings it to the next run
+    crud.update_fridge_item(db, item.item_id, schemas.FridgeItemUpdate(
+        opened_at=seeded - timedelta(days=5), open_life_days=3
+    ))
+    crud.finish_notification_scan(db, today, pending)
+
+    assert triples(crud.generate_notifications(db)) == [
+        (item.item_id, 1, "spoiled"), (item.item_id, 2, "spoiled"),
+    ]
@@ -0,0 +1,37 @@
+# tests/test_routing.py
+
+import shutil
+import time
+from datetime import timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import cache, main, routing
+from app.db import engine
+
+
+def test_replica_reads_do_not_fill_the_page_cache(client, seeded, monkeypatch, tmp_path):
+    # A replica that has not seen the write below yet
+    replica_path = str(tmp_path / "replica.db")
+    shutil.copyfile(engine.url.database, replica_path)
+    replica = create_engine("sqlite:///" + replica_path)
+    monkeypatch.setattr(main, "ReplicaSessionLocals", [sessionmaker(bind=replica)])
+    monkeypatch.setattr(cache, "backend", cache.make_backend("memory"))
+    sticky = {"cookie": "%s=%d" % (routing.STICKY_COOKIE, time.time() + 60)}
+
+    created = client.post("/fridges/1/items/", json={
+        "added_by": 1, "qr_code": "QR001", "factory_expires_at": str(seeded + timedelta(days=5)),
+        "open_life_days": 3,
+    }).json()
+    key = cache.item_page_key(1, 0, 100, None)
+
+    lagging = client.get("/fridges/1/items/").json()
+    assert created["item_id"] not in [item["item_id"] for item in lagging]
+    assert cache.get_page(key) is None
+
+    current = client.get("/fridges/1/items/", headers=sticky).json()
+    assert created["item_id"] in [item["item_id"] for item in current]
+    # Later replica reads are served the primary's page
+    assert client.get("/fridges/1/items/").json() == current
+    replica.dispose()
@@ -0,0 +1,52 @@
+# tests/test_rows.py
+
+from datetime import datetime
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+
+from app import models, rows, schemas
+
+LISTINGS = [
+    (models.User, schemas.UserRead, models.User.user_id),
+    (models.FridgeItem, schemas.FridgeItemRead, models.FridgeItem.item_id),
+    (models.Notification, schemas.NotificationRead, models.Notification.note_id),
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(rows, "orjson", None)
+
+
+def response_model_body(instances, schema) -> bytes:
+    """What FastAPI sends for a List[schema] response_model."""
+    return JSONResponse(jsonable_encoder([schema.from_orm(obj) for obj in instances])).body
+
+
+@pytest.mark.parametrize("model, schema, key", LISTINGS)
+def test_tuples_encode_like_the_response_model(db, seeded, encoder, model, schema, key):
+    # Non-ASCII text, whole-second and fractional timestamps, null dates
+    db.add(models.User(user_id=5, email="zoë@example.com", password_hash="x", name="Zoë Ångström",
+                       created_at=datetime(2026, 1, 2, 3, 4, 5)))
+    db.commit()
+
+    instances = db.scalars(select(model).order_by(key)).all()
+    tuples = db.execute(select(*rows.columns(model, schema)).order_by(key)).all()
+
+    assert rows.dumps(tuples, rows.fields(schema)) == response_model_body(instances, schema)
+
+
+def test_items_cover_null_and_date_fields(db, seeded):
+    items = db.execute(select(*rows.columns(models.FridgeItem, schemas.FridgeItemRead))).all()
+    names = rows.fields(schemas.FridgeItemRead)
+    values = [dict(zip(names, item)) for item in items]
+
+    assert any(value["spoil_date"] is None for value in values)
+    assert any(value["opened_at"] is None for value in values)
+    assert all(value["factory_expires_at"] is not None for value in values)
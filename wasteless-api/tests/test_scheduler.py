@@ -0,0 +1,70 @@
+# tests/test_scheduler.py
+
+from contextlib import contextmanager
+
+from sqlalchemy import event, func, insert, select
+
+from app import crud, models
+from app.db import SessionLocal, engine
+from app.scheduler import NotificationScheduler
+
+
+def count_notifications(db):
+    return db.scalar(select(func.count()).select_from(models.Notification))
+
+
+def test_sharded_run_matches_single_run(db, seeded):
+    scheduler = NotificationScheduler(SessionLocal, interval=0, workers=2, shards=3)
+    scheduler.start()
+    try:
+        created = scheduler.run_once()
+    finally:
+        scheduler.stop()
+
+    assert created == count_notifications(db) - 4
+    assert crud.generate_notifications(db, full_scan=True) == []
+    assert scheduler.status()["runs"] == 1
+
+
+def test_run_skipped_while_another_process_runs(db, seeded, monkeypatch):
+    @contextmanager
+    def held_elsewhere(db):
+        yield False
+
+    monkeypatch.setattr(crud, "notification_run_lock", held_elsewhere)
+    scheduler = NotificationScheduler(SessionLocal, interval=0, workers=1, shards=1)
+    scheduler.start()
+    try:
+        assert scheduler.run_once() == 0
+    finally:
+        scheduler.stop()
+
+    assert scheduler.status()["skipped"] == 1
+    assert scheduler.status()["runs"] == 0
+    assert count_notifications(db) == 4
+
+
+def test_overlapping_run_insert_is_not_fatal(db, seeded):
+    today, since, pending = crud.start_notification_scan(db)
+
+    raced = []
+
+    def other_run_first(conn, cursor, statement, *args):
+        # Another worker inserts one of the missing rows after this run's
+        # anti-join, just before its INSERT
+        if statement.startswith("INSERT OR IGNORE INTO notifications") and not raced:
+            raced.append(statement)
+            with engine.begin() as other:
+                other.execute(insert(models.Notification).values(
+                    item_id=3, user_id=1, type="spoiled", notified_at=func.now(), sent=False
+                ))
+
+    event.listen(engine, "before_cursor_execute", other_run_first)
+    try:
+        created = crud.generate_missing_notifications(db, today, since, pending)
+    finally:
+        event.remove(engine, "before_cursor_execute", other_run_first)
+
+    assert raced
+    assert (3, 1, "spoiled") not in {(n.item_id, n.user_id, n.type) for n in created}
+    assert crud.generate_notifications(db, full_scan=True) == []
@@ -0,0 +1,106 @@
+# tests/test_spoil.py
+
+from datetime import date, timedelta
+
+from sqlalchemy import Date, Integer, func, literal, select, update
+
+from app import crud, models, schemas, spoil
+
+TODAY = date(2026, 3, 1)
+
+# (factory_expires_at, opened_at, open_life_days, spoil date by the rule)
+CASES = [
+    (TODAY + timedelta(days=20), None, 3, TODAY + timedelta(days=20)),                  # unopened
+    (TODAY + timedelta(days=20), TODAY, 3, TODAY + timedelta(days=3)),                  # opened
+    (TODAY + timedelta(days=20), TODAY, 0, TODAY),                                      # opened, no open life
+    (TODAY + timedelta(days=1), TODAY, 5, TODAY + timedelta(days=5)),                   # factory date earlier
+    (TODAY - timedelta(days=2), TODAY - timedelta(days=30), 40, TODAY + timedelta(days=10)),
+]
+
+
+def sql_spoil_date(db, factory, opened, life):
+    return db.scalar(select(spoil.spoil_date_sql(
+        literal(factory, Date), literal(opened, Date), literal(life, Integer)
+    )))
+
+
+def test_python_sql_and_arrays_agree(db, monkeypatch):
+    factory, opened, life, expected = (list(column) for column in zip(*CASES))
+
+    assert [spoil.spoil_date(*case[:3]) for case in CASES] == expected
+    assert [sql_spoil_date(db, *case[:3]) for case in CASES] == expected
+    assert spoil.np is not None
+    assert spoil.spoil_dates(factory, opened, life) == expected
+    monkeypatch.setattr(spoil, "np", None)
+    assert spoil.spoil_dates(factory, opened, life) == expected
+
+
+def stored_spoil_dates(db):
+    item = models.FridgeItem
+    return dict(db.execute(select(item.item_id, item.spoil_date)).all())
+
+
+def spoil_counts(db):
+    count = models.FridgeSpoilCount
+    return sorted(db.execute(
+        select(count.fridge_id, count.spoil_date, count.item_count).where(count.item_count > 0)
+    ).all())
+
+
+def recounted(db):
+    item = models.FridgeItem
+    return sorted(db.execute(
+        select(item.fridge_id, item.spoil_date, func.count())
+        .where(item.spoil_date.isnot(None))
+        .group_by(item.fridge_id, item.spoil_date)
+    ).all())
+
+
+def test_item_open_life_and_product_default(db, seeded):
+    # Without open_life_days the product's default_open_life (3) applies
+    defaulted = crud.create_fridge_item(db, 1, schemas.FridgeItemCreate(
+        added_by=1, qr_code="QR001", factory_expires_at=seeded + timedelta(days=20), opened_at=seeded
+    ))
+    own = crud.create_fridge_item(db, 1, schemas.FridgeItemCreate(
+        added_by=1, qr_code="QR001", factory_expires_at=seeded + timedelta(days=20), opened_at=seeded,
+        open_life_days=6,
+    ))
+
+    assert defaulted.spoil_date == seeded + timedelta(days=3)
+    assert own.spoil_date == seeded + timedelta(days=6)
+    assert sql_spoil_date(db, seeded + timedelta(days=20), seeded, 3) == defaulted.spoil_date
+
+
+def test_recompute_fixes_stale_dates_and_counts(client, db, seeded):
+    item = models.FridgeItem
+    # Items 1 and 8 found opened behind the API's back; item 7's date is missing
+    db.execute(update(item).where(item.item_id.in_([1, 8])).values(opened_at=seeded))
+    db.commit()
+
+    response = client.post("/items/recompute-spoil-dates")
+
+    assert response.json() == {"updated": 5}     # 1, 8, and the undated 7, 14, 21
+    dates = stored_spoil_dates(db)
+    assert dates[1] == dates[8] == seeded + timedelta(days=3)
+    assert dates[7] == seeded + timedelta(days=30)
+    assert spoil_counts(db) == recounted(db)
+    assert client.post("/items/recompute-spoil-dates").json() == {"updated": 0}
+
+
+def test_product_open_life_follows_to_default_items(client, db, seeded):
+    item = models.FridgeItem
+    db.execute(update(item).where(item.item_id.in_([2, 3])).values(opened_at=seeded))
+    db.execute(update(item).where(item.item_id == 3).values(open_life_days=9))   # set by hand
+    db.commit()
+    client.post("/items/recompute-spoil-dates")
+
+    response = client.put("/products/1/open-life", json={"default_open_life": 5})
+
+    # Every item with the old default of 3 takes the new one; only the
+    # opened item 2 gets a new date as well
+    assert response.json()["updated"] == 20
+    dates = stored_spoil_dates(db)
+    assert dates[2] == seeded + timedelta(days=5)
+    assert dates[3] == seeded + timedelta(days=9)
+    assert spoil_counts(db) == recounted(db)
+    assert client.put("/products/99/open-life", json={"default_open_life": 5}).status_code == 404
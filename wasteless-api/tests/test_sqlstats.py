@@ -0,0 +1,111 @@
+# tests/test_sqlstats.py
+
+import copy
+import re
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+from app import crud, models, schemas, sqlstats
+from app.db import SessionLocal
+from app.sqlstats import QueryBudgetExceeded, SQLStatsMiddleware, query_budget
+
+
+def statements(response) -> int:
+    """Statement count from the Server-Timing header."""
+    return int(re.search(r'desc="(\d+) queries"', response.headers["server-timing"]).group(1))
+
+
+def test_generation_runs_in_constant_statements(db, seeded):
+    with query_budget(6):
+        assert crud.generate_notifications(db)
+    crud.add_user_to_fridge(db, 3, schemas.FridgeUserCreate(user_id=4, role="owner"))
+    with query_budget(6):
+        assert crud.generate_notifications(db)
+
+
+def test_per_row_loop_exceeds_budget(db, seeded):
+    with pytest.raises(QueryBudgetExceeded, match="exceed the budget of 6"):
+        with query_budget(6):
+            for item in db.scalars(select(models.FridgeItem)).all():
+                crud.get_notifications_for_user(db, item.added_by)
+
+
+def test_strict_middleware_fails_requests_over_budget(db, seeded):
+    app = FastAPI()
+    app.add_middleware(SQLStatsMiddleware, budget=3, strict=True)
+
+    @app.get("/users/{count}")
+    def users(count: int):
+        db = SessionLocal()
+        try:
+            return [crud.get_user_by_email(db, "user%d@example.com" % n).user_id for n in range(1, count + 1)]
+        finally:
+            db.close()
+
+    client = TestClient(app)
+    assert statements(client.get("/users/3")) == 3
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/users/4")
+
+
+def test_routes_report_statements(client, seeded):
+    sqlstats.reset_route_stats()
+
+    assert statements(client.get("/users/")) == 1
+    assert statements(client.get("/fridges/1/items/")) == 1
+    client.get("/users/1/notifications/")
+
+    routes = {stats["route"]: stats for stats in client.get("/debug/sql-stats").json()}
+    assert routes["GET /fridges/{fridge_id}/items/"]["statements"] == 1
+    assert routes["GET /users/{user_id}/notifications/"]["requests"] == 1
+
+
+def add_members(db, fridge_id, user_ids):
+    for user_id in user_ids:
+        db.add(models.User(user_id=user_id, email="user%d@example.com" % user_id,
+                           password_hash="x", name="User %d" % user_id, created_at=datetime.utcnow()))
+    db.flush()
+    for user_id in user_ids:
+        db.add(models.FridgeUser(fridge_id=fridge_id, user_id=user_id, role="viewer"))
+    db.commit()
+
+
+def test_members_in_constant_statements(client, db, seeded):
+    few = client.get("/fridges/1/members")
+    add_members(db, 1, range(10, 40))
+    many = client.get("/fridges/1/members")
+
+    assert (len(few.json()), len(many.json())) == (2, 32)
+    assert statements(few) == statements(many) == 1
+
+
+def test_notification_details_in_constant_statements(client, db, seeded):
+    few = client.get("/users/1/notifications/details")
+    # User 1 is told about the rest of fridge 1, user 2's fridges too
+    crud.add_user_to_fridge(db, 2, schemas.FridgeUserCreate(user_id=1, role="viewer"))
+    crud.generate_notifications(db)
+    many = client.get("/users/1/notifications/details")
+
+    assert len(few.json()) < len(many.json())
+    assert all(note["item"]["qr"]["product"]["name"] == "Milk" for note in many.json())
+    assert statements(few) == statements(many) == 1
+
+
+def test_failed_statements_leave_nothing_on_the_connection(db, seeded):
+    conn = db.connection()
+    info = copy.deepcopy(dict(conn.info))
+    with query_budget(10) as stats:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                db.execute(text("SELECT * FROM no_such_table"))
+            db.rollback()
+            conn = db.connection()
+        db.execute(text("SELECT 1"))
+
+    assert conn.info == info
+    assert stats.statements == 4
+    assert stats.db_seconds > 0
@@ -0,0 +1,43 @@
+# tests/test_summary.py
+
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+
+from app import crud, models, summary
+
+
+def dialect(url):
+    return make_url(url).get_dialect()()
+
+
+@pytest.mark.parametrize("url", ["mysql://", "mariadb://", "postgresql://", "sqlite://"])
+def test_counts_upserted(url):
+    rows = [{"fridge_id": 1, "spoil_date": date.today(), "item_count": 1}]
+    (stmt, params), = summary.count_statements(dialect(url), rows)
+    assert params is rows
+    assert str(stmt.compile(dialect=dialect(url))).startswith("INSERT INTO fridge_spoil_counts")
+
+
+def test_counts_rebuilt_without_upsert():
+    today = date.today()
+    rows = summary.deltas([(2, today, 1), (1, today, 1), (3, today, 0)])
+    clear, recount = summary.count_statements(dialect("mssql://"), rows)
+    assert clear[1] is None and recount[1] is None
+    assert clear[0].compile().construct_params()["fridge_id_1"] == [1, 2]
+
+
+def test_dashboard_agrees_with_notifications(db, seeded):
+    dashboard = crud.expiring_dashboard(db, 1, days=3, limit=2, today=seeded)
+
+    # Fridge 1: the items spoiling today are notified as spoiled, so
+    # they count as spoiled here too
+    assert (dashboard["spoiled"], dashboard["expiring_soon"], dashboard["items"]) == (3, 2, 6)
+    assert [item.item_id for item in dashboard["soonest"]] == [4, 5]
+    crud.generate_notifications(db)
+    spoiled = set(db.scalars(select(models.Notification.item_id).where(
+        models.Notification.user_id == 1, models.Notification.type == "spoiled"
+    )))
+    assert spoiled == {1, 2, 3}
@@ -0,0 +1,113 @@
+# tests/test_sync.py
+
+from datetime import timedelta
+
+import pytest
+
+
+def changes(client, since=None, fridge_id=1):
+    params = {"since": since} if since is not None else {}
+    response = client.get("/fridges/%d/changes" % fridge_id, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def item_ids(body):
+    return [item["item_id"] for item in body["items"]]
+
+
+def member_ids(body):
+    return [member["user_id"] for member in body["members"]]
+
+
+def new_item(client, today, fridge_id=1):
+    response = client.post("/fridges/%d/items/" % fridge_id, json={
+        "added_by": 1, "qr_code": "QR001", "factory_expires_at": str(today + timedelta(days=6)),
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_first_sync_is_everything(client, seeded):
+    body = changes(client)
+
+    assert body["full"] is True
+    assert item_ids(body) == list(range(1, 8))
+    assert member_ids(body) == [1, 2]
+    assert body["deleted_items"] == body["removed_members"] == []
+
+
+def test_item_writes_bump_the_version(client, seeded):
+    start = changes(client)["version"]
+    other = changes(client, fridge_id=2)["version"]
+
+    created = new_item(client, seeded)
+    after_create = changes(client, start)
+    assert after_create["version"] == start + 1
+    assert after_create["full"] is False
+    assert item_ids(after_create) == [created["item_id"]]
+
+    client.put("/items/4", json={"opened_at": str(seeded), "open_life_days": 2})
+    after_update = changes(client, start + 1)
+    assert after_update["version"] == start + 2
+    assert item_ids(after_update) == [4]
+
+    assert client.delete("/items/5").status_code == 204
+    after_delete = changes(client, start + 2)
+    assert after_delete["version"] == start + 3
+    assert (item_ids(after_delete), after_delete["deleted_items"]) == ([], [5])
+
+    bulk = client.post("/fridges/1/items/bulk", json=[
+        {"added_by": 1, "qr_code": "QR001", "factory_expires_at": str(seeded)},
+        {"added_by": 2, "qr_code": "QR001", "factory_expires_at": str(seeded)},
+    ]).json()["created"]
+    after_bulk = changes(client, start + 3)
+    assert after_bulk["version"] == start + 4
+    assert item_ids(after_bulk) == sorted(item["item_id"] for item in bulk)
+
+    # Only newer rows, all of them since the first version
+    since_start = changes(client, start)
+    assert sorted(item_ids(since_start)) == sorted([created["item_id"], 4] + item_ids(after_bulk))
+    assert since_start["deleted_items"] == [5]
+    # Other fridges are untouched
+    assert changes(client, fridge_id=2)["version"] == other
+
+
+def test_share_writes_and_tombstones(client, seeded):
+    start = changes(client)["version"]
+
+    assert client.post("/fridges/1/users/", json={"user_id": 3, "role": "viewer"}).status_code == 201
+    shared = changes(client, start)
+    assert shared["version"] == start + 1
+    assert member_ids(shared) == [3]
+
+    assert client.delete("/fridges/1/users/2").status_code == 204
+    revoked = changes(client, start + 1)
+    assert revoked["version"] == start + 2
+    assert (member_ids(revoked), revoked["removed_members"]) == ([], [2])
+
+    # Sharing again clears the tombstone: the member comes back instead
+    assert client.post("/fridges/1/users/", json={"user_id": 2, "role": "owner"}).status_code == 201
+    reshared = changes(client, start + 1)
+    assert reshared["version"] == start + 3
+    assert member_ids(reshared) == [2]
+    assert reshared["removed_members"] == []
+
+
+@pytest.mark.parametrize("ahead", [1, 100])
+def test_since_beyond_the_version_resyncs(client, seeded, ahead):
+    new_item(client, seeded)
+    client.delete("/items/1")
+    current = changes(client)["version"]
+
+    body = changes(client, current + ahead)
+
+    assert body["full"] is True
+    assert body["version"] == current
+    assert item_ids(body) == item_ids(changes(client))
+    assert 1 not in item_ids(body)
+    assert body["deleted_items"] == []
+
+
+def test_unknown_fridge(client, seeded):
+    assert client.get("/fridges/99/changes").status_code == 404
@@ -0,0 +1,46 @@
+# tests/test_users.py
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app import async_crud, crud, models, schemas
+from app.crud import Conflict
+
+
+def test_delete_refused_while_others_share_their_items(client, db, seeded):
+    response = client.delete("/users/1")
+
+    assert response.status_code == 409
+    assert crud.get_user(db, 1) is not None
+    assert db.scalar(select(func.count()).select_from(models.FridgeItem)) == 21
+
+
+def test_delete_takes_items_nobody_else_shares(client, db, seeded):
+    # Fridge 3 has no members; user 4 shares nothing
+    item = crud.create_fridge_item(db, 3, schemas.FridgeItemCreate(
+        added_by=4, qr_code="QR001", factory_expires_at=seeded + timedelta(days=3), open_life_days=3
+    ))
+
+    assert client.delete("/users/4").status_code == 204
+    assert client.delete("/users/4").status_code == 404
+    assert db.scalar(select(models.FridgeItem.item_id).where(models.FridgeItem.item_id == item.item_id)) is None
+    counts = dict(db.execute(
+        select(models.FridgeSpoilCount.spoil_date, models.FridgeSpoilCount.item_count)
+        .where(models.FridgeSpoilCount.fridge_id == 3)
+    ).all())
+    assert counts[seeded + timedelta(days=3)] == 0
+
+
+def test_async_delete_refused_while_others_share_their_items(db, seeded, async_sessions):
+    async def delete(user_id):
+        async with async_sessions() as session:
+            return await async_crud.delete_user(session, user_id)
+
+    with pytest.raises(Conflict):
+        asyncio.run(delete(1))
+    # User 3 added nothing and only loses the share of fridge 2
+    assert asyncio.run(delete(3)) is True
+    assert [m.user_id for m in crud.list_fridge_members(db, 2)] == [2]